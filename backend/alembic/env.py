@@ -52,7 +52,16 @@ def run_migrations_offline() -> None:
 def run_migrations_online() -> None:
     """
     在线模式运行迁移 (直接修改数据库)
+    
+    启动时的迁移协调 (app.db.migrations) 会通过 config.attributes 传入已持有的连接
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    
     configuration = config.get_section(config.config_ini_section)
     configuration["sqlalchemy.url"] = DATABASE_URL
     
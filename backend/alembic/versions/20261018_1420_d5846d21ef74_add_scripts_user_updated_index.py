@@ -0,0 +1,30 @@
+"""add scripts (user_id, updated_at, id) index
+
+Revision ID: d5846d21ef74
+Revises: 91273b71eeaa
+Create Date: 2026-10-18 14:20:11.402615+08:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5846d21ef74'
+down_revision = '91273b71eeaa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 游标分页按 (updated_at, id) 排序，先补齐历史数据中为空的 updated_at
+    op.execute("UPDATE scripts SET updated_at = created_at WHERE updated_at IS NULL")
+    op.create_index(
+        'ix_scripts_user_id_updated_at_id',
+        'scripts',
+        ['user_id', 'updated_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scripts_user_id_updated_at_id', table_name='scripts')
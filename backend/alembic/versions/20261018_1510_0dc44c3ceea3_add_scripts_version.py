@@ -0,0 +1,28 @@
+"""add scripts version
+
+Revision ID: 0dc44c3ceea3
+Revises: d5846d21ef74
+Create Date: 2026-10-18 15:10:42.118305+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0dc44c3ceea3'
+down_revision = 'd5846d21ef74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'scripts',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('scripts') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,109 @@
+"""compress script content and description
+
+Revision ID: 24165eb77f2e
+Revises: 0dc44c3ceea3
+Create Date: 2026-10-18 15:45:03.771926+08:00
+
+"""
+import logging
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '24165eb77f2e'
+down_revision = '0dc44c3ceea3'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic')
+
+BATCH_SIZE = 500
+COLUMNS = ('content', 'description')
+
+# 与 app.db.types.CompressedText 的存储格式一致：首字节 0x00 原文 / 0x01 zlib
+MARKER_RAW = b'\x00'
+MARKER_ZLIB = b'\x01'
+
+
+def _encode(value):
+    if value is None:
+        return None
+    raw = value.encode('utf-8')
+    if len(raw) >= settings.SCRIPT_COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(raw, settings.SCRIPT_COMPRESSION_LEVEL)
+        if len(compressed) < len(raw):
+            return MARKER_ZLIB + compressed
+    return MARKER_RAW + raw
+
+
+def _decode(value):
+    if value is None:
+        return None
+    value = bytes(value)
+    if value[:1] == MARKER_ZLIB:
+        return zlib.decompress(value[1:]).decode('utf-8')
+    return value[1:].decode('utf-8')
+
+
+def _convert(source_type, target_type, convert):
+    """新增临时列 -> 按主键分批转换 -> 删除旧列并改名"""
+    with op.batch_alter_table('scripts') as batch_op:
+        for name in COLUMNS:
+            batch_op.add_column(sa.Column(f'{name}_new', target_type, nullable=True))
+
+    scripts = sa.table(
+        'scripts',
+        sa.column('id', sa.Integer),
+        *(sa.column(name, source_type) for name in COLUMNS),
+        *(sa.column(f'{name}_new', target_type) for name in COLUMNS),
+    )
+    update = (
+        scripts.update()
+        .where(scripts.c.id == sa.bindparam('_id'))
+        .values({f'{name}_new': sa.bindparam(f'_{name}') for name in COLUMNS})
+    )
+
+    conn = op.get_bind()
+    last_id = 0
+    before = after = 0
+    while True:
+        rows = conn.execute(
+            sa.select(scripts.c.id, *(scripts.c[name] for name in COLUMNS))
+            .where(scripts.c.id > last_id)
+            .order_by(scripts.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            item = {'_id': row.id}
+            for name in COLUMNS:
+                old = getattr(row, name)
+                new = convert(old)
+                before += len(old) if isinstance(old, bytes) else len(old.encode('utf-8')) if old else 0
+                after += len(new) if isinstance(new, bytes) else len(new.encode('utf-8')) if new else 0
+                item[f'_{name}'] = new
+            params.append(item)
+        conn.execute(update, params)
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('scripts') as batch_op:
+        for name in COLUMNS:
+            batch_op.drop_column(name)
+            batch_op.alter_column(f'{name}_new', new_column_name=name)
+
+    logger.info("scripts 文本列: %d 字节 -> %d 字节", before, after)
+
+
+def upgrade() -> None:
+    _convert(sa.Text(), sa.LargeBinary(), _encode)
+
+
+def downgrade() -> None:
+    _convert(sa.LargeBinary(), sa.Text(), _decode)
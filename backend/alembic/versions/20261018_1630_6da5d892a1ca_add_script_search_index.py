@@ -0,0 +1,169 @@
+"""add script full-text search index
+
+Revision ID: 6da5d892a1ca
+Revises: 24165eb77f2e
+Create Date: 2026-10-18 16:30:12.418305+08:00
+
+"""
+import logging
+import re
+import unicodedata
+import zlib
+from itertools import islice
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6da5d892a1ca'
+down_revision = '24165eb77f2e'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic')
+
+BATCH_SIZE = 500
+
+# 以下为本迁移编写时 app.services.script_search 分词规则与 app.models.script_search DDL 的固定副本，
+# 之后修改应用代码不影响本迁移的行为
+MAX_INDEX_TOKENS = 50000
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_RUN_RE = re.compile(f"([{_CJK}]+)|([^\\W_{_CJK}]+)")
+
+SQLITE_FTS_TABLE = 'script_search_fts'
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE script_search_fts USING fts5("
+    "title_tokens, body_tokens, content='script_search_index', content_rowid='script_id')",
+    "CREATE TRIGGER script_search_index_ai AFTER INSERT ON script_search_index BEGIN "
+    "INSERT INTO script_search_fts(rowid, title_tokens, body_tokens) "
+    "VALUES (new.script_id, new.title_tokens, new.body_tokens); END",
+    "CREATE TRIGGER script_search_index_ad AFTER DELETE ON script_search_index BEGIN "
+    "INSERT INTO script_search_fts(script_search_fts, rowid, title_tokens, body_tokens) "
+    "VALUES ('delete', old.script_id, old.title_tokens, old.body_tokens); END",
+    "CREATE TRIGGER script_search_index_au AFTER UPDATE ON script_search_index BEGIN "
+    "INSERT INTO script_search_fts(script_search_fts, rowid, title_tokens, body_tokens) "
+    "VALUES ('delete', old.script_id, old.title_tokens, old.body_tokens); "
+    "INSERT INTO script_search_fts(rowid, title_tokens, body_tokens) "
+    "VALUES (new.script_id, new.title_tokens, new.body_tokens); END",
+)
+
+# 与 24165eb77f2e 写入的存储格式一致：首字节 0x00 原文 / 0x01 zlib
+MARKER_ZLIB = b'\x01'
+
+DOCUMENT_EXPRESSION = (
+    "(setweight(to_tsvector('simple'::regconfig, title_tokens), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, body_tokens), 'B'))"
+)
+
+
+def _decode(value):
+    if value is None:
+        return None
+    value = bytes(value)
+    if value[:1] == MARKER_ZLIB:
+        return zlib.decompress(value[1:]).decode('utf-8')
+    return value[1:].decode('utf-8')
+
+
+def _iter_tokens(text):
+    for match in _RUN_RE.finditer(unicodedata.normalize('NFKC', text).lower()):
+        cjk, word = match.groups()
+        if word:
+            yield word
+            continue
+        for i in range(len(cjk) - 1):
+            yield cjk[i:i + 2]
+        yield cjk[-1]
+
+
+def _index_tokens(text):
+    if not text:
+        return ''
+    return ' '.join(islice(dict.fromkeys(_iter_tokens(text)), MAX_INDEX_TOKENS))
+
+
+def _index_values(title, description, content):
+    return {
+        'title_tokens': _index_tokens(title),
+        'body_tokens': _index_tokens(' '.join(part for part in (description, content) if part)),
+    }
+
+
+def _backfill() -> None:
+    """按主键分批为已有剧本生成检索词"""
+    scripts = sa.table(
+        'scripts',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('title', sa.String),
+        sa.column('description', sa.LargeBinary),
+        sa.column('content', sa.LargeBinary),
+    )
+    index = sa.table(
+        'script_search_index',
+        sa.column('script_id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('title_tokens', sa.Text),
+        sa.column('body_tokens', sa.Text),
+    )
+    conn = op.get_bind()
+    last_id = 0
+    total = 0
+    while True:
+        rows = conn.execute(
+            sa.select(scripts)
+            .where(scripts.c.id > last_id)
+            .order_by(scripts.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(index.insert(), [
+            {
+                'script_id': row.id,
+                'user_id': row.user_id,
+                **_index_values(row.title, _decode(row.description), _decode(row.content)),
+            }
+            for row in rows
+        ])
+        total += len(rows)
+        last_id = rows[-1].id
+    logger.info("script_search_index: 已为 %d 个剧本建立检索词", total)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'script_search_index',
+        sa.Column('script_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('title_tokens', sa.Text(), nullable=False),
+        sa.Column('body_tokens', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['script_id'], ['scripts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('script_id'),
+    )
+    op.create_index(op.f('ix_script_search_index_user_id'), 'script_search_index', ['user_id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.create_index(
+            'ix_script_search_index_document',
+            'script_search_index',
+            [sa.text(DOCUMENT_EXPRESSION)],
+            postgresql_using='gin',
+        )
+    elif dialect == 'sqlite':
+        for ddl in SQLITE_FTS_DDL:
+            op.execute(ddl)
+
+    _backfill()
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_script_search_index_document', table_name='script_search_index')
+    elif dialect == 'sqlite':
+        op.execute(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}")
+    op.drop_index(op.f('ix_script_search_index_user_id'), table_name='script_search_index')
+    op.drop_table('script_search_index')
@@ -0,0 +1,197 @@
+"""add script scene index
+
+Revision ID: df732954939f
+Revises: 6da5d892a1ca
+Create Date: 2026-10-18 17:20:41.205817+08:00
+
+"""
+import hashlib
+import logging
+import re
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'df732954939f'
+down_revision = '6da5d892a1ca'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic')
+
+BATCH_SIZE = 200
+
+# 以下为本迁移编写时 app.services.screenplay 解析规则的固定副本，之后修改应用代码不影响本迁移的行为
+SCENE_HEADER_RE = re.compile(r"^[ \t]*===[ \t]*(.+?)[ \t]*===[ \t]*$", re.MULTILINE)
+SHOT_MARKER = "[画面描述]"
+DIALOGUE_RE = re.compile(
+    r"^(?P<character>[^\s：:（()\[\]=]{1,20})[：:][ \t]*"
+    r"(?:[（(](?P<paren>[^）)]*)[）)])?[ \t]*(?P<text>.*)$"
+)
+DIRECTION_WORDS = frozenset({"对话", "独白", "内心独白", "旁白", "画外音", "OS", "VO", "V.O.", "O.S."})
+END_HEADINGS = frozenset({"完", "剧终", "全剧终", "END", "THE END"})
+MAX_HEADING_LENGTH = 255
+
+# 与 24165eb77f2e 写入的存储格式一致：首字节 0x00 原文 / 0x01 zlib
+MARKER_RAW = b'\x00'
+MARKER_ZLIB = b'\x01'
+
+
+def _decode(value):
+    if value is None:
+        return None
+    value = bytes(value)
+    if value[:1] == MARKER_ZLIB:
+        return zlib.decompress(value[1:]).decode('utf-8')
+    return value[1:].decode('utf-8')
+
+
+def _encode(value):
+    raw = value.encode('utf-8')
+    if len(raw) >= settings.SCRIPT_COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(raw, settings.SCRIPT_COMPRESSION_LEVEL)
+        if len(compressed) < len(raw):
+            return MARKER_ZLIB + compressed
+    return MARKER_RAW + raw
+
+
+def _split_scenes(content):
+    """返回 (序号, 标题, 起始偏移, 结束偏移, 场景原文) 列表"""
+    if not content:
+        return []
+    headers = list(SCENE_HEADER_RE.finditer(content))
+    if not headers:
+        return [(1, None, 0, len(content), content)] if content.strip() else []
+    chunks = []
+    for i, header in enumerate(headers):
+        heading = header.group(1).strip()
+        if heading.upper() in END_HEADINGS:
+            break
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        chunks.append((len(chunks) + 1, heading[:MAX_HEADING_LENGTH], header.start(), end, content[header.start():end]))
+    return chunks
+
+
+def _parse_scene(text):
+    shots = []
+    dialogues = []
+    current = None
+    current_field = ''
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or SCENE_HEADER_RE.match(line):
+            current = None
+            continue
+        if stripped.startswith(SHOT_MARKER):
+            current = {'description': stripped[len(SHOT_MARKER):].strip()}
+            current_field = 'description'
+            shots.append(current)
+            continue
+        match = DIALOGUE_RE.match(stripped)
+        if match:
+            paren = (match.group('paren') or '').strip()
+            inline = match.group('text').strip()
+            if paren and not inline and paren not in DIRECTION_WORDS:
+                dialogues.append({'character': match.group('character'), 'direction': None, 'line': paren})
+                current = None
+            else:
+                current = {'character': match.group('character'), 'direction': paren or None, 'line': inline}
+                current_field = 'line'
+                dialogues.append(current)
+            continue
+        if current is not None:
+            current[current_field] = (current[current_field] + '\n' + stripped).strip()
+    characters = list(dict.fromkeys(d['character'] for d in dialogues))
+    return {'shots': shots, 'dialogues': dialogues, 'characters': characters}
+
+
+def _backfill() -> None:
+    """按主键分批解析已有剧本的正文"""
+    scripts = sa.table(
+        'scripts',
+        sa.column('id', sa.Integer),
+        sa.column('content', sa.LargeBinary),
+    )
+    scenes = sa.table(
+        'script_scenes',
+        sa.column('script_id', sa.Integer),
+        sa.column('position', sa.Integer),
+        sa.column('heading', sa.String),
+        sa.column('start_offset', sa.Integer),
+        sa.column('end_offset', sa.Integer),
+        sa.column('content_hash', sa.String),
+        sa.column('text', sa.LargeBinary),
+        sa.column('shot_count', sa.Integer),
+        sa.column('dialogue_count', sa.Integer),
+        sa.column('characters', sa.JSON),
+        sa.column('shots', sa.JSON),
+        sa.column('dialogues', sa.JSON),
+    )
+    conn = op.get_bind()
+    last_id = 0
+    total = 0
+    while True:
+        rows = conn.execute(
+            sa.select(scripts)
+            .where(scripts.c.id > last_id)
+            .order_by(scripts.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        values = []
+        for row in rows:
+            for position, heading, start, end, text in _split_scenes(_decode(row.content)):
+                parsed = _parse_scene(text)
+                values.append({
+                    'script_id': row.id,
+                    'position': position,
+                    'heading': heading,
+                    'start_offset': start,
+                    'end_offset': end,
+                    'content_hash': hashlib.sha1(text.encode('utf-8')).hexdigest(),
+                    'text': _encode(text),
+                    'shot_count': len(parsed['shots']),
+                    'dialogue_count': len(parsed['dialogues']),
+                    **parsed,
+                })
+        if values:
+            conn.execute(scenes.insert(), values)
+        total += len(values)
+        last_id = rows[-1].id
+    logger.info("script_scenes: 已解析 %d 个场景", total)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'script_scenes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('script_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('heading', sa.String(length=255), nullable=True),
+        sa.Column('start_offset', sa.Integer(), nullable=False),
+        sa.Column('end_offset', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=40), nullable=False),
+        sa.Column('text', sa.LargeBinary(), nullable=False),
+        sa.Column('shot_count', sa.Integer(), nullable=False),
+        sa.Column('dialogue_count', sa.Integer(), nullable=False),
+        sa.Column('characters', sa.JSON(), nullable=False),
+        sa.Column('shots', sa.JSON(), nullable=False),
+        sa.Column('dialogues', sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(['script_id'], ['scripts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_script_scenes_script_id_position', 'script_scenes', ['script_id', 'position'], unique=False
+    )
+    _backfill()
+
+
+def downgrade() -> None:
+    op.drop_index('ix_script_scenes_script_id_position', table_name='script_scenes')
+    op.drop_table('script_scenes')
@@ -1,13 +1,14 @@
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.core.security import decode_token
-from app.db.base import SessionLocal
+from app.core.security import token_cache
+from app.core.user_cache import user_cache
+from app.db.base import SessionLocal, get_async_db
 from app.models.user import User
 from app.schemas.token import TokenPayload
-from app.crud.user import user as crud_user
+from app.crud.user import async_user as crud_user
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -21,8 +22,8 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     credentials_exception = HTTPException(
@@ -31,7 +32,7 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = decode_token(token)
+    payload = token_cache.decode(token)
     if payload is None:
         raise credentials_exception
     
@@ -39,14 +40,20 @@ def get_current_user(
     if token_data.sub is None:
         raise credentials_exception
     
-    current_user = crud_user.get(db, id=int(token_data.sub))
+    user_id = int(token_data.sub)
+    current_user = user_cache.get(user_id)
+    if current_user is not None:
+        return current_user
+    
+    current_user = await crud_user.get(db, id=user_id)
     if current_user is None:
         raise credentials_exception
     
+    user_cache.set(current_user)
     return current_user
 
 
-def get_current_active_user(
+async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if not crud_user.is_active(current_user):
@@ -54,7 +61,7 @@ def get_current_active_user(
     return current_user
 
 
-def get_current_active_superuser(
+async def get_current_active_superuser(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if not current_user.is_superuser:
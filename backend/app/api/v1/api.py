@@ -1,7 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, scripts
+from app.api.v1.endpoints import admin, auth, jobs, users, scripts
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(scripts.router, prefix="/scripts", tags=["scripts"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
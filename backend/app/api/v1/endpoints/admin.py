@@ -0,0 +1,40 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app.core.password_hasher import password_hasher
+from app.core.rate_limit import rate_limiter
+from app.core.security import token_cache
+from app.core.user_cache import user_cache
+from app.db.base import async_pool_metrics, sync_pool_metrics
+from app.models.user import User
+from app.services.ai_gateway import ai_gateway
+from app.services.job_queue import job_queue
+from app.services.prompt_cache import prompt_cache
+from app.services.suggestions import suggestion_engine
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def read_metrics(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    运行指标（仅管理员）
+    """
+    return {
+        "user_cache": user_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "suggestions": suggestion_engine.stats(),
+        "ai_gateway": ai_gateway.stats(),
+        "prompt_cache": prompt_cache.stats(),
+        "jobs": await job_queue.stats(db),
+        "db_pool": {
+            "async": async_pool_metrics.stats(),
+            "sync": sync_pool_metrics.stats(),
+        },
+    }
@@ -1,49 +1,87 @@
 from datetime import timedelta
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.core.config import settings
+from app.core.password_hasher import PasswordHasherOverloaded
+from app.core.rate_limit import form_account, json_account, rate_limit
 from app.core.security import create_access_token, create_refresh_token, decode_token
-from app.core.redis_service import redis_service
-from app.schemas.token import Token, TokenRefresh
+from app.core.redis_service import async_redis_service
+from app.core.user_cache import user_cache
+from app.schemas.token import SessionInfo, Token, TokenRefresh
 from app.schemas.user import UserCreate, UserResponse
-from app.crud.user import user as crud_user
+from app.crud.user import async_user as crud_user
 
 router = APIRouter()
 
+# 按 IP 的预算先于按账号的预算检查，同一 IP 轮换账号也会被限制
+register_limits = [
+    Depends(rate_limit("register:ip", "RATE_LIMIT_REGISTER_PER_IP")),
+    Depends(rate_limit("register:account", "RATE_LIMIT_REGISTER_PER_ACCOUNT", json_account("email"))),
+]
+login_limits = [
+    Depends(rate_limit("login:ip", "RATE_LIMIT_LOGIN_PER_IP")),
+    Depends(rate_limit("login:account", "RATE_LIMIT_LOGIN_PER_ACCOUNT", form_account("username"))),
+]
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(
+
+def _overloaded_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _device_info(request: Request) -> Dict[str, Any]:
+    """记录到会话索引中的设备信息"""
+    return {
+        "user_agent": request.headers.get("user-agent"),
+        "ip": request.client.host if request.client else None,
+    }
+
+
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=register_limits,
+)
+async def register(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user_in: UserCreate,
 ) -> Any:
     """
     用户注册
     """
     # 检查邮箱是否已存在
-    if crud_user.get_by_email(db, email=user_in.email):
+    if await crud_user.get_by_email(db, email=user_in.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
     
     # 检查用户名是否已存在
-    if crud_user.get_by_username(db, username=user_in.username):
+    if await crud_user.get_by_username(db, username=user_in.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken",
         )
     
-    user = crud_user.create(db, obj_in=user_in)
+    try:
+        user = await crud_user.create(db, obj_in=user_in)
+    except PasswordHasherOverloaded:
+        raise _overloaded_exception()
     return user
 
 
-@router.post("/login", response_model=Token)
-def login(
-    db: Session = Depends(deps.get_db),
+@router.post("/login", response_model=Token, dependencies=login_limits)
+async def login(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
@@ -53,9 +91,12 @@ def login(
     1. 生成 access_token 和 refresh_token
     2. 将 refresh_token 存入 Redis 白名单（如果 Redis 可用）
     """
-    user = crud_user.authenticate(
-        db, email=form_data.username, password=form_data.password
-    )
+    try:
+        user = await crud_user.authenticate(
+            db, email=form_data.username, password=form_data.password
+        )
+    except PasswordHasherOverloaded:
+        raise _overloaded_exception()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -71,10 +112,11 @@ def login(
     access_token = create_access_token(subject=user.id)
     refresh_token = create_refresh_token(subject=user.id)
     
-    redis_service.store_refresh_token(
+    await async_redis_service.store_refresh_token(
         user_id=user.id,
         token=refresh_token,
-        expires_in_days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+        expires_in_days=settings.REFRESH_TOKEN_EXPIRE_DAYS,
+        device=_device_info(request),
     )
     
     return {
@@ -86,18 +128,19 @@ def login(
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(
+async def refresh_token(
+    request: Request,
     refresh_token: str,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
     """
     刷新访问令牌
     
     验证流程：
     1. 解码并验证 token 类型和有效期
-    2. 检查 token 是否在 Redis 白名单中（如果 Redis 可用）
-    3. 验证用户状态
-    4. 生成新的 token 对，并更新白名单
+    2. 验证用户状态
+    3. 生成新的 token 对，并在 Redis 中原子地轮换白名单（如果 Redis 可用）：
+       旧 token 不在白名单中则拒绝，否则删除旧 token 并写入新 token，只需一次往返
     """
     payload = decode_token(refresh_token)
     if payload is None or payload.get("type") != "refresh":
@@ -108,29 +151,28 @@ def refresh_token(
     
     user_id = int(payload.get("sub"))
     
-    if not redis_service.validate_refresh_token(user_id, refresh_token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token has been revoked",
-        )
-    
-    user = crud_user.get(db, id=user_id)
+    user = await crud_user.get(db, id=user_id)
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive",
         )
     
-    redis_service.revoke_refresh_token(user_id, refresh_token)
-    
     access_token = create_access_token(subject=user.id)
     new_refresh_token = create_refresh_token(subject=user.id)
     
-    redis_service.store_refresh_token(
+    rotated = await async_redis_service.rotate_refresh_token(
         user_id=user.id,
-        token=new_refresh_token,
-        expires_in_days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+        old_token=refresh_token,
+        new_token=new_refresh_token,
+        expires_in_days=settings.REFRESH_TOKEN_EXPIRE_DAYS,
+        device=_device_info(request),
     )
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked",
+        )
     
     return {
         "access_token": access_token,
@@ -141,9 +183,9 @@ def refresh_token(
 
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
-def logout(
+async def logout(
     refresh_token: str,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
     """
     用户登出
@@ -160,20 +202,34 @@ def logout(
     
     user_id = int(payload.get("sub"))
     
-    redis_service.revoke_refresh_token(user_id, refresh_token)
+    await async_redis_service.revoke_refresh_token(user_id, refresh_token)
     
     return {"message": "Successfully logged out"}
 
 
 @router.post("/logout-all", status_code=status.HTTP_200_OK)
-def logout_all_devices(
+async def logout_all_devices(
     current_user: Any = Depends(deps.get_current_user),
 ) -> Any:
     """
     登出所有设备
     
-    撤销当前用户的所有 refresh_token，强制所有设备重新登录
+    撤销当前用户的所有 refresh_token，强制所有设备重新登录，
+    同时清除所有 worker 中该用户的缓存
     """
-    redis_service.revoke_all_user_tokens(current_user.id)
+    await async_redis_service.revoke_all_user_tokens(current_user.id)
+    user_cache.invalidate(current_user.id)
     
     return {"message": "Successfully logged out from all devices"}
+
+
+@router.get("/sessions", response_model=List[SessionInfo])
+async def list_sessions(
+    current_user: Any = Depends(deps.get_current_user),
+) -> Any:
+    """
+    列出当前用户的在线会话（设备）
+    
+    数据来自 Redis 中的用户会话索引，Redis 不可用时返回空列表
+    """
+    return await async_redis_service.list_user_sessions(current_user.id)
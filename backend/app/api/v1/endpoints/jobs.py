@@ -0,0 +1,70 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app.models.user import User
+from app.schemas.job import JobResponse
+from app.services.job_queue import job_queue
+
+router = APIRouter()
+
+MAX_BATCH_IDS = 100
+
+
+@router.get("/", response_model=List[JobResponse])
+async def read_jobs(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    ids: List[int] = Query(..., max_length=MAX_BATCH_IDS),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    批量查询任务状态（?ids=1&ids=2，最多 100 个）
+
+    只返回属于当前用户的任务，不存在或无权访问的 ID 直接忽略
+    """
+    return await job_queue.get_many(db, user_id=current_user.id, ids=ids)
+
+
+async def _get_own_job(db: AsyncSession, job_id: int, current_user: User):
+    job = await job_queue.get(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    if job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def read_job(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    job_id: int,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    查询任务状态
+    """
+    return await _get_own_job(db, job_id, current_user)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    job_id: int,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    取消任务
+
+    排队中的任务立即取消；执行中的任务标记 cancel_requested，由 worker 在下次心跳时中断
+    """
+    job = await _get_own_job(db, job_id, current_user)
+    return await job_queue.cancel(db, job)
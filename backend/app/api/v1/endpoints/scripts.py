@@ -1,35 +1,113 @@
-import re
-from typing import Any, List, Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Any, List, Dict, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
-from app.crud.script import script as crud_script
+from app.core.etag import if_match, if_none_match, list_etag, script_etag
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.crud.script import MAX_PREVIEW_CHARS, ScriptVersionConflict, async_script as crud_script
+from app.db.base import AsyncSessionLocal
 from app.models.user import User
-from app.schemas.script import ScriptCreate, ScriptUpdate, ScriptResponse
+from app.schemas.job import JobResponse
+from app.schemas.script import (
+    SceneDetail,
+    SceneOutline,
+    ScriptBatchRequest,
+    ScriptBatchResult,
+    ScriptContentPatch,
+    ScriptContentPatchResult,
+    ScriptCreate,
+    ScriptGenerateRequest,
+    ScriptImportResult,
+    ScriptPage,
+    ScriptResponse,
+    ScriptSearchHit,
+    ScriptSummary,
+    ScriptUpdate,
+)
+from app.services import prompt_optimizer
+from app.services.ai_gateway import ai_gateway
+from app.services.job_queue import job_queue
+from app.services.screenplay import get_scene, get_scene_outline
+from app.services.script_generation import GENERATE_SCRIPT, build_generation_messages, stream_generation
+from app.services.script_patch import InvalidPatchError
+from app.services.script_search import search_scripts
+from app.services.script_transfer import InvalidImportError, export_ndjson, import_ndjson
+from app.services.suggestions import SuggestionContext, suggestion_engine
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[ScriptResponse])
-def list_scripts(
-    db: Session = Depends(deps.get_db),
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def _check_if_match(script, header: Optional[str]) -> None:
+    """If-Match 与当前 ETag 不一致时返回 412"""
+    if not if_match(header, script_etag(script.id, script.updated_at)):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Script has been modified",
+        )
+
+
+@router.get("/", response_model=Union[List[ScriptSummary], ScriptPage])
+async def list_scripts(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user),
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    preview_chars: int = Query(0, ge=0, le=MAX_PREVIEW_CHARS),
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
 ) -> Any:
     """
-    获取当前用户的所有剧本
+    获取当前用户的所有剧本（摘要，不含正文）
+
+    正文只通过 GET /scripts/{script_id} 获取；preview_chars > 0 时返回正文前若干字符
+    - 传入 cursor 时使用游标分页（第一页传空字符串），返回 {items, next_cursor}
+    - 否则保持原有的 skip/limit 偏移分页，直接返回列表
+    - 响应带列表级 ETag，If-None-Match 命中时返回 304，不查询列表也不序列化
     """
-    scripts = crud_script.get_by_user(
-        db, user_id=current_user.id, skip=skip, limit=limit
+    max_updated_at, count = await crud_script.get_list_version_info(db, user_id=current_user.id)
+    etag = list_etag(
+        current_user.id, max_updated_at, count,
+        variant=f"{skip}:{limit}:{cursor}:{preview_chars}",
+    )
+    if if_none_match(if_none_match_header, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursorError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        scripts, next_key = await crud_script.get_by_user_after(
+            db, user_id=current_user.id, cursor=after, limit=limit,
+            preview_chars=preview_chars,
+        )
+        return {
+            "items": scripts,
+            "next_cursor": encode_cursor(*next_key) if next_key else None,
+        }
+
+    scripts = await crud_script.get_by_user(
+        db, user_id=current_user.id, skip=skip, limit=limit,
+        preview_chars=preview_chars,
     )
     return scripts
 
 
 @router.post("/", response_model=ScriptResponse, status_code=status.HTTP_201_CREATED)
-def create_script(
+async def create_script(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user),
     script_in: ScriptCreate,
 ) -> Any:
@@ -37,7 +115,7 @@ def create_script(
     创建新剧本
     """
     # 检查是否已存在同名剧本
-    existing = crud_script.get_by_title(
+    existing = await crud_script.get_by_title(
         db, user_id=current_user.id, title=script_in.title
     )
     if existing:
@@ -46,23 +124,138 @@ def create_script(
             detail="Script with this title already exists",
         )
     
-    script = crud_script.create_with_user(
+    script = await crud_script.create_with_user(
         db, obj_in=script_in, user_id=current_user.id
     )
     return script
 
 
+@router.post("/batch", response_model=ScriptBatchResult)
+async def batch_scripts(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+    batch_in: ScriptBatchRequest,
+) -> Any:
+    """
+    批量创建、更新、删除剧本
+
+    所有操作只作用于当前用户的剧本，在一个事务中执行（删除 -> 更新 -> 创建）；
+    每一项单独返回结果，校验失败的项不会执行
+    """
+    results = await crud_script.apply_batch(
+        db,
+        user_id=current_user.id,
+        creates=batch_in.create,
+        updates=batch_in.update,
+        deletes=batch_in.delete,
+    )
+    counts = {"create": 0, "update": 0, "delete": 0}
+    for item in results:
+        if item["ok"]:
+            counts[item["op"]] += 1
+    return {
+        "results": results,
+        "created": counts["create"],
+        "updated": counts["update"],
+        "deleted": counts["delete"],
+    }
+
+
+@router.get("/search", response_model=List[ScriptSearchHit])
+async def search_user_scripts(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    全文检索当前用户的剧本（标题、简介、正文）
+
+    中文按二元组匹配，结果按相关度排序（标题命中权重更高），附带高亮摘要
+    """
+    return await search_scripts(db, user_id=current_user.id, q=q, skip=skip, limit=limit)
+
+
+@router.get("/export")
+async def export_scripts(
+    *,
+    current_user: User = Depends(deps.get_current_user),
+    gzip: bool = False,
+) -> StreamingResponse:
+    """
+    导出当前用户的全部剧本（NDJSON，每行一个剧本）
+
+    通过服务端游标分批读取并流式输出，内存占用与剧本数量无关；
+    gzip=true 时输出 .ndjson.gz 文件
+    """
+    user_id = current_user.id
+
+    async def body():
+        # 响应体在路由函数返回后才开始生成，使用独立的会话
+        async with AsyncSessionLocal() as db:
+            async for chunk in export_ndjson(db, user_id=user_id, compress=gzip):
+                yield chunk
+
+    filename = "scripts.ndjson.gz" if gzip else "scripts.ndjson"
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import", response_model=ScriptImportResult)
+async def import_scripts(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+    gzip: bool = False,
+) -> Any:
+    """
+    导入剧本（NDJSON，格式与导出一致）
+
+    边读取请求体边解析，按批插入；gzip=true 或 Content-Encoding: gzip 时按 gzip 解压。
+    与已有剧本同名的行不会导入，在 errors 中列出行号
+    """
+    compressed = gzip or request.headers.get("content-encoding", "").lower() == "gzip"
+    try:
+        result = await import_ndjson(
+            db, user_id=current_user.id, chunks=request.stream(), compressed=compressed
+        )
+    except InvalidImportError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    return result
+
+
 @router.get("/{script_id}", response_model=ScriptResponse)
-def get_script(
+async def get_script(
     *,
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user),
     script_id: int,
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
 ) -> Any:
     """
     获取指定剧本的详细信息
+
+    携带 If-None-Match 时先只查询 updated_at 计算 ETag，命中则直接返回 304，不加载正文
     """
-    script = crud_script.get(db, id=script_id)
+    if if_none_match_header is not None:
+        info = await crud_script.get_version_info(db, id=script_id)
+        if info and info[0] == current_user.id:
+            etag = script_etag(script_id, info[1])
+            if if_none_match(if_none_match_header, etag):
+                return _not_modified(etag)
+    
+    script = await crud_script.get(db, id=script_id)
     if not script:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -73,21 +266,29 @@ def get_script(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
+    response.headers["ETag"] = script_etag(script.id, script.updated_at)
     return script
 
 
 @router.put("/{script_id}", response_model=ScriptResponse)
-def update_script(
+async def update_script(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user),
+    response: Response,
     script_id: int,
     script_in: ScriptUpdate,
+    if_match_header: Optional[str] = Header(None, alias="If-Match"),
 ) -> Any:
     """
     更新剧本信息
+
+    携带 If-Match 时加行锁比较 ETag，不一致返回 412
     """
-    script = crud_script.get(db, id=script_id)
+    if if_match_header is not None:
+        script = await crud_script.get_for_update(db, id=script_id)
+    else:
+        script = await crud_script.get(db, id=script_id)
     if not script:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,10 +299,11 @@ def update_script(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
+    _check_if_match(script, if_match_header)
     
     # 如果更新标题，检查是否与其他剧本冲突
     if script_in.title and script_in.title != script.title:
-        existing = crud_script.get_by_title(
+        existing = await crud_script.get_by_title(
             db, user_id=current_user.id, title=script_in.title
         )
         if existing:
@@ -110,21 +312,22 @@ def update_script(
                 detail="Script with this title already exists",
             )
     
-    script = crud_script.update(db, db_obj=script, obj_in=script_in)
+    script = await crud_script.update(db, db_obj=script, obj_in=script_in)
+    response.headers["ETag"] = script_etag(script.id, script.updated_at)
     return script
 
 
 @router.delete("/{script_id}", response_model=ScriptResponse)
-def delete_script(
+async def delete_script(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user),
     script_id: int,
 ) -> Any:
     """
     删除剧本
     """
-    script = crud_script.get(db, id=script_id)
+    script = await crud_script.get(db, id=script_id)
     if not script:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -136,22 +339,29 @@ def delete_script(
             detail="Not enough permissions",
         )
     
-    script = crud_script.remove(db, id=script_id)
+    script = await crud_script.remove(db, id=script_id)
     return script
 
 
 @router.patch("/{script_id}/content", response_model=ScriptResponse)
-def update_script_content(
+async def update_script_content(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user),
+    response: Response,
     script_id: int,
     content: str,
+    if_match_header: Optional[str] = Header(None, alias="If-Match"),
 ) -> Any:
     """
     更新剧本内容
+
+    携带 If-Match 时加行锁比较 ETag，不一致返回 412
     """
-    script = crud_script.get(db, id=script_id)
+    if if_match_header is not None:
+        script = await crud_script.get_for_update(db, id=script_id)
+    else:
+        script = await crud_script.get(db, id=script_id)
     if not script:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -162,13 +372,212 @@ def update_script_content(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
+    _check_if_match(script, if_match_header)
     
-    script = crud_script.update_content(db, db_obj=script, content=content)
+    script = await crud_script.update_content(db, db_obj=script, content=content)
+    response.headers["ETag"] = script_etag(script.id, script.updated_at)
     return script
 
 
+@router.patch("/{script_id}/content/delta", response_model=ScriptContentPatchResult)
+async def patch_script_content(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+    response: Response,
+    script_id: int,
+    patch_in: ScriptContentPatch,
+    if_match_header: Optional[str] = Header(None, alias="If-Match"),
+) -> Any:
+    """
+    增量更新剧本内容
+    
+    请求体只携带相对 base_version 的区间编辑，服务端应用后版本号 +1；
+    base_version 不是最新版本时返回 409，客户端需重新拉取后再提交；
+    同时携带 If-Match 且 ETag 不一致时返回 412
+    """
+    script = await crud_script.get(db, id=script_id)
+    if not script:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Script not found",
+        )
+    if script.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    _check_if_match(script, if_match_header)
+    
+    try:
+        script = await crud_script.apply_content_patch(
+            db, db_obj=script, base_version=patch_in.base_version, edits=patch_in.edits
+        )
+    except ScriptVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    except InvalidPatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+    
+    response.headers["ETag"] = script_etag(script.id, script.updated_at)
+    return {
+        "id": script.id,
+        "version": script.version,
+        "content_length": len(script.content or ""),
+        "updated_at": script.updated_at,
+    }
+
+
+async def _check_script_owner(db: AsyncSession, script_id: int, user: User) -> None:
+    """只查询 user_id 校验剧本归属，不加载正文"""
+    info = await crud_script.get_version_info(db, id=script_id)
+    if not info:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Script not found",
+        )
+    if info[0] != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+
+@router.get("/{script_id}/scenes", response_model=List[SceneOutline])
+async def list_scenes(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+    script_id: int,
+) -> Any:
+    """
+    获取剧本的场景大纲（标题、位置、镜头与对白数量、出场角色）
+
+    直接读取场景索引，不加载也不解析正文
+    """
+    await _check_script_owner(db, script_id, current_user)
+    return await get_scene_outline(db, script_id)
+
+
+@router.get("/{script_id}/scenes/{position}", response_model=SceneDetail)
+async def get_script_scene(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+    script_id: int,
+    position: int,
+) -> Any:
+    """
+    获取单个场景的原文与解析结果（镜头、对白）
+    """
+    await _check_script_owner(db, script_id, current_user)
+    scene = await get_scene(db, script_id, position)
+    if not scene:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scene not found",
+        )
+    return scene
+
+
+@router.post("/{script_id}/generate", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def generate_script(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    script_id: int,
+    body: ScriptGenerateRequest,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    提交 AI 生成剧本正文的后台任务，立即返回任务（通过 GET /jobs/{job_id} 查询进度）
+
+    剧本状态置为 generating，生成完成后写入正文并置为 completed，最终失败或取消时恢复为 draft
+    """
+    script = await crud_script.get(db, id=script_id)
+    if not script:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Script not found"
+        )
+    if script.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    if script.status == "generating":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Script is already being generated"
+        )
+    
+    script.status = "generating"
+    db.add(script)
+    # 状态修改与任务在同一事务中提交
+    return await job_queue.enqueue(
+        db,
+        user_id=current_user.id,
+        job_type=GENERATE_SCRIPT,
+        payload={"script_id": script.id, "prompt": body.prompt},
+        priority=body.priority,
+    )
+
+
+@router.post("/{script_id}/generate/stream")
+async def generate_script_stream(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    script_id: int,
+    body: ScriptGenerateRequest,
+    current_user: User = Depends(deps.get_current_user),
+) -> StreamingResponse:
+    """
+    流式生成剧本正文（Server-Sent Events）
+
+    事件依次为 start、若干 token（data 为 {"text": 新增文本}）、done 或 error；
+    生成过程中已生成的正文定期写入剧本，客户端断开时取消上游调用并保留已生成的部分
+    """
+    script = await crud_script.get(db, id=script_id)
+    if not script:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Script not found"
+        )
+    if script.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    if script.status == "generating":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Script is already being generated"
+        )
+    if not ai_gateway.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No AI provider configured"
+        )
+    
+    messages = build_generation_messages(script, body.prompt)
+    script.status = "generating"
+    db.add(script)
+    await db.commit()
+    
+    return StreamingResponse(
+        stream_generation(script_id, messages),
+        media_type="text/event-stream",
+        # 禁止缓存与反向代理缓冲，保证 token 到达后立即发出
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/optimize/prompt")
-def optimize_prompt(
+async def optimize_prompt(
     *, 
     prompt: str,
     current_user: User = Depends(deps.get_current_user)
@@ -182,24 +591,18 @@ def optimize_prompt(
             detail="Prompt cannot be empty"
         )
     
-    # 生成优化建议
-    suggestions = [
-        f"{prompt}，包含详细的角色设定和情感冲突",
-        f"{prompt}，突出视觉效果和画面感",
-        f"{prompt}，加入意想不到的剧情转折",
-        f"{prompt}，注重对话的自然流畅和个性化",
-        f"{prompt}，营造特定的氛围和情绪基调"
-    ]
+    # 生成优化建议（未配置 AI 供应商时使用固定模板）
+    suggestions = await prompt_optimizer.optimize_prompt(prompt)
     
     return {"suggestions": suggestions}
 
 
 @router.post("/optimize/content")
-def optimize_content(
+async def optimize_content(
     *, 
     content: str,
     script_id: Optional[int] = None,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user)
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
@@ -214,7 +617,7 @@ def optimize_content(
     # 获取剧本信息（如果提供了script_id）
     script = None
     if script_id:
-        script = crud_script.get(db, id=script_id)
+        script = await crud_script.get(db, id=script_id)
         if not script:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -226,42 +629,11 @@ def optimize_content(
                 detail="Not enough permissions"
             )
     
-    suggestions = []
-    
-    # 结构优化建议
-    if "=== 场景" not in content:
-        suggestions.append({
-            "type": "structure",
-            "title": "剧本结构优化",
-            "description": "建议按照标准剧本结构组织内容",
-            "suggestion": f"{script.title if script else '剧本'}\n\n类型：{script.genre if script else '剧情'}\n目标时长：{script.duration if script else 5}分钟\n\n=== 场景1：开头 ===\n\n[画面描述]\n{content}\n\n=== 场景2：发展 ===\n\n[画面描述]\n...\n\n=== 场景3：高潮 ===\n\n[画面描述]\n...\n\n=== 场景4：结局 ===\n\n[画面描述]\n...\n\n=== 完 ==="
-        })
-    
-    # 对话优化建议
-    if "：（" not in content:
-        suggestions.append({
-            "type": "dialogue",
-            "title": "对话格式优化",
-            "description": "建议使用标准对话格式",
-            "suggestion": re.sub(r"([^：]+)：([^\n]+)", r"$1：（$2）", content)
-        })
-    
-    # 描述优化建议
-    if "[画面描述]" not in content:
-        suggestions.append({
-            "type": "description",
-            "title": "画面描述增强",
-            "description": "建议添加详细的画面描述",
-            "suggestion": re.sub(r"=== 场景[^=]+===", r"$&\n\n[画面描述]\n镜头推进，展示场景细节...", content)
-        })
+    context = SuggestionContext()
+    if script:
+        context = SuggestionContext(title=script.title, genre=script.genre, duration=script.duration)
     
-    # 角色优化建议
-    if "主角" not in content or "配角" not in content:
-        suggestions.append({
-            "type": "character",
-            "title": "角色设定完善",
-            "description": "建议明确角色设定和关系",
-            "suggestion": content.replace("角色A", "主角").replace("角色B", "配角").replace("=== 场景1：开头 ===", "=== 场景1：开头 ===\n\n[角色设定]\n主角：主要人物，性格特点...\n配角：重要配角，与主角的关系...")
-        })
+    # 规则引擎对整篇正文做一次遍历；长文本在线程池中计算，避免阻塞事件循环
+    suggestions = await run_in_threadpool(suggestion_engine.suggest, content, context)
     
     return {"suggestions": suggestions}
@@ -1,16 +1,16 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
-from app.crud.user import user as crud_user
+from app.crud.user import async_user as crud_user
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UserResponse)
-def read_user_me(
+async def read_user_me(
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -20,34 +20,37 @@ def read_user_me(
 
 
 @router.put("/me", response_model=UserResponse)
-def update_user_me(
+async def update_user_me(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user_in: UserUpdate,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     更新当前用户信息
+    
+    用户缓存通过 User 的 after_update 事件自动失效
     """
-    user = crud_user.update(db, db_obj=current_user, obj_in=user_in)
+    user = await crud_user.update(db, db_obj=current_user, obj_in=user_in)
     return user
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def read_user_by_id(
+async def read_user_by_id(
     user_id: int,
     current_user: User = Depends(deps.get_current_active_user),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
     """
     通过ID获取用户信息
     """
-    user = crud_user.get(db, id=user_id)
-    if user == current_user:
-        return user
+    # current_user 可能来自缓存，是独立的实例，按 ID 比较
+    if user_id == current_user.id:
+        return current_user
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
+    user = await crud_user.get(db, id=user_id)
     return user
@@ -0,0 +1,215 @@
+"""
+响应压缩中间件
+按 Accept-Encoding 协商 brotli / gzip，小于阈值的响应不压缩，
+流式响应逐块压缩并立即 flush，不在内存中攒完整响应体
+"""
+
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli（见 requirements.txt）时只使用 gzip
+    brotli = None
+
+# 不压缩的内容类型（SSE 需要逐事件送达，压缩交给反向代理决定）
+_SKIP_CONTENT_TYPES = ("text/event-stream",)
+_COMPRESSIBLE_CONTENT_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+
+def _parse_accept_encoding(header: str) -> dict:
+    """解析 Accept-Encoding，返回 {编码: q 值}"""
+    encodings = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name] = q
+    return encodings
+
+
+def choose_encoding(header: Optional[str]) -> Optional[str]:
+    """选择响应编码：同等 q 值下优先 br，其次 gzip；都不可用时返回 None"""
+    if not header:
+        return None
+    accepted = _parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for name in candidates:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith(_SKIP_CONTENT_TYPES):
+        return False
+    return content_type.startswith(_COMPRESSIBLE_CONTENT_TYPES) or "+json" in content_type
+
+
+class _Compressor:
+    """gzip / brotli 流式压缩器的统一接口"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if finish else self._br.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+def _strip_etag_suffixes(value: str) -> str:
+    """去掉中间件附加在 ETag 上的编码后缀，应用层看到的始终是原始 ETag"""
+    items = []
+    for item in value.split(","):
+        item = item.strip()
+        for encoding in ("br", "gzip"):
+            suffix = f'-{encoding}"'
+            if item.endswith(suffix):
+                item = item[: -len(suffix)] + '"'
+                break
+        items.append(item)
+    return ", ".join(items)
+
+
+class CompressionMiddleware:
+    """
+    brotli / gzip 响应压缩
+
+    压缩后的表示与原始表示不同，强 ETag 会附加 -br / -gzip 后缀；
+    请求中的 If-None-Match / If-Match 在进入应用前去掉后缀，应用层无需感知，
+    应用返回 304 时再为 ETag 加回客户端缓存的那个后缀
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = choose_encoding(headers.get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        raw_headers: List[Tuple[bytes, bytes]] = []
+        for name, value in scope["headers"]:
+            if name in (b"if-none-match", b"if-match"):
+                value = _strip_etag_suffixes(value.decode("latin-1")).encode("latin-1")
+            raw_headers.append((name, value))
+        scope = {**scope, "headers": raw_headers}
+
+        responder = _CompressionResponder(self, encoding, send, headers.get("if-none-match", ""))
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send, if_none_match: str) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.if_none_match = if_none_match
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # 等到第一段响应体才能判断大小，先暂存响应头
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            if message["status"] == 304:
+                self._restore_etag_suffix(message)
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or not _is_compressible(headers.get("content-type", ""))
+            )
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compressor = _Compressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/") and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+            compressed = self.compressor.compress(body, finish=not more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(compressed))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        if self.passthrough or self.compressor is None:
+            await self.send(message)
+            return
+        compressed = self.compressor.compress(body, finish=not more_body)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _restore_etag_suffix(self, message: Message) -> None:
+        """304 沿用客户端缓存的（压缩后表示的）ETag，与 200 响应保持一致"""
+        headers = MutableHeaders(raw=message["headers"])
+        etag = headers.get("etag")
+        if not etag or etag.startswith("W/") or not etag.endswith('"'):
+            return
+        suffixed = f'{etag[:-1]}-{self.encoding}"'
+        if suffixed in self.if_none_match:
+            headers["ETag"] = suffixed
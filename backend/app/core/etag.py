@@ -0,0 +1,63 @@
+"""
+ETag 工具模块
+剧本详情使用 id + updated_at 生成强 ETag，列表使用 max(updated_at) + 行数生成，
+配合 If-None-Match / If-Match 实现条件请求
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Optional
+
+
+def _make_etag(*parts: Any) -> str:
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _timestamp(value: Optional[datetime]) -> str:
+    return value.isoformat() if value is not None else ""
+
+
+def script_etag(script_id: int, updated_at: Optional[datetime]) -> str:
+    """单个剧本的强 ETag"""
+    return _make_etag("script", script_id, _timestamp(updated_at))
+
+
+def list_etag(user_id: int, max_updated_at: Optional[datetime], count: int, variant: str = "") -> str:
+    """
+    剧本列表的 ETag
+
+    Args:
+        user_id: 用户ID
+        max_updated_at: 该用户剧本的最大 updated_at
+        count: 该用户的剧本数（删除不会改变最大 updated_at，需要行数参与）
+        variant: 查询参数等影响响应内容的其他因素
+    """
+    return _make_etag("scripts", user_id, _timestamp(max_updated_at), count, variant)
+
+
+def _parse_etags(header: str):
+    for item in header.split(","):
+        item = item.strip()
+        if item:
+            yield item
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较，命中时应返回 304）"""
+    if not header:
+        return False
+    for item in _parse_etags(header):
+        if item == "*" or item.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def if_match(header: Optional[str], etag: str) -> bool:
+    """If-Match 是否满足（强比较，未携带该请求头时视为满足）"""
+    if header is None:
+        return True
+    for item in _parse_etags(header):
+        if item == "*" or item == etag:
+            return True
+    return False
@@ -0,0 +1,38 @@
+"""
+分页工具模块
+提供基于 (updated_at, id) 的不透明游标编码与解码
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+Cursor = Tuple[datetime, int]
+
+
+class InvalidCursorError(ValueError):
+    """游标格式错误"""
+
+
+def encode_cursor(updated_at: datetime, id: int) -> str:
+    """将排序键编码为 URL 安全的不透明游标"""
+    raw = json.dumps([updated_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Cursor]:
+    """
+    解码游标
+
+    空字符串表示第一页，返回 None；格式错误时抛出 InvalidCursorError
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(updated_at), int(id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
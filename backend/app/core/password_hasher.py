@@ -0,0 +1,123 @@
+"""
+密码哈希进程池模块
+bcrypt 是 CPU 密集型计算（约 250ms/次），放在独立的有界进程池中执行，
+避免登录/注册高峰占满请求线程池；排队过长时快速失败（503）
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import bcrypt
+
+from app.core.config import settings
+
+
+class PasswordHasherOverloaded(Exception):
+    """密码哈希队列已满"""
+
+
+def _hash_in_worker(password: str, rounds: int) -> Tuple[float, str]:
+    started_at = time.time()
+    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds))
+    return started_at, hashed.decode("utf-8")
+
+
+def _verify_in_worker(password: str, hashed_password: str) -> Tuple[float, bool]:
+    started_at = time.time()
+    return started_at, bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+class PasswordHasher:
+    """
+    有界 bcrypt 进程池
+
+    同时在途的任务数超过 workers + max_queue 时直接抛出 PasswordHasherOverloaded
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._run_time_total = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # 使用 spawn：fork 一个已有事件循环和线程的进程并不安全
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    async def _submit(self, fn, *args) -> Any:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise PasswordHasherOverloaded("Password hashing queue is full")
+            self.in_flight += 1
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        finished_at = time.time()
+        queue_wait = max(started_at - submitted_at, 0.0)
+        with self._lock:
+            self.completed += 1
+            self._queue_wait_total += queue_wait
+            self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+            self._run_time_total += finished_at - started_at
+        return result
+
+    async def hash(self, password: str, rounds: Optional[int] = None) -> str:
+        """在进程池中生成密码哈希"""
+        return await self._submit(_hash_in_worker, password, rounds or settings.BCRYPT_ROUNDS)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """在进程池中验证密码"""
+        return await self._submit(_verify_in_worker, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """进程池利用率与排队耗时"""
+        completed = self.completed
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(self.in_flight - self.workers, 0),
+            "utilization": round(min(self.in_flight, self.workers) / self.workers, 4),
+            "completed": completed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(self._queue_wait_total / completed * 1000, 2) if completed else 0.0,
+            "max_queue_wait_ms": round(self._queue_wait_max * 1000, 2),
+            "avg_run_time_ms": round(self._run_time_total / completed * 1000, 2) if completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
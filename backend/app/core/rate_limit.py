@@ -0,0 +1,196 @@
+"""
+令牌桶限流模块
+登录、注册等 CPU 密集的路由按客户端 IP 与账号分别限流，超出预算时直接返回 429，
+不再进入 bcrypt 与数据库查询
+
+- Redis 可用时由 Lua 脚本原子地维护令牌桶，所有 worker 共享同一份预算
+- Redis 不可用（或调用出错）时退回进程内令牌桶，预算按 worker 分别计算
+
+预算写作 "次数/周期"，例如 "10/minute"、"5/second"、"100/hour"：桶容量为次数，按周期匀速补充
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.redis_service import async_redis_service
+
+KEY_PREFIX = "rate_limit"
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: int
+    period_seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period_seconds
+
+
+def parse_rate(value: str) -> Rate:
+    """解析 "10/minute" 形式的预算"""
+    try:
+        count, period = value.split("/", 1)
+        period = period.strip().lower()
+        seconds = PERIODS[period] if period in PERIODS else float(period)
+        rate = Rate(int(count), float(seconds))
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '10/minute'") from e
+    if rate.capacity <= 0 or rate.period_seconds <= 0:
+        raise ValueError(f"Invalid rate limit {value!r}")
+    return rate
+
+
+class LocalTokenBuckets:
+    """进程内令牌桶，桶的数量超过 max_keys 时淘汰最久未使用的"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: Rate, cost: float = 1) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(rate.capacity), now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            tokens = min(rate.capacity, bucket[0] + (now - bucket[1]) * rate.refill_per_second)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return True, 0.0, bucket[0]
+            bucket[0] = tokens
+            return False, (cost - tokens) / rate.refill_per_second, tokens
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """按 scope（路由 + 维度）与 key 扣除令牌，Redis 优先，失败时退回进程内令牌桶"""
+
+    def __init__(self, max_local_keys: int):
+        self.local = LocalTokenBuckets(max_local_keys)
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self.redis_errors = 0
+
+    async def hit(self, scope: str, key: str, rate: Rate, cost: float = 1) -> Tuple[bool, float]:
+        """
+        Returns:
+            (是否放行, 需等待的秒数)
+        """
+        bucket_key = f"{KEY_PREFIX}:{scope}:{key}"
+        result = None
+        if async_redis_service.is_available:
+            result = await async_redis_service.take_token(bucket_key, rate.capacity, rate.refill_per_second, cost)
+            if result is None:
+                self.redis_errors += 1
+        if result is None:
+            result = self.local.take(bucket_key, rate, cost)
+        allowed, retry_after, _ = result
+        counters = self._counters.setdefault(scope, {"allowed": 0, "rejected": 0})
+        counters["allowed" if allowed else "rejected"] += 1
+        return allowed, retry_after
+
+    def clear(self) -> None:
+        self.local.clear()
+        self._counters.clear()
+        self.redis_errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.RATE_LIMIT_ENABLED,
+            "backend": "redis" if async_redis_service.is_available else "local",
+            "local_buckets": len(self.local),
+            "redis_errors": self.redis_errors,
+            "scopes": {scope: dict(counters) for scope, counters in self._counters.items()},
+        }
+
+
+rate_limiter = RateLimiter(max_local_keys=settings.RATE_LIMIT_MAX_LOCAL_KEYS)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """客户端 IP；仅在部署于可信反向代理之后时使用 X-Forwarded-For（否则可被伪造）"""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",", 1)[0].strip()
+    return request.client.host if request.client else None
+
+
+def _account_key(value: Any) -> Optional[str]:
+    # 账号（邮箱）不以明文写入 Redis key
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return hashlib.sha256(value.strip().lower().encode()).hexdigest()[:24]
+
+
+def form_account(field: str) -> Callable[[Request], Awaitable[Optional[str]]]:
+    """从表单字段取账号（FastAPI 已解析过表单，这里读取的是缓存）"""
+    async def key(request: Request) -> Optional[str]:
+        return _account_key((await request.form()).get(field))
+    return key
+
+
+def json_account(field: str) -> Callable[[Request], Awaitable[Optional[str]]]:
+    """从 JSON 请求体字段取账号"""
+    async def key(request: Request) -> Optional[str]:
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        return _account_key(body.get(field)) if isinstance(body, dict) else None
+    return key
+
+
+async def _ip_key(request: Request) -> Optional[str]:
+    return client_ip(request)
+
+
+def rate_limit(
+    scope: str,
+    rate_setting: str,
+    key: Callable[[Request], Awaitable[Optional[str]]] = _ip_key,
+) -> Callable[[Request], Awaitable[None]]:
+    """
+    创建限流依赖，用于路由的 dependencies=[Depends(...)]
+
+    Args:
+        scope: 预算名称，同一 scope 下的 key 共享同一组令牌桶
+        rate_setting: 预算所在的配置项名称（请求时读取，便于测试和运行时调整）
+        key: 从请求中取限流 key，返回 None 时不限流
+    """
+    async def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        value = await key(request)
+        if value is None:
+            return
+        allowed, retry_after = await rate_limiter.hit(scope, value, parse_rate(getattr(settings, rate_setting)))
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+    return dependency
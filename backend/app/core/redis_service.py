@@ -1,19 +1,181 @@
 """
 Redis 服务模块
 用于管理 Refresh Token 的白名单机制
+
+- RedisService: 同步客户端，供非请求路径（缓存失效广播等）使用
+- AsyncRedisService: 基于连接池的 asyncio 客户端，供请求处理路径使用
+
+存储结构：
+- refresh_token:{user_id}:{token_hash}  单个 token 的白名单标记，带过期时间
+- refresh_sessions:{user_id}            该用户所有在线会话的索引 (hash)，
+                                        field 为 token_hash，value 为设备信息 JSON，
+                                        过期的条目在登录 / 轮换时清理
 """
 
 import hashlib
-from typing import Optional
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import timedelta
 import redis
+import redis.asyncio as aioredis
 from app.core.config import settings
 
 
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def _token_key(user_id: int, token: str) -> str:
+    """
+    生成 Token 存储的 Redis key
+    使用 token 的 hash 值作为 key 的一部分，避免存储完整 token
+    """
+    return f"refresh_token:{user_id}:{_token_hash(token)}"
+
+
+def _session_index_key(user_id: int) -> str:
+    """用户会话索引的 Redis key"""
+    return f"refresh_sessions:{user_id}"
+
+
+def _session_meta(expire_seconds: int, device: Optional[Dict[str, Any]] = None, new_login: bool = True) -> str:
+    now = int(time.time())
+    meta: Dict[str, Any] = {"last_used_at": now, "expires_at": now + expire_seconds}
+    if new_login:
+        meta["created_at"] = now
+    if device:
+        meta.update(device)
+    return json.dumps(meta)
+
+
+def _parse_sessions(entries: Dict[str, str]) -> List[Dict[str, Any]]:
+    """解析会话索引，过滤已过期的条目"""
+    now = time.time()
+    sessions = []
+    for session_id, raw in entries.items():
+        try:
+            meta = json.loads(raw)
+        except ValueError:
+            continue
+        if meta.get("expires_at", 0) <= now:
+            continue
+        meta["session_id"] = session_id
+        sessions.append(meta)
+    sessions.sort(key=lambda s: s.get("last_used_at", 0), reverse=True)
+    return sessions
+
+
+def _revoke_all_params(user_id: int, hashes: List[str]) -> Tuple[List[str], List[str]]:
+    """REVOKE_ALL_USER_TOKENS_LUA 的 KEYS 与 ARGV"""
+    return [_session_index_key(user_id), *(f"refresh_token:{user_id}:{h}" for h in hashes)], list(hashes)
+
+
+# 删除会话索引中已过期（或无法解析）的条目，对应的 token key 已随 TTL 自动过期
+# 登录和轮换时顺带清理，索引大小只与在线会话数有关
+PRUNE_EXPIRED_SESSIONS_LUA = """
+local function prune_expired(index, now)
+    local entries = redis.call('HGETALL', index)
+    for i = 1, #entries, 2 do
+        local ok, meta = pcall(cjson.decode, entries[i + 1])
+        if not ok or type(meta) ~= 'table' or (tonumber(meta['expires_at']) or 0) <= now then
+            redis.call('HDEL', index, entries[i])
+        end
+    end
+end
+"""
+
+# 存储 token 并登记到用户会话索引，索引过期时间取所有会话中最晚的一个
+# KEYS[1] token key, KEYS[2] 会话索引; ARGV[1] 过期秒数, ARGV[2] token hash, ARGV[3] 会话信息, ARGV[4] 当前时间戳
+STORE_REFRESH_TOKEN_LUA = PRUNE_EXPIRED_SESSIONS_LUA + """
+prune_expired(KEYS[2], tonumber(ARGV[4]))
+redis.call('SETEX', KEYS[1], ARGV[1], '1')
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+if redis.call('TTL', KEYS[2]) < tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+# 令牌轮换：旧 token 存在则删除并写入新 token，一次往返内原子完成
+# 新会话继承旧会话的设备信息（登录时间等），并用 ARGV[4] 中的字段覆盖
+# KEYS[1] 旧 token key, KEYS[2] 新 token key, KEYS[3] 会话索引
+# ARGV[1] 过期秒数, ARGV[2] 旧 token hash, ARGV[3] 新 token hash, ARGV[4] 会话信息, ARGV[5] 当前时间戳
+ROTATE_REFRESH_TOKEN_LUA = PRUNE_EXPIRED_SESSIONS_LUA + """
+if redis.call('DEL', KEYS[1]) == 0 then
+    redis.call('HDEL', KEYS[3], ARGV[2])
+    return 0
+end
+local meta = ARGV[4]
+local old = redis.call('HGET', KEYS[3], ARGV[2])
+if old then
+    local merged = cjson.decode(old)
+    for k, v in pairs(cjson.decode(ARGV[4])) do
+        merged[k] = v
+    end
+    meta = cjson.encode(merged)
+    redis.call('HDEL', KEYS[3], ARGV[2])
+end
+prune_expired(KEYS[3], tonumber(ARGV[5]))
+redis.call('SETEX', KEYS[2], ARGV[1], '1')
+redis.call('HSET', KEYS[3], ARGV[3], meta)
+if redis.call('TTL', KEYS[3]) < tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[3], ARGV[1])
+end
+return 1
+"""
+
+# 撤销会话索引中列出的 token，代价为 O(该用户的会话数)
+# 脚本访问的 key 都通过 KEYS 传入（Redis Cluster 据此路由），只删除传入的会话，
+# 读取索引之后新登录的会话不受影响
+# KEYS[1] 会话索引, KEYS[2..n] token key; ARGV[1..n-1] 对应的 token hash
+REVOKE_ALL_USER_TOKENS_LUA = """
+for i = 2, #KEYS do
+    redis.call('DEL', KEYS[i])
+end
+for _, h in ipairs(ARGV) do
+    redis.call('HDEL', KEYS[1], h)
+end
+return #ARGV
+"""
+
+
+# 令牌桶限流：按经过的时间补充令牌后尝试扣除 cost 个，时间取 Redis 服务器时间，各 worker 之间无时钟偏差
+# KEYS[1] 桶; ARGV[1] 容量, ARGV[2] 每秒补充的令牌数, ARGV[3] 本次消耗
+# 返回 {是否放行, 需等待的秒数, 剩余令牌数}（小数以字符串返回，避免被截断为整数）
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(retry_after), tostring(tokens)}
+"""
+
+
 class RedisService:
     """
     Redis 服务类
     用于管理 Refresh Token 的存储和验证
+    
+    导入时只创建客户端，不建立连接；首次使用时在后台线程中连接（lifespan 启动时会主动连接一次）。
+    连接失败或运行中出现连接错误时标记为不可用，由后台线程按指数退避重连，恢复后自动重新启用
     """
     
     _instance: Optional['RedisService'] = None
@@ -26,45 +188,154 @@ class RedisService:
     
     def __init__(self):
         if self._client is None and settings.REDIS_URL:
-            try:
-                self._client = redis.from_url(
-                    settings.REDIS_URL,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5,
-                )
-                self._client.ping()
-            except (redis.ConnectionError, redis.TimeoutError) as e:
-                print(f"Warning: Redis connection failed: {e}")
-                self._client = None
+            self._client = redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+                socket_timeout=5,
+            )
+            self._store_script = self._client.register_script(STORE_REFRESH_TOKEN_LUA)
+            self._revoke_all_script = self._client.register_script(REVOKE_ALL_USER_TOKENS_LUA)
+            self._init_state()
+    
+    def _init_state(self) -> None:
+        self._state = "unknown"  # unknown, up, down
+        self._state_lock = threading.Lock()
+        self._reconnecting = False
+        self._reconnect_callbacks: List[Callable[[], None]] = []
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._down_since: Optional[float] = None
+        self._next_retry_at: Optional[float] = None
     
     @property
-    def is_available(self) -> bool:
-        """检查 Redis 是否可用"""
+    def is_configured(self) -> bool:
         return self._client is not None
     
+    @property
+    def is_available(self) -> bool:
+        """检查 Redis 是否可用（尚未连接过时在后台发起连接，本次返回 False，不阻塞调用方）"""
+        if self._client is None:
+            return False
+        if self._state == "unknown":
+            self._start_reconnect(initial=True)
+        return self._state == "up"
+    
+    def connect(self) -> bool:
+        """同步检测连通性（阻塞，最长 REDIS_CONNECT_TIMEOUT_SECONDS），失败时转入后台重连"""
+        if self._client is None:
+            return False
+        try:
+            self._client.ping()
+        except (redis.RedisError, OSError) as e:
+            self._mark_down(e)
+            return False
+        self._mark_up()
+        return True
+    
+    def report_failure(self, error: BaseException) -> None:
+        """操作中出现连接错误时调用：标记为不可用并开始后台重连（其他错误忽略）"""
+        if self._client is not None and isinstance(error, (redis.ConnectionError, redis.TimeoutError, OSError)):
+            self._mark_down(error)
+    
+    def call_on_reconnect(self, callback: Callable[[], None]) -> None:
+        """在下一次连接成功后调用 callback（在重连线程中执行），用于恢复订阅等"""
+        with self._state_lock:
+            self._reconnect_callbacks.append(callback)
+    
+    def health(self) -> Dict[str, Any]:
+        """连接状态，用于 /health"""
+        if self._client is None:
+            return {"status": "disabled"}
+        health: Dict[str, Any] = {"status": self._state, "failures": self.failures}
+        if self._state == "down":
+            health["last_error"] = self.last_error
+            health["down_seconds"] = round(time.monotonic() - self._down_since, 1)
+            if self._next_retry_at is not None:
+                health["next_retry_seconds"] = round(max(0.0, self._next_retry_at - time.monotonic()), 1)
+        return health
+    
+    def _mark_up(self) -> None:
+        with self._state_lock:
+            recovered = self._state == "down"
+            self._state = "up"
+            self._down_since = self._next_retry_at = None
+            callbacks, self._reconnect_callbacks = self._reconnect_callbacks, []
+        if recovered:
+            print("Redis connection restored")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Warning: Redis reconnect callback failed: {e}")
+    
+    def _record_failure(self, error: BaseException) -> None:
+        with self._state_lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self._state != "down":
+                self._state = "down"
+                self._down_since = time.monotonic()
+                print(f"Warning: Redis connection failed: {error}")
+    
+    def _mark_down(self, error: BaseException) -> None:
+        self._record_failure(error)
+        self._start_reconnect()
+    
+    def _start_reconnect(self, initial: bool = False) -> None:
+        with self._state_lock:
+            if self._reconnecting:
+                return
+            self._reconnecting = True
+        threading.Thread(target=self._reconnect_loop, args=(initial,), name="redis-reconnect", daemon=True).start()
+    
+    def _reconnect_loop(self, initial: bool) -> None:
+        attempt = 0
+        try:
+            while True:
+                if not initial or attempt:
+                    delay = min(
+                        settings.REDIS_RECONNECT_MAX_SECONDS,
+                        settings.REDIS_RECONNECT_BASE_SECONDS * 2 ** min(attempt, 16),
+                    )
+                    delay *= random.uniform(0.8, 1.2)
+                    self._next_retry_at = time.monotonic() + delay
+                    time.sleep(delay)
+                attempt += 1
+                try:
+                    self._client.ping()
+                except (redis.RedisError, OSError) as e:
+                    self._record_failure(e)
+                    continue
+                # 先结束重连状态再标记可用：之后出现的连接错误会重新启动重连线程
+                with self._state_lock:
+                    self._reconnecting = False
+                self._mark_up()
+                return
+        except BaseException:
+            with self._state_lock:
+                self._reconnecting = False
+            raise
+    
     def _get_token_key(self, user_id: int, token: str) -> str:
-        """
-        生成 Token 存储的 Redis key
-        使用 token 的 hash 值作为 key 的一部分，避免存储完整 token
-        """
-        token_hash = hashlib.sha256(token.encode()).hexdigest()[:16]
-        return f"refresh_token:{user_id}:{token_hash}"
+        return _token_key(user_id, token)
     
     def store_refresh_token(
-        self, 
-        user_id: int, 
-        token: str, 
-        expires_in_days: int = 7
+        self,
+        user_id: int,
+        token: str,
+        expires_in_days: int = 7,
+        device: Optional[Dict[str, Any]] = None,
     ) -> bool:
         """
-        存储 Refresh Token 到 Redis 白名单
+        存储 Refresh Token 到 Redis 白名单，并登记到用户会话索引
         
         Args:
             user_id: 用户ID
             token: Refresh Token
             expires_in_days: 过期天数
-            
+            device: 设备信息（user_agent、ip 等）
+        
         Returns:
             bool: 是否存储成功
         """
@@ -72,12 +343,15 @@ class RedisService:
             return False
         
         try:
-            key = self._get_token_key(user_id, token)
             expire_seconds = int(timedelta(days=expires_in_days).total_seconds())
-            self._client.setex(key, expire_seconds, "1")
+            self._store_script(
+                keys=[self._get_token_key(user_id, token), _session_index_key(user_id)],
+                args=[expire_seconds, _token_hash(token), _session_meta(expire_seconds, device), int(time.time())],
+            )
             return True
         except (redis.RedisError, Exception) as e:
             print(f"Warning: Failed to store refresh token: {e}")
+            self.report_failure(e)
             return False
     
     def validate_refresh_token(self, user_id: int, token: str) -> bool:
@@ -87,7 +361,7 @@ class RedisService:
         Args:
             user_id: 用户ID
             token: Refresh Token
-            
+        
         Returns:
             bool: Token 是否有效（在白名单中）
         """
@@ -99,6 +373,7 @@ class RedisService:
             return self._client.exists(key) > 0
         except (redis.RedisError, Exception) as e:
             print(f"Warning: Failed to validate refresh token: {e}")
+            self.report_failure(e)
             return True
     
     def revoke_refresh_token(self, user_id: int, token: str) -> bool:
@@ -108,7 +383,7 @@ class RedisService:
         Args:
             user_id: 用户ID
             token: Refresh Token
-            
+        
         Returns:
             bool: 是否删除成功
         """
@@ -116,20 +391,25 @@ class RedisService:
             return False
         
         try:
-            key = self._get_token_key(user_id, token)
-            self._client.delete(key)
+            pipe = self._client.pipeline(transaction=True)
+            pipe.delete(self._get_token_key(user_id, token))
+            pipe.hdel(_session_index_key(user_id), _token_hash(token))
+            pipe.execute()
             return True
         except (redis.RedisError, Exception) as e:
             print(f"Warning: Failed to revoke refresh token: {e}")
+            self.report_failure(e)
             return False
     
     def revoke_all_user_tokens(self, user_id: int) -> bool:
         """
         撤销用户的所有 Refresh Token（用于强制登出所有设备）
         
+        通过用户会话索引定位 token，不再扫描整个键空间
+        
         Args:
             user_id: 用户ID
-            
+        
         Returns:
             bool: 是否删除成功
         """
@@ -137,14 +417,371 @@ class RedisService:
             return False
         
         try:
-            pattern = f"refresh_token:{user_id}:*"
-            keys = self._client.keys(pattern)
-            if keys:
-                self._client.delete(*keys)
+            hashes = self._client.hkeys(_session_index_key(user_id))
+            if hashes:
+                keys, args = _revoke_all_params(user_id, hashes)
+                self._revoke_all_script(keys=keys, args=args)
             return True
         except (redis.RedisError, Exception) as e:
             print(f"Warning: Failed to revoke all user tokens: {e}")
+            self.report_failure(e)
+            return False
+    
+    def list_user_sessions(self, user_id: int) -> List[Dict[str, Any]]:
+        """
+        列出用户当前有效的会话（设备）
+        
+        Args:
+            user_id: 用户ID
+        
+        Returns:
+            会话信息列表，按最近使用时间倒序
+        """
+        if not self.is_available:
+            return []
+        
+        try:
+            return _parse_sessions(self._client.hgetall(_session_index_key(user_id)))
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to list user sessions: {e}")
+            self.report_failure(e)
+            return []
+    
+    def publish(self, channel: str, message: str) -> bool:
+        """
+        向频道发布消息
+        
+        Args:
+            channel: 频道名
+            message: 消息内容
+        
+        Returns:
+            bool: 是否发布成功
+        """
+        if not self.is_available:
             return False
+        
+        try:
+            self._client.publish(channel, message)
+            return True
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to publish to {channel}: {e}")
+            self.report_failure(e)
+            return False
+    
+    def subscribe(self, channel: str, handler: Callable[[str], None]) -> Optional["Subscription"]:
+        """
+        在后台线程中订阅频道
+        
+        Args:
+            channel: 频道名
+            handler: 收到消息时的回调，参数为消息内容
+        
+        Returns:
+            订阅（调用 stop() 结束），连接断开后在 Redis 恢复时自动重新订阅；未配置 Redis 时返回 None
+        """
+        if self._client is None:
+            return None
+        
+        subscription = Subscription(self, channel, handler)
+        if self.is_available:
+            subscription.start()
+        else:
+            self.call_on_reconnect(subscription.start)
+        return subscription
+
+
+class Subscription:
+    """RedisService.subscribe 返回的订阅，订阅线程因连接错误退出后等待重连再重新订阅"""
+    
+    def __init__(self, service: RedisService, channel: str, handler: Callable[[str], None]):
+        self._service = service
+        self.channel = channel
+        self._handler = handler
+        self._thread: Optional[Any] = None
+        self._stopped = False
+    
+    def start(self) -> None:
+        if self._stopped:
+            return
+        try:
+            pubsub = self._service._client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: lambda message: self._handler(message["data"])})
+            self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._on_error)
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to subscribe to {self.channel}: {e}")
+            self._service.call_on_reconnect(self.start)
+            self._service.report_failure(e)
+    
+    def _on_error(self, error: BaseException, pubsub: Any, thread: Any) -> None:
+        thread.stop()
+        pubsub.close()
+        if not self._stopped:
+            self._service.call_on_reconnect(self.start)
+            self._service.report_failure(error)
+    
+    def stop(self) -> None:
+        self._stopped = True
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+
+
+class AsyncRedisService:
+    """
+    异步 Redis 服务类
+    使用显式的连接池，接口与 RedisService 一致，另外提供单次往返的令牌轮换
+    """
+    
+    def __init__(self):
+        self._pool: Optional[aioredis.ConnectionPool] = None
+        self._client: Optional[aioredis.Redis] = None
+        if settings.REDIS_URL:
+            self._pool = aioredis.ConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                decode_responses=True,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+                socket_timeout=5,
+            )
+            self._client = aioredis.Redis(connection_pool=self._pool)
+            self._store_script = self._client.register_script(STORE_REFRESH_TOKEN_LUA)
+            self._rotate_script = self._client.register_script(ROTATE_REFRESH_TOKEN_LUA)
+            self._revoke_all_script = self._client.register_script(REVOKE_ALL_USER_TOKENS_LUA)
+            self._token_bucket_script = self._client.register_script(TOKEN_BUCKET_LUA)
+    
+    @property
+    def is_available(self) -> bool:
+        """检查 Redis 是否可用（连通性以同步客户端的检测与重连状态为准）"""
+        return self._client is not None and redis_service.is_available
+    
+    async def store_refresh_token(
+        self,
+        user_id: int,
+        token: str,
+        expires_in_days: int = 7,
+        device: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """存储 Refresh Token 到 Redis 白名单，并登记到用户会话索引"""
+        if not self.is_available:
+            return False
+        
+        try:
+            expire_seconds = int(timedelta(days=expires_in_days).total_seconds())
+            await self._store_script(
+                keys=[_token_key(user_id, token), _session_index_key(user_id)],
+                args=[expire_seconds, _token_hash(token), _session_meta(expire_seconds, device), int(time.time())],
+            )
+            return True
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to store refresh token: {e}")
+            redis_service.report_failure(e)
+            return False
+    
+    async def validate_refresh_token(self, user_id: int, token: str) -> bool:
+        """验证 Refresh Token 是否在白名单中"""
+        if not self.is_available:
+            return True
+        
+        try:
+            return await self._client.exists(_token_key(user_id, token)) > 0
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to validate refresh token: {e}")
+            redis_service.report_failure(e)
+            return True
+    
+    async def revoke_refresh_token(self, user_id: int, token: str) -> bool:
+        """撤销（删除）Refresh Token"""
+        if not self.is_available:
+            return False
+        
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.delete(_token_key(user_id, token))
+                pipe.hdel(_session_index_key(user_id), _token_hash(token))
+                await pipe.execute()
+            return True
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to revoke refresh token: {e}")
+            redis_service.report_failure(e)
+            return False
+    
+    async def rotate_refresh_token(
+        self,
+        user_id: int,
+        old_token: str,
+        new_token: str,
+        expires_in_days: int = 7,
+        device: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        轮换 Refresh Token：校验旧 token、删除旧 token、写入新 token
+        
+        通过 Lua 脚本在一次往返内原子完成，同一个旧 token 并发刷新时只有一个能成功
+        
+        Args:
+            user_id: 用户ID
+            old_token: 当前的 Refresh Token
+            new_token: 新签发的 Refresh Token
+            expires_in_days: 新 token 过期天数
+            device: 设备信息，覆盖会话中原有的字段
+        
+        Returns:
+            bool: 旧 token 是否有效（Redis 不可用时与 validate_refresh_token 一样放行）
+        """
+        if not self.is_available:
+            return True
+        
+        try:
+            expire_seconds = int(timedelta(days=expires_in_days).total_seconds())
+            rotated = await self._rotate_script(
+                keys=[
+                    _token_key(user_id, old_token),
+                    _token_key(user_id, new_token),
+                    _session_index_key(user_id),
+                ],
+                args=[
+                    expire_seconds,
+                    _token_hash(old_token),
+                    _token_hash(new_token),
+                    _session_meta(expire_seconds, device, new_login=False),
+                    int(time.time()),
+                ],
+            )
+            return rotated == 1
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to rotate refresh token: {e}")
+            redis_service.report_failure(e)
+            return True
+    
+    async def revoke_all_user_tokens(self, user_id: int) -> bool:
+        """撤销用户的所有 Refresh Token（用于强制登出所有设备）"""
+        if not self.is_available:
+            return False
+        
+        try:
+            hashes = await self._client.hkeys(_session_index_key(user_id))
+            if hashes:
+                keys, args = _revoke_all_params(user_id, hashes)
+                await self._revoke_all_script(keys=keys, args=args)
+            return True
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to revoke all user tokens: {e}")
+            redis_service.report_failure(e)
+            return False
+    
+    async def list_user_sessions(self, user_id: int) -> List[Dict[str, Any]]:
+        """列出用户当前有效的会话（设备），按最近使用时间倒序"""
+        if not self.is_available:
+            return []
+        
+        try:
+            return _parse_sessions(await self._client.hgetall(_session_index_key(user_id)))
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to list user sessions: {e}")
+            redis_service.report_failure(e)
+            return []
+    
+    async def push_signal(self, key: str, max_length: int = 1000) -> bool:
+        """向列表推入一个唤醒信号（列表长度上限 max_length，避免无人消费时无限增长）"""
+        if not self.is_available:
+            return False
+        
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.lpush(key, "1")
+                pipe.ltrim(key, 0, max_length - 1)
+                await pipe.execute()
+            return True
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to push signal: {e}")
+            redis_service.report_failure(e)
+            return False
+    
+    async def wait_signal(self, key: str, timeout: int) -> bool:
+        """阻塞等待唤醒信号，超时返回 False（timeout 需小于 socket_timeout）"""
+        if not self.is_available:
+            return False
+        
+        try:
+            return await self._client.brpop([key], timeout=timeout) is not None
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to wait for signal: {e}")
+            redis_service.report_failure(e)
+            return False
+    
+    async def take_token(
+        self, key: str, capacity: float, refill_per_second: float, cost: float = 1
+    ) -> Optional[Tuple[bool, float, float]]:
+        """
+        从令牌桶中扣除令牌（单次往返，原子操作）
+        
+        Returns:
+            (是否放行, 需等待的秒数, 剩余令牌数)，Redis 不可用或出错时返回 None
+        """
+        if not self.is_available:
+            return None
+        
+        try:
+            allowed, retry_after, remaining = await self._token_bucket_script(
+                keys=[key], args=[capacity, refill_per_second, cost]
+            )
+            return allowed == 1, float(retry_after), float(remaining)
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to take rate limit token: {e}")
+            redis_service.report_failure(e)
+            return None
+    
+    async def get_value(self, key: str) -> Optional[str]:
+        """读取字符串值，不存在或 Redis 不可用时返回 None"""
+        if not self.is_available:
+            return None
+        
+        try:
+            return await self._client.get(key)
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to get {key}: {e}")
+            redis_service.report_failure(e)
+            return None
+    
+    async def set_value(self, key: str, value: str, expire_seconds: float, only_if_absent: bool = False) -> bool:
+        """
+        写入带过期时间的字符串值
+        
+        Args:
+            only_if_absent: 仅在 key 不存在时写入（SET NX，可用作短期锁）
+        
+        Returns:
+            bool: 是否写入
+        """
+        if not self.is_available:
+            return False
+        
+        try:
+            return bool(await self._client.set(key, value, px=int(expire_seconds * 1000), nx=only_if_absent))
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to set {key}: {e}")
+            redis_service.report_failure(e)
+            return False
+    
+    async def delete_value(self, key: str) -> bool:
+        """删除 key"""
+        if not self.is_available:
+            return False
+        
+        try:
+            await self._client.delete(key)
+            return True
+        except (redis.RedisError, Exception) as e:
+            print(f"Warning: Failed to delete {key}: {e}")
+            redis_service.report_failure(e)
+            return False
+    
+    async def close(self) -> None:
+        """关闭连接池"""
+        if self._pool is not None:
+            await self._pool.disconnect()
 
 
 redis_service = RedisService()
+async_redis_service = AsyncRedisService()
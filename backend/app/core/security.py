@@ -1,5 +1,9 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 from jose import JWTError, jwt
 import bcrypt
 from app.core.config import settings
@@ -13,13 +17,25 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
-def get_password_hash(password: str) -> str:
-    """生成密码哈希"""
-    salt = bcrypt.gensalt()
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """生成密码哈希，rounds 默认取 BCRYPT_ROUNDS"""
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    检查密码哈希的 cost 是否与当前 BCRYPT_ROUNDS 一致
+    
+    bcrypt 哈希格式为 $2b$<cost>$<salt+hash>
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
 def create_access_token(subject: Union[str, int], expires_delta: Optional[timedelta] = None) -> str:
     """
     创建访问令牌
@@ -59,3 +75,62 @@ def decode_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+
+class VerifiedTokenCache:
+    """
+    已验证 JWT 的进程内缓存
+    
+    以 token 的 SHA-256 摘要为键，保存验签后的 payload 直到 token 的 exp，
+    条目数超过上限时按 LRU 淘汰。同一个 access token 在有效期内会被
+    前端反复发送，命中时可跳过 HMAC 校验和声明解析
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def decode(self, token: str) -> Optional[dict]:
+        """与 decode_token 相同的语义，优先读取缓存"""
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[key]
+            self.misses += 1
+        
+        payload = decode_token(token)
+        if payload is None or not isinstance(payload.get("exp"), (int, float)):
+            return payload
+        
+        with self._lock:
+            self._entries[key] = (payload["exp"], payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return dict(payload)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
@@ -0,0 +1,169 @@
+"""
+认证用户缓存模块
+为 get_current_user 提供进程内的用户快照缓存（TTL + LRU），
+通过 Redis 发布/订阅在多个 worker 之间同步失效
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.config import settings
+from app.core.redis_service import redis_service
+from app.models.user import User
+
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+# 会话中已修改、待提交后失效的用户 ID
+PENDING_KEY = "user_cache_pending"
+
+
+class UserCache:
+    """
+    用户快照缓存
+
+    缓存的是列值字典而不是 ORM 对象，取出时重建为 detached 的 User，
+    避免不同请求（不同 Session）之间共享同一个实例
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._subscriber: Optional[Any] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int) -> Optional[User]:
+        """获取缓存的用户，未命中或已过期时返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            snapshot = entry[1]
+
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, user: User) -> None:
+        """写入用户快照"""
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        snapshot = {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(User).column_attrs
+        }
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[user.id] = (expires_at, snapshot)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int, broadcast: bool = True) -> None:
+        """
+        使指定用户的缓存失效
+
+        Args:
+            user_id: 用户ID
+            broadcast: 是否通过 Redis 通知其他 worker
+        """
+        self._evict_local(user_id)
+        if not broadcast or not redis_service.is_available:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            redis_service.publish(INVALIDATION_CHANNEL, str(user_id))
+        else:
+            # 在事件循环中时不阻塞请求，发布交给线程池
+            loop.run_in_executor(None, redis_service.publish, INVALIDATION_CHANNEL, str(user_id))
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等统计信息"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "subscribed": self._subscriber is not None,
+        }
+
+    def start_listener(self) -> None:
+        """订阅 Redis 失效广播（Redis 不可用时只使用本地失效）"""
+        if self._subscriber is None:
+            self._subscriber = redis_service.subscribe(INVALIDATION_CHANNEL, self._on_message)
+
+    def stop_listener(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.stop()
+            self._subscriber = None
+
+    def _on_message(self, data: str) -> None:
+        try:
+            self._evict_local(int(data))
+        except ValueError:
+            pass
+
+    def _evict_local(self, user_id: int) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+
+user_cache = UserCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target: User) -> None:
+    """
+    任何途径修改或删除用户（更新资料、停用账号等）都会使缓存失效
+
+    flush 时只记录用户 ID，提交后才失效：提交前其他请求读到的仍是旧数据，
+    此时失效会被它们重新缓存旧数据，并一直使用到 TTL 过期
+    """
+    session = object_session(target)
+    if session is None:
+        user_cache.invalidate(target.id)
+        return
+    session.info.setdefault(PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(PENDING_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
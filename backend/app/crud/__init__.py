@@ -1,4 +1,4 @@
-from app.crud.user import user
-from app.crud.script import script
+from app.crud.user import user, async_user
+from app.crud.script import async_script
 
-__all__ = ["user", "script"]
+__all__ = ["user", "async_user", "async_script"]
@@ -1,35 +1,171 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import bindparam, delete, func, insert, null, select, tuple_, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
+from app.core.pagination import Cursor
+from app.crud.base import AsyncCRUDBase
+from app.db.types import CompressedTextPrefix, prefix_bytes_for
 from app.models.script import Script
-from app.schemas.script import ScriptCreate, ScriptUpdate
+from app.schemas.script import ScriptBatchUpdateItem, ScriptCreate, ScriptTextEdit, ScriptUpdate
+from app.services.script_patch import apply_text_edits
+from app.services.screenplay import remove_scenes, sync_scenes
+from app.services.script_search import SearchRow, reindex_scripts, remove_from_index
 
 
-class CRUDScript(CRUDBase[Script, ScriptCreate, ScriptUpdate]):
-    def get_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+class ScriptVersionConflict(Exception):
+    """基准版本与当前版本不一致"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Script has been modified, current version is {current_version}")
+        self.current_version = current_version
+
+
+# 这些字段变化时需要更新全文检索词
+SEARCHABLE_FIELDS = frozenset({"title", "description", "content"})
+
+
+def _search_row(db_obj: Script) -> SearchRow:
+    return db_obj.id, db_obj.user_id, db_obj.title, db_obj.description, db_obj.content
+
+
+def _bump_version_on_content_change(obj_in: Union[ScriptUpdate, Dict[str, Any]]) -> Dict[str, Any]:
+    if isinstance(obj_in, dict):
+        update_data = dict(obj_in)
+    else:
+        update_data = obj_in.model_dump(exclude_unset=True)
+    if "content" in update_data:
+        update_data["version"] = Script.version + 1
+    return update_data
+
+
+MAX_PREVIEW_CHARS = 500
+
+
+def _summary_select(preview_chars: int = 0):
+    """
+    列表摘要查询：正文列延迟加载且禁止隐式加载，
+    需要摘要时只在 SQL 中截取正文开头的一小段字节，再解码出前 preview_chars 个字符
+    """
+    preview_chars = min(preview_chars, MAX_PREVIEW_CHARS)
+    preview = (
+        type_coerce(
+            func.substr(Script.content, 1, prefix_bytes_for(preview_chars)),
+            CompressedTextPrefix(preview_chars),
+        )
+        if preview_chars > 0
+        else null()
+    )
+    return select(Script).options(
+        defer(Script.content, raiseload=True),
+        with_expression(Script.content_preview, preview),
+    )
+
+
+# 导出的列（与 ScriptCreate 兼容，导出文件可直接导入）
+EXPORT_COLUMNS = (
+    Script.id,
+    Script.title,
+    Script.description,
+    Script.content,
+    Script.genre,
+    Script.target_audience,
+    Script.duration,
+    Script.status,
+    Script.version,
+    Script.created_at,
+    Script.updated_at,
+)
+
+
+class AsyncCRUDScript(AsyncCRUDBase[Script, ScriptCreate, ScriptUpdate]):
+    async def get_by_user(
+        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100,
+        preview_chars: int = 0,
     ) -> List[Script]:
-        """获取用户的所有剧本"""
-        return (
-            db.query(Script)
-            .filter(Script.user_id == user_id)
+        """获取用户的所有剧本（摘要，不加载正文）"""
+        result = await db.execute(
+            _summary_select(preview_chars)
+            .where(Script.user_id == user_id)
+            .order_by(Script.updated_at.desc(), Script.id.desc())
             .offset(skip)
             .limit(limit)
-            .all()
         )
+        return list(result.scalars().all())
+
+    async def get_by_user_after(
+        self, db: AsyncSession, *, user_id: int, cursor: Optional[Cursor] = None, limit: int = 100,
+        preview_chars: int = 0,
+    ) -> Tuple[List[Script], Optional[Cursor]]:
+        """
+        游标分页获取用户的剧本（摘要，不加载正文）
+
+        按 (updated_at, id) 倒序，命中 (user_id, updated_at, id) 复合索引，
+        翻页代价与页码无关。返回当前页以及下一页的游标（没有更多数据时为 None）
+        """
+        stmt = _summary_select(preview_chars).where(Script.user_id == user_id)
+        if cursor is not None:
+            stmt = stmt.where(tuple_(Script.updated_at, Script.id) < tuple_(*cursor))
+        stmt = stmt.order_by(Script.updated_at.desc(), Script.id.desc()).limit(limit + 1)
+        rows = list((await db.execute(stmt)).scalars().all())
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        if not rows:
+            return rows, None
+        return rows, (rows[-1].updated_at, rows[-1].id)
+
+    async def stream_by_user(
+        self, db: AsyncSession, *, user_id: int, batch_size: int = 200
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        以服务端游标分批读取用户的全部剧本（含正文），用于导出
+
+        只查询列而不构造 ORM 对象，每批 batch_size 行，内存占用与剧本总数无关
+        """
+        result = await db.stream(
+            select(*EXPORT_COLUMNS)
+            .where(Script.user_id == user_id)
+            .order_by(Script.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            yield [row._asdict() for row in partition]
+
+    async def get_for_update(self, db: AsyncSession, *, id: int) -> Optional[Script]:
+        """获取剧本并加行锁（SELECT ... FOR UPDATE），用于 If-Match 条件更新"""
+        return await db.get(Script, id, with_for_update=True)
+
+    async def get_version_info(self, db: AsyncSession, *, id: int) -> Optional[Tuple[int, Any]]:
+        """只查询 (user_id, updated_at)，用于计算 ETag 而不加载正文"""
+        result = await db.execute(
+            select(Script.user_id, Script.updated_at).where(Script.id == id)
+        )
+        row = result.first()
+        return tuple(row) if row is not None else None
+
+    async def get_list_version_info(self, db: AsyncSession, *, user_id: int) -> Tuple[Any, int]:
+        """查询用户剧本的 (max(updated_at), 行数)，用于计算列表 ETag"""
+        result = await db.execute(
+            select(func.max(Script.updated_at), func.count(Script.id))
+            .where(Script.user_id == user_id)
+        )
+        max_updated_at, count = result.one()
+        return max_updated_at, count
 
-    def get_by_title(
-        self, db: Session, *, user_id: int, title: str
+    async def get_by_title(
+        self, db: AsyncSession, *, user_id: int, title: str
     ) -> Optional[Script]:
         """根据标题获取剧本"""
-        return (
-            db.query(Script)
-            .filter(Script.user_id == user_id, Script.title == title)
-            .first()
+        result = await db.execute(
+            select(Script)
+            .where(Script.user_id == user_id, Script.title == title)
+            .limit(1)
         )
+        return result.scalars().first()
 
-    def create_with_user(
-        self, db: Session, *, obj_in: ScriptCreate, user_id: int
+    async def create_with_user(
+        self, db: AsyncSession, *, obj_in: ScriptCreate, user_id: int
     ) -> Script:
         """创建剧本并关联用户"""
         db_obj = Script(
@@ -43,19 +179,248 @@ class CRUDScript(CRUDBase[Script, ScriptCreate, ScriptUpdate]):
             user_id=user_id,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
+        await reindex_scripts(db, [_search_row(db_obj)])
+        if db_obj.content:
+            await sync_scenes(db, db_obj.id, db_obj.content)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
-    def update_content(
-        self, db: Session, *, db_obj: Script, content: str
+    async def update(
+        self, db: AsyncSession, *, db_obj: Script, obj_in: Union[ScriptUpdate, Dict[str, Any]]
+    ) -> Script:
+        update_data = _bump_version_on_content_change(obj_in)
+        for field, value in update_data.items():
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, value)
+        db.add(db_obj)
+        if SEARCHABLE_FIELDS & update_data.keys():
+            await db.flush()
+            await reindex_scripts(db, [_search_row(db_obj)])
+        if "content" in update_data:
+            await sync_scenes(db, db_obj.id, db_obj.content)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update_content(
+        self, db: AsyncSession, *, db_obj: Script, content: str
     ) -> Script:
         """更新剧本内容"""
         db_obj.content = content
+        db_obj.version = Script.version + 1
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
+        await reindex_scripts(db, [_search_row(db_obj)])
+        await sync_scenes(db, db_obj.id, content)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Script]:
+        obj = await db.get(Script, id)
+        if obj is not None:
+            await remove_from_index(db, [id])
+            await remove_scenes(db, [id])
+            await db.delete(obj)
+            await db.commit()
+        return obj
+
+    async def apply_content_patch(
+        self, db: AsyncSession, *, db_obj: Script, base_version: int, edits: Sequence[ScriptTextEdit]
+    ) -> Script:
+        """
+        在基准版本上应用正文区间编辑
+
+        以 version 做乐观并发控制：UPDATE 语句带 version = base_version 条件，
+        版本已变化（包括并发写入）时抛出 ScriptVersionConflict；
+        编辑非法时抛出 InvalidPatchError
+        """
+        if db_obj.version != base_version:
+            raise ScriptVersionConflict(db_obj.version)
+
+        content = apply_text_edits(db_obj.content or "", edits)
+        result = await db.execute(
+            update(Script)
+            .where(Script.id == db_obj.id, Script.version == base_version)
+            .values(content=content, version=Script.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await db.rollback()
+            await db.refresh(db_obj, attribute_names=["version"])
+            raise ScriptVersionConflict(db_obj.version)
+        await reindex_scripts(db, [(db_obj.id, db_obj.user_id, db_obj.title, db_obj.description, content)])
+        await sync_scenes(db, db_obj.id, content)
+        await db.commit()
+        # 正文已在内存中，只回读版本号和时间戳
+        set_committed_value(db_obj, "content", content)
+        await db.refresh(db_obj, attribute_names=["version", "updated_at"])
+        return db_obj
+
+    async def apply_batch(
+        self, db: AsyncSession, *, user_id: int,
+        creates: Sequence[ScriptCreate] = (),
+        updates: Sequence[ScriptBatchUpdateItem] = (),
+        deletes: Sequence[int] = (),
+    ) -> List[Dict[str, Any]]:
+        """
+        在一个事务中批量删除、更新、创建当前用户的剧本
+
+        归属检查和标题重复检查各只用一条集合查询完成；删除是一条 IN 语句，
+        更新按修改的字段分组后以 executemany 执行，创建是一条多行 INSERT ... RETURNING。
+        校验不通过的单项不执行并在结果中给出原因，其余各项要么全部生效要么全部回滚
+        """
+        results: List[Dict[str, Any]] = []
+
+        # 归属检查：不属于当前用户的 id 一律视为不存在
+        target_ids = {item.id for item in updates} | set(deletes)
+        owned: Dict[int, str] = {}
+        if target_ids:
+            rows = await db.execute(
+                select(Script.id, Script.title)
+                .where(Script.user_id == user_id, Script.id.in_(target_ids))
+            )
+            owned = dict(rows.all())
+
+        delete_ids: List[int] = []
+        for index, script_id in enumerate(deletes):
+            error = None
+            if script_id not in owned:
+                error = "Script not found"
+            elif script_id in delete_ids:
+                error = "Duplicate id in batch"
+            else:
+                delete_ids.append(script_id)
+            results.append({"op": "delete", "index": index, "ok": error is None, "id": script_id, "error": error})
+
+        update_rows: List[Tuple[int, Dict[str, Any]]] = []
+        update_results: List[Dict[str, Any]] = []
+        touched_ids = set(delete_ids)
+        for index, item in enumerate(updates):
+            error = None
+            if item.id not in owned:
+                error = "Script not found"
+            elif item.id in touched_ids:
+                error = "Duplicate id in batch"
+            elif "title" in item.model_fields_set and item.title is None:
+                # title 列不允许 NULL，在执行 SQL 前拒绝，不影响同批次的其他项
+                error = "Title cannot be null"
+            else:
+                touched_ids.add(item.id)
+                update_rows.append((index, item.model_dump(exclude_unset=True, exclude={"id"})))
+            update_results.append({"op": "update", "index": index, "ok": error is None, "id": item.id, "error": error})
+
+        # 标题重复检查：一次查出所有候选标题的现有持有者，本批次删除的剧本不再占用标题
+        candidate_titles = {obj_in.title for obj_in in creates}
+        candidate_titles.update(
+            data["title"] for _, data in update_rows
+            if data.get("title") is not None
+        )
+        taken: Dict[str, int] = {}
+        if candidate_titles:
+            rows = await db.execute(
+                select(Script.title, Script.id)
+                .where(Script.user_id == user_id, Script.title.in_(candidate_titles))
+            )
+            taken = {title: script_id for title, script_id in rows.all() if script_id not in delete_ids}
+
+        valid_updates: List[Tuple[int, Dict[str, Any]]] = []
+        for index, data in update_rows:
+            script_id = updates[index].id
+            title = data.get("title")
+            if title is not None and taken.get(title, script_id) != script_id:
+                update_results[index].update(ok=False, error="Script with this title already exists")
+                continue
+            if title is not None and title != owned[script_id]:
+                # 改名后旧标题可以被本批次中的创建项使用
+                taken.pop(owned[script_id], None)
+                taken[title] = script_id
+            valid_updates.append((script_id, data))
+        results.extend(update_results)
+
+        create_values: List[Dict[str, Any]] = []
+        create_results: List[Dict[str, Any]] = []
+        for index, obj_in in enumerate(creates):
+            error = None
+            if obj_in.title in taken:
+                error = "Script with this title already exists"
+            else:
+                taken[obj_in.title] = -1
+                create_values.append({**obj_in.model_dump(), "user_id": user_id})
+            create_results.append({"op": "create", "index": index, "ok": error is None, "id": None, "error": error})
+        results.extend(create_results)
+
+        try:
+            if delete_ids:
+                await remove_from_index(db, delete_ids)
+                await remove_scenes(db, delete_ids)
+                await db.execute(
+                    delete(Script)
+                    .where(Script.user_id == user_id, Script.id.in_(delete_ids))
+                    .execution_options(synchronize_session=False)
+                )
+
+            # 修改字段相同的更新合并为一条 executemany
+            groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for script_id, data in valid_updates:
+                if not data:
+                    continue
+                keys = tuple(sorted(data))
+                groups.setdefault(keys, []).append(
+                    {"_id": script_id, **{f"_{key}": value for key, value in data.items()}}
+                )
+            table = Script.__table__
+            for keys, params in groups.items():
+                values: Dict[str, Any] = {
+                    key: bindparam(f"_{key}", type_=table.c[key].type) for key in keys
+                }
+                if "content" in keys:
+                    values["version"] = table.c.version + 1
+                await db.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("_id"), table.c.user_id == user_id)
+                    .values(values),
+                    params,
+                )
+
+            # 标题、简介或正文有变化的剧本一次查出后重建检索词
+            reindex_ids = [
+                script_id for script_id, data in valid_updates
+                if SEARCHABLE_FIELDS & data.keys()
+            ]
+            if reindex_ids:
+                rows = await db.execute(
+                    select(Script.id, Script.user_id, Script.title, Script.description, Script.content)
+                    .where(Script.id.in_(reindex_ids))
+                )
+                await reindex_scripts(db, rows.all())
+            for script_id, data in valid_updates:
+                if "content" in data:
+                    await sync_scenes(db, script_id, data["content"])
+
+            if create_values:
+                created_ids = (await db.execute(
+                    insert(Script).returning(Script.id, sort_by_parameter_order=True),
+                    create_values,
+                )).scalars().all()
+                ok_results = [item for item in create_results if item["ok"]]
+                for item, script_id in zip(ok_results, created_ids):
+                    item["id"] = script_id
+                await reindex_scripts(db, [
+                    (script_id, user_id, values["title"], values.get("description"), values.get("content"))
+                    for values, script_id in zip(create_values, created_ids)
+                ])
+                for values, script_id in zip(create_values, created_ids):
+                    if values.get("content"):
+                        await sync_scenes(db, script_id, values["content"])
+
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return results
+
 
-script = CRUDScript(Script)
+async_script = AsyncCRUDScript(Script)
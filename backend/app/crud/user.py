@@ -1,9 +1,12 @@
 from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.password_hasher import PasswordHasherOverloaded, password_hasher
+from app.core.security import get_password_hash, password_needs_rehash, verify_password
 from app.core.test_accounts import test_account_manager
 
 
@@ -54,3 +57,68 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
 
 
 user = CRUDUser(User)
+
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    """
+    CRUDUser 的异步版本
+    bcrypt 计算交给独立的进程池，队列已满时抛出 PasswordHasherOverloaded
+    """
+
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email).limit(1))
+        return result.scalars().first()
+
+    async def get_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.username == username).limit(1))
+        return result.scalars().first()
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        hashed_password = await password_hasher.hash(obj_in.password)
+        db_obj = User(
+            email=obj_in.email,
+            username=obj_in.username,
+            hashed_password=hashed_password,
+            full_name=obj_in.full_name,
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def authenticate(self, db: AsyncSession, *, email: str, password: str) -> Optional[User]:
+        user = await self.get_by_email(db, email=email)
+
+        # 检查是否为测试账号
+        if not user:
+            test_account = test_account_manager.verify_credentials(email, password)
+            if test_account:
+                # 自动创建测试用户
+                user_create = UserCreate(
+                    email=test_account.email,
+                    username=test_account.username,
+                    password=test_account.password,
+                    full_name=f"Test {test_account.role.value.title()}"
+                )
+                return await self.create(db, obj_in=user_create)
+            return None
+
+        if not await password_hasher.verify(password, user.hashed_password):
+            return None
+
+        # BCRYPT_ROUNDS 调整后，在登录成功时透明地用新 cost 重新哈希
+        if password_needs_rehash(user.hashed_password):
+            try:
+                user.hashed_password = await password_hasher.hash(password)
+            except PasswordHasherOverloaded:
+                # 密码已验证通过，重新哈希只是可选的升级，留到下次登录
+                return user
+            db.add(user)
+            await db.commit()
+        return user
+
+    def is_active(self, user: User) -> bool:
+        return user.is_active
+
+
+async_user = AsyncCRUDUser(User)
@@ -1,15 +1,61 @@
+from typing import AsyncGenerator
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import PoolMetrics, configure_engine, pool_options
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    将同步数据库 URL 转换为异步驱动 URL
+
+    postgresql:// -> postgresql+asyncpg://
+    sqlite://     -> sqlite+aiosqlite://
+    """
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        return url
+    dialect = scheme.split("+", 1)[0]
+    if dialect in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
 
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    pool_pre_ping=True,
+    **pool_options(
+        settings.DATABASE_URL,
+        pool_size=settings.DATABASE_SYNC_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    ),
 )
+sync_pool_metrics = PoolMetrics()
+configure_engine(engine, sync_pool_metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎：与同步引擎并行存在，请求处理路径使用异步会话
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **pool_options(
+        settings.DATABASE_URL,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    ),
+)
+async_pool_metrics = PoolMetrics()
+configure_engine(async_engine.sync_engine, async_pool_metrics)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
@@ -19,3 +65,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
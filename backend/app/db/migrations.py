@@ -0,0 +1,191 @@
+"""
+启动时的数据库迁移协调
+每个 API / worker 进程启动时都会调用，多数情况下数据库已是最新版本：
+
+1. 解析 alembic/versions 下的迁移文件得到 head（不导入 Alembic，也不执行迁移脚本）
+2. 一次查询 alembic_version 得到数据库当前版本，与 head 一致时直接返回
+3. 需要升级时先加锁（PostgreSQL advisory lock，SQLite 使用数据库文件旁的文件锁），
+   拿到锁后再查一次版本：其他进程已完成升级则跳过，否则由本进程执行 alembic upgrade head
+
+DB_MIGRATE_ON_STARTUP: auto（默认，按上述流程升级）、check（只检查，落后时打印警告）、off（不检查）
+"""
+
+import os
+import re
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.base import engine as default_engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+SCRIPT_LOCATION = os.path.join(BACKEND_DIR, "alembic")
+VERSIONS_DIR = os.path.join(SCRIPT_LOCATION, "versions")
+
+# 所有进程使用同一个 advisory lock key
+ADVISORY_LOCK_KEY = zlib.crc32(b"afm:alembic_upgrade")
+LOCK_POLL_SECONDS = 0.2
+
+REVISION_RE = re.compile(r"^revision\s*(?::[^=]+)?=\s*['\"](\w+)['\"]", re.MULTILINE)
+DOWN_REVISION_RE = re.compile(r"^down_revision\s*(?::[^=]+)?=\s*(.+)$", re.MULTILINE)
+REVISION_ID_RE = re.compile(r"['\"](\w+)['\"]")
+
+
+class MigrationLockTimeout(TimeoutError):
+    """等待其他进程完成迁移超时"""
+
+
+@dataclass
+class MigrationResult:
+    action: str  # up_to_date, upgraded, upgraded_by_peer, behind, disabled
+    current: Set[str]
+    head: Set[str]
+    seconds: float
+    lock_wait_seconds: float = 0.0
+
+    def describe(self) -> str:
+        if self.action == "disabled":
+            return "已关闭启动时迁移"
+        head = ",".join(sorted(self.head))
+        if self.action == "up_to_date":
+            return f"已是最新版本 {head}（{self.seconds * 1000:.0f}ms）"
+        current = ",".join(sorted(self.current)) or "空数据库"
+        if self.action == "behind":
+            return f"数据库版本 {current} 落后于 {head}，未自动升级"
+        if self.action == "upgraded_by_peer":
+            return f"其他进程已升级到 {head}（等待 {self.lock_wait_seconds:.1f}s）"
+        return f"{current} -> {head}（{self.seconds:.1f}s，等待锁 {self.lock_wait_seconds:.1f}s）"
+
+
+def script_heads(versions_dir: str = VERSIONS_DIR) -> Set[str]:
+    """从迁移文件中解析 revision / down_revision，返回未被任何迁移依赖的版本"""
+    revisions: Set[str] = set()
+    parents: Set[str] = set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py") or name.startswith("__"):
+            continue
+        with open(os.path.join(versions_dir, name), encoding="utf-8") as f:
+            source = f.read()
+        revision = REVISION_RE.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = DOWN_REVISION_RE.search(source)
+        if down_revision is not None:
+            parents.update(REVISION_ID_RE.findall(down_revision.group(1)))
+    return revisions - parents
+
+
+def current_revisions(connection: Connection) -> Set[str]:
+    """数据库当前版本，尚未建立 alembic_version 表时返回空集合"""
+    try:
+        return {row[0] for row in connection.execute(text("SELECT version_num FROM alembic_version"))}
+    except SQLAlchemyError:
+        connection.rollback()
+        return set()
+
+
+@contextmanager
+def _postgres_lock(engine: Engine, timeout: float) -> Iterator[None]:
+    with engine.connect() as connection:
+        deadline = time.monotonic() + timeout
+        while not connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY}).scalar():
+            connection.rollback()
+            if time.monotonic() >= deadline:
+                raise MigrationLockTimeout(f"Timed out after {timeout}s waiting for migration lock")
+            time.sleep(LOCK_POLL_SECONDS)
+        connection.commit()
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            connection.commit()
+
+
+@contextmanager
+def _file_lock(path: str, timeout: float) -> Iterator[None]:
+    try:
+        import fcntl
+    except ImportError:  # Windows 本地开发：单进程运行，不加锁
+        yield
+        return
+    with open(path, "a") as f:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise MigrationLockTimeout(f"Timed out after {timeout}s waiting for {path}")
+                time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def migration_lock(engine: Engine, timeout: float) -> Iterator[None]:
+    """跨进程的迁移锁"""
+    if engine.dialect.name == "postgresql":
+        with _postgres_lock(engine, timeout):
+            yield
+    elif engine.dialect.name == "sqlite" and engine.url.database and engine.url.database != ":memory:":
+        with _file_lock(f"{engine.url.database}.migrate.lock", timeout):
+            yield
+    else:
+        yield
+
+
+def upgrade(engine: Engine) -> None:
+    """执行 alembic upgrade head（只在需要升级时才导入 Alembic）"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", SCRIPT_LOCATION)
+    with engine.begin() as connection:
+        # env.py 优先使用传入的连接
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+
+def run_startup_migrations(
+    engine: Optional[Engine] = None,
+    *,
+    mode: Optional[str] = None,
+    lock_timeout: Optional[float] = None,
+    versions_dir: str = VERSIONS_DIR,
+) -> MigrationResult:
+    started = time.perf_counter()
+    mode = mode or settings.DB_MIGRATE_ON_STARTUP
+    if mode == "off":
+        return MigrationResult("disabled", set(), set(), 0.0)
+    engine = engine or default_engine
+
+    head = script_heads(versions_dir)
+    with engine.connect() as connection:
+        current = current_revisions(connection)
+    if current == head:
+        return MigrationResult("up_to_date", current, head, time.perf_counter() - started)
+    if mode == "check":
+        return MigrationResult("behind", current, head, time.perf_counter() - started)
+
+    lock_started = time.perf_counter()
+    with migration_lock(engine, settings.DB_MIGRATION_LOCK_TIMEOUT_SECONDS if lock_timeout is None else lock_timeout):
+        lock_wait = time.perf_counter() - lock_started
+        with engine.connect() as connection:
+            locked_current = current_revisions(connection)
+        if locked_current == head:
+            return MigrationResult("upgraded_by_peer", current, head, time.perf_counter() - started, lock_wait)
+        upgrade(engine)
+    return MigrationResult("upgraded", current, head, time.perf_counter() - started, lock_wait)
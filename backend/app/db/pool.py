@@ -0,0 +1,244 @@
+"""
+数据库连接池的配置与监控
+
+- pool_options: 按配置生成 create_engine 的连接池参数（大小、溢出、超时、回收、探活）
+- install_idle_ping: "idle" 探活策略，只对空闲超过阈值的连接在取出时 ping 一次，
+  刚归还的连接直接复用，省去 pool_pre_ping 每次取出时的一次往返
+- PoolMetrics: 通过连接池事件统计取连接的等待时间、使用中的连接数、溢出连接的使用和连接寿命
+
+SQLite 是本地文件，连接池由 SQLAlchemy 按驱动选择（QueuePool / NullPool / SingletonThreadPool），
+不应用大小、超时、回收与探活配置，但仍然统计指标
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+from app.core.config import settings
+
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+# 写入 connection_record.info 的键（随底层连接的关闭或失效一起清除）
+CREATED_AT = "afm_created_at"
+CHECKED_OUT_AT = "afm_checked_out_at"
+IDLE_SINCE = "afm_idle_since"
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def pool_options(url: str, *, pool_size: int, max_overflow: int) -> Dict[str, Any]:
+    """create_engine 的连接池参数"""
+    strategy = settings.DATABASE_POOL_PRE_PING
+    if strategy not in PRE_PING_STRATEGIES:
+        raise ValueError(f"Invalid DATABASE_POOL_PRE_PING {strategy!r}, expected one of {PRE_PING_STRATEGIES}")
+    if is_sqlite(url):
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": strategy == "always",
+    }
+
+
+class _Samples:
+    """最近 size 个样本的分位数，以及全部样本的次数、均值与最大值"""
+
+    def __init__(self, size: int = 1024):
+        self._recent: Deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self._recent.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def stats(self, scale: float = 1.0) -> Dict[str, Any]:
+        recent = sorted(self._recent)
+
+        def percentile(q: float) -> float:
+            return round(recent[min(len(recent) - 1, int(len(recent) * q))] * scale, 3) if recent else 0.0
+
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count * scale, 3) if self.count else 0.0,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": round(self.max * scale, 3),
+        }
+
+
+class PoolMetrics:
+    """
+    连接池指标
+
+    取连接的等待时间包含排队等待空闲连接、新建连接以及取出时的探活，
+    超过 pool_timeout 仍未取到连接的次数单独计为 checkout_timeouts
+    """
+
+    def __init__(self) -> None:
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self._waits = _Samples()
+        self._held = _Samples()
+        self._lifetimes = _Samples()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.overflow_checkouts = 0
+        self.peak_overflow = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.invalidations = 0
+        self.pings = 0
+        self.ping_failures = 0
+
+    def install(self, engine: Engine) -> None:
+        """注册连接池事件（异步引擎传入 async_engine.sync_engine）"""
+        self._engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        # engine.dispose() 会换上新的连接池，事件监听随之保留，计时需要重新包装
+        event.listen(engine, "engine_disposed", lambda disposed: self._time_checkouts(disposed.pool))
+        self._time_checkouts(engine.pool)
+
+    def _time_checkouts(self, pool: Pool) -> None:
+        # 连接池没有“开始取连接”的事件，包装 Pool.connect 计时
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            except PoolTimeoutError:
+                with self._lock:
+                    self.checkout_timeouts += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._waits.add(elapsed)
+
+        pool.connect = timed_connect
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        connection_record.info[CREATED_AT] = time.monotonic()
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info[CHECKED_OUT_AT] = time.monotonic()
+        pool = self._engine.pool if self._engine is not None else None
+        pool_size = pool.size() if isinstance(pool, QueuePool) else None
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if pool_size is not None and self.in_use > pool_size:
+                self.overflow_checkouts += 1
+                self.peak_overflow = max(self.peak_overflow, self.in_use - pool_size)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop(CHECKED_OUT_AT, None)
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+            if checked_out_at is not None:
+                self._held.add(time.monotonic() - checked_out_at)
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        created_at = connection_record.info.get(CREATED_AT)
+        with self._lock:
+            self.connections_closed += 1
+            if created_at is not None:
+                self._lifetimes.add(time.monotonic() - created_at)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_ping(self, ok: bool) -> None:
+        with self._lock:
+            self.pings += 1
+            if not ok:
+                self.ping_failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self._engine.pool if self._engine is not None else None
+        status: Dict[str, Any] = {"pool": type(pool).__name__ if pool is not None else None}
+        if isinstance(pool, QueuePool):
+            status.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.checkedout() - pool.size()),
+            })
+        with self._lock:
+            return {
+                **status,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_ms": self._waits.stats(1000),
+                "held_ms": self._held.stats(1000),
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_overflow": self.peak_overflow,
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "connection_lifetime_seconds": self._lifetimes.stats(),
+                "invalidations": self.invalidations,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+            }
+
+
+def install_idle_ping(engine: Engine, idle_seconds: float, metrics: Optional[PoolMetrics] = None) -> None:
+    """
+    取出连接时只 ping 空闲超过 idle_seconds 的连接；ping 失败时抛出 DisconnectionError，
+    连接池会丢弃该连接并换一个新连接重试
+
+    须在 PoolMetrics.install 之前注册，被丢弃的连接不计入取出次数
+    """
+    @event.listens_for(engine, "checkin")
+    def _mark_idle(dbapi_connection, connection_record) -> None:
+        if dbapi_connection is not None:
+            connection_record.info[IDLE_SINCE] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy) -> None:
+        idle_since = connection_record.info.get(IDLE_SINCE)
+        # 新建的连接没有 IDLE_SINCE，无需 ping
+        if idle_since is None or time.monotonic() - idle_since < idle_seconds:
+            return
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            if metrics is not None:
+                metrics.record_ping(False)
+            raise DisconnectionError(f"Connection idle for {time.monotonic() - idle_since:.0f}s failed ping") from e
+        if metrics is not None:
+            metrics.record_ping(True)
+
+
+def configure_engine(engine: Engine, metrics: PoolMetrics) -> None:
+    """按配置注册探活与指标事件"""
+    if settings.DATABASE_POOL_PRE_PING == "idle" and engine.dialect.name != "sqlite":
+        install_idle_ping(engine, settings.DATABASE_POOL_PING_IDLE_SECONDS, metrics)
+    metrics.install(engine)
@@ -0,0 +1,115 @@
+"""
+自定义列类型
+"""
+
+import zlib
+from typing import Any, Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+# 首字节标记存储格式
+MARKER_RAW = b"\x00"
+MARKER_ZLIB = b"\x01"
+
+
+def encode_text(value: str, threshold: int, level: int = 6) -> bytes:
+    """
+    编码文本：超过阈值且压缩后更小时使用 zlib，否则原样存 UTF-8
+
+    Args:
+        value: 原文
+        threshold: 启用压缩的最小字节数
+        level: zlib 压缩级别
+    """
+    raw = value.encode("utf-8")
+    if len(raw) >= threshold:
+        compressed = zlib.compress(raw, level)
+        if len(compressed) < len(raw):
+            return MARKER_ZLIB + compressed
+    return MARKER_RAW + raw
+
+
+def decode_text(data: bytes) -> str:
+    """解码 encode_text 的结果"""
+    marker, payload = data[:1], data[1:]
+    if marker == MARKER_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == MARKER_RAW:
+        return payload.decode("utf-8")
+    # 没有标记的历史数据按原文处理
+    return data.decode("utf-8")
+
+
+def decode_text_prefix(data: bytes, max_chars: int) -> str:
+    """
+    从编码结果的前若干字节中解出前 max_chars 个字符
+
+    zlib 是流式格式，只需要压缩数据的开头就能还原正文开头，
+    因此列表摘要只需从数据库取出很小的一段字节
+    """
+    marker, payload = data[:1], data[1:]
+    if marker == MARKER_ZLIB:
+        payload = zlib.decompressobj().decompress(payload, max_chars * 4)
+    elif marker != MARKER_RAW:
+        payload = data
+    return payload.decode("utf-8", errors="ignore")[:max_chars]
+
+
+# zlib 头 2 字节 + 动态哈夫曼块头（码表最坏约 290 字节）
+ZLIB_HEADER_SLACK = 512
+
+
+def prefix_bytes_for(max_chars: int) -> int:
+    """
+    取出 max_chars 个字符所需读取的编码字节数上限
+
+    每个字符最多 4 个 UTF-8 字节，每个字节的哈夫曼编码最长 15 bit（不足 2 字节）
+    """
+    return 1 + max_chars * 4 * 2 + ZLIB_HEADER_SLACK
+
+
+class CompressedText(TypeDecorator):
+    """
+    透明压缩的文本列
+
+    以 LargeBinary 存储，首字节为格式标记（0x00 原文 / 0x01 zlib），
+    读写时自动编解码，对 ORM 使用方仍表现为 str
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, threshold: int = 1024, level: int = 6, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+        self.level = level
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return encode_text(value, self.threshold, self.level)
+
+    def process_result_value(self, value: Optional[Any], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return value
+        return decode_text(bytes(value))
+
+
+class CompressedTextPrefix(TypeDecorator):
+    """CompressedText 列前缀字节（substr 结果）的解码类型，用于正文摘要"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, max_chars: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_chars = max_chars
+
+    def process_result_value(self, value: Optional[Any], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return value[:self.max_chars]
+        return decode_text_prefix(bytes(value), self.max_chars)
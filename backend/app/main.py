@@ -2,13 +2,22 @@
 FastAPI 应用主入口
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.password_hasher import password_hasher
+from app.core.redis_service import async_redis_service, redis_service
+from app.core.user_cache import user_cache
+from app.db.migrations import run_startup_migrations
+from app.services.ai_gateway import ai_gateway
+from app.services.job_queue import job_queue
+from app.worker import Worker
 from app.api.v1.api import api_router
 
 
@@ -21,22 +30,44 @@ async def lifespan(app: FastAPI):
     # 启动时执行
     print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} 启动中...")
     
-    # 自动运行数据库迁移
+    # 数据库迁移：已是最新版本时只需一次查询；需要升级时由一个进程持锁执行，其余进程等待后跳过
     try:
-        from alembic.config import Config
-        from alembic import command
-        print("📦 正在运行数据库迁移...")
-        alembic_cfg = Config("alembic.ini")
-        command.upgrade(alembic_cfg, "head")
-        print("✅ 数据库迁移完成")
+        result = run_startup_migrations()
+        if result.action == "behind":
+            print(f"⚠️ 数据库迁移: {result.describe()}")
+        else:
+            print(f"📦 数据库迁移: {result.describe()}")
     except Exception as e:
         print(f"⚠️ 数据库迁移失败: {e}")
-        print("   如果数据库已是最新版本，可以忽略此警告")
+    
+    # 连接 Redis（不可用时不阻塞启动，后台按退避间隔重连）
+    if redis_service.is_configured:
+        if await asyncio.to_thread(redis_service.connect):
+            print("✅ Redis 已连接")
+        else:
+            print("⚠️ Redis 不可用，将在后台重连")
+    
+    # 订阅用户缓存失效广播
+    user_cache.start_listener()
+    
+    # 未单独部署 worker (python -m app.worker) 时，在 API 进程内执行后台任务
+    stop_jobs = asyncio.Event()
+    job_worker = None
+    if settings.JOB_WORKER_IN_PROCESS:
+        worker = Worker(job_queue, concurrency=settings.JOB_WORKER_CONCURRENCY)
+        job_worker = asyncio.create_task(worker.run(stop_jobs))
     
     yield
     
     # 关闭时执行
     print(f"👋 {settings.APP_NAME} 正在关闭...")
+    if job_worker is not None:
+        stop_jobs.set()
+        await job_worker
+    user_cache.stop_listener()
+    password_hasher.shutdown()
+    await async_redis_service.close()
+    await ai_gateway.aclose()
     
     # 这里可以添加资源清理
 
@@ -47,6 +78,7 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="AI驱动的视频制作平台后端API",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson 序列化比标准库 json 快数倍
     docs_url="/docs",  # API文档地址
     redoc_url="/redoc",  # 替代API文档
 )
@@ -63,6 +95,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 配置响应压缩中间件（brotli / gzip）
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_COMPRESSION_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
 # 注册API路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -80,10 +120,12 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """健康检查接口"""
+    """健康检查接口（Redis 为可选依赖，不可用时为 degraded）"""
+    redis = redis_service.health()
     return {
-        "status": "healthy",
-        "version": settings.APP_VERSION
+        "status": "degraded" if redis["status"] == "down" else "healthy",
+        "version": settings.APP_VERSION,
+        "redis": redis,
     }
 
 
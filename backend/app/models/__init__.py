@@ -1,4 +1,7 @@
 from app.models.user import User
 from app.models.script import Script
+from app.models.scene import ScriptScene
+from app.models.script_search import ScriptSearchIndex
+from app.models.job import Job
 
-__all__ = ["User", "Script"]
+__all__ = ["User", "Script", "ScriptScene", "ScriptSearchIndex", "Job"]
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text
+from app.db.base import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Job(Base):
+    """
+    后台任务
+
+    表本身就是持久化的任务队列：worker 按 (priority DESC, id) 认领 queued 且到期的任务，
+    Redis / 进程内 broker 只负责唤醒空闲的 worker
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # 认领：WHERE status = 'queued' AND run_after <= now ORDER BY priority DESC, id
+        Index("ix_jobs_status_priority_run_after", "status", "priority", "run_after"),
+        Index("ix_jobs_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    type = Column(String(50), nullable=False)  # 任务类型，对应 job_queue 中注册的处理函数
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    priority = Column(Integer, nullable=False, default=0)  # 越大越先执行
+    payload = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    run_after = Column(DateTime(timezone=True), nullable=False, default=_utcnow)  # 重试退避：到期后才能被认领
+    locked_by = Column(String(100), nullable=True)  # 执行中的 worker 标识
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # 执行中的心跳，超时视为 worker 已退出
+
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.type} {self.status}>"
@@ -0,0 +1,37 @@
+from sqlalchemy import JSON, Column, ForeignKey, Index, Integer, String
+from app.core.config import settings
+from app.db.base import Base
+from app.db.types import CompressedText
+
+
+class ScriptScene(Base):
+    """
+    剧本场景索引
+
+    由 app.services.screenplay 从 Script.content 解析生成，正文修改时按场景增量更新；
+    单个场景可以直接从本表读取，无需加载和解析整篇正文
+    """
+    __tablename__ = "script_scenes"
+    __table_args__ = (
+        Index("ix_script_scenes_script_id_position", "script_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    script_id = Column(Integer, ForeignKey("scripts.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)  # 场景序号，从 1 开始
+    heading = Column(String(255), nullable=True)  # 场景标题，如 "场景1：开头"
+    start_offset = Column(Integer, nullable=False)  # 在正文中的起止位置（字符）
+    end_offset = Column(Integer, nullable=False)
+    content_hash = Column(String(40), nullable=False)  # 场景原文的 SHA-1，用于增量解析
+    text = Column(
+        CompressedText(settings.SCRIPT_COMPRESSION_THRESHOLD, settings.SCRIPT_COMPRESSION_LEVEL),
+        nullable=False,
+    )
+    shot_count = Column(Integer, nullable=False, default=0)
+    dialogue_count = Column(Integer, nullable=False, default=0)
+    characters = Column(JSON, nullable=False, default=list)  # 出场角色（按出场顺序）
+    shots = Column(JSON, nullable=False, default=list)  # [{"description": ...}]
+    dialogues = Column(JSON, nullable=False, default=list)  # [{"character", "direction", "line"}]
+
+    def __repr__(self):
+        return f"<ScriptScene {self.script_id}#{self.position}>"
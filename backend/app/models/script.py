@@ -1,21 +1,41 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import query_expression, relationship
+from app.core.config import settings
 from app.db.base import Base
+from app.db.types import CompressedText
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 class Script(Base):
     """剧本模型"""
     __tablename__ = "scripts"
+    __table_args__ = (
+        # 游标分页：WHERE user_id = ? ORDER BY updated_at DESC, id DESC
+        Index("ix_scripts_user_id_updated_at_id", "user_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
-    description = Column(Text, nullable=True)
-    content = Column(Text, nullable=True)  # 剧本内容
+    description = Column(
+        CompressedText(settings.SCRIPT_COMPRESSION_THRESHOLD, settings.SCRIPT_COMPRESSION_LEVEL),
+        nullable=True,
+    )
+    content = Column(
+        CompressedText(settings.SCRIPT_COMPRESSION_THRESHOLD, settings.SCRIPT_COMPRESSION_LEVEL),
+        nullable=True,
+    )  # 剧本内容（超过阈值时 zlib 压缩存储）
+    # 列表查询时由 SQL 计算的正文摘要，见 AsyncCRUDScript 的 summary 查询
+    content_preview = query_expression()
     genre = Column(String(50), nullable=True)  # 类型
     target_audience = Column(String(100), nullable=True)  # 目标受众
     duration = Column(Integer, default=5)  # 目标时长（分钟）
     status = Column(String(20), default="draft")  # draft, generating, completed
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # 正文版本号，每次修改正文 +1
     
     # 外键关联到用户
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -23,7 +43,8 @@ class Script(Base):
     
     # 时间戳
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # 由应用侧生成时间戳，保证新建即有值且各数据库下精度一致（游标分页依赖）
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
 
     def __repr__(self):
         return f"<Script {self.title}>"
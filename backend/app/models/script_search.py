@@ -0,0 +1,66 @@
+from sqlalchemy import DDL, Column, ForeignKey, Index, Integer, Text, event, func, text
+from app.db.base import Base
+
+# 使用字面量而不是绑定参数，保证查询中的表达式与 GIN 表达式索引完全一致
+SEARCH_CONFIG = text("'simple'::regconfig")
+
+
+class ScriptSearchIndex(Base):
+    """
+    剧本全文检索词表
+
+    正文压缩存储，数据库无法直接对其分词，因此由应用侧切分出检索词（见 app.services.script_search）
+    写入本表：PostgreSQL 上通过 tsvector 表达式 GIN 索引检索，SQLite 上同步到 FTS5 虚拟表
+    """
+    __tablename__ = "script_search_index"
+
+    script_id = Column(
+        Integer, ForeignKey("scripts.id", ondelete="CASCADE"), primary_key=True, autoincrement=False
+    )
+    user_id = Column(Integer, nullable=False, index=True)
+    title_tokens = Column(Text, nullable=False, default="")
+    body_tokens = Column(Text, nullable=False, default="")
+
+
+def search_document():
+    """检索文档表达式：标题权重 A，简介与正文权重 B"""
+    columns = ScriptSearchIndex.__table__.c
+    return func.setweight(
+        func.to_tsvector(SEARCH_CONFIG, columns.title_tokens), text("'A'")
+    ).op("||")(
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, columns.body_tokens), text("'B'"))
+    )
+
+
+Index(
+    "ix_script_search_index_document",
+    search_document(),
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+
+# SQLite：外部内容 FTS5 表，由触发器与检索词表保持同步
+SQLITE_FTS_TABLE = "script_search_fts"
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE script_search_fts USING fts5("
+    "title_tokens, body_tokens, content='script_search_index', content_rowid='script_id')",
+    "CREATE TRIGGER script_search_index_ai AFTER INSERT ON script_search_index BEGIN "
+    "INSERT INTO script_search_fts(rowid, title_tokens, body_tokens) "
+    "VALUES (new.script_id, new.title_tokens, new.body_tokens); END",
+    "CREATE TRIGGER script_search_index_ad AFTER DELETE ON script_search_index BEGIN "
+    "INSERT INTO script_search_fts(script_search_fts, rowid, title_tokens, body_tokens) "
+    "VALUES ('delete', old.script_id, old.title_tokens, old.body_tokens); END",
+    "CREATE TRIGGER script_search_index_au AFTER UPDATE ON script_search_index BEGIN "
+    "INSERT INTO script_search_fts(script_search_fts, rowid, title_tokens, body_tokens) "
+    "VALUES ('delete', old.script_id, old.title_tokens, old.body_tokens); "
+    "INSERT INTO script_search_fts(rowid, title_tokens, body_tokens) "
+    "VALUES (new.script_id, new.title_tokens, new.body_tokens); END",
+)
+
+for _ddl in SQLITE_FTS_DDL:
+    event.listen(ScriptSearchIndex.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+event.listen(
+    ScriptSearchIndex.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
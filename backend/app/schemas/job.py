@@ -0,0 +1,23 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class JobResponse(BaseModel):
+    """后台任务状态"""
+    id: int
+    type: str
+    status: str
+    priority: int = 0
+    attempts: int = 0
+    max_attempts: int = 1
+    cancel_requested: bool = False
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    run_after: Optional[datetime] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ScriptBase(BaseModel):
@@ -34,6 +34,7 @@ class ScriptInDB(ScriptBase):
     """数据库中的剧本模型"""
     id: int
     user_id: int
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -44,3 +45,144 @@ class ScriptInDB(ScriptBase):
 class ScriptResponse(ScriptInDB):
     """剧本响应模型"""
     pass
+
+
+class ScriptSummary(BaseModel):
+    """剧本列表摘要模型（不含正文）"""
+    id: int
+    user_id: int
+    title: str
+    description: Optional[str] = None
+    genre: Optional[str] = None
+    target_audience: Optional[str] = None
+    duration: Optional[int] = None
+    status: Optional[str] = None
+    version: int = 1
+    content_preview: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ScriptPage(BaseModel):
+    """剧本游标分页响应模型"""
+    items: List[ScriptSummary]
+    next_cursor: Optional[str] = None
+
+
+class ScriptTextEdit(BaseModel):
+    """
+    正文区间编辑：用 text 替换基准版本中 [start, end) 的内容
+    偏移量以 Unicode 码点计（不是 UTF-16 code unit）
+    """
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""
+
+
+class ScriptContentPatch(BaseModel):
+    """剧本正文增量更新请求"""
+    base_version: int
+    edits: List[ScriptTextEdit] = Field(..., max_length=1000)
+
+
+class ScriptContentPatchResult(BaseModel):
+    """剧本正文增量更新结果（不回传正文）"""
+    id: int
+    version: int
+    content_length: int
+    updated_at: Optional[datetime] = None
+
+
+class ScriptBatchUpdateItem(ScriptUpdate):
+    """批量更新中的单项（部分更新）"""
+    id: int
+
+
+class ScriptBatchRequest(BaseModel):
+    """
+    剧本批量操作请求
+    同一批次按 删除 -> 更新 -> 创建 的顺序在一个事务中执行
+    """
+    create: List[ScriptCreate] = Field(default_factory=list, max_length=500)
+    update: List[ScriptBatchUpdateItem] = Field(default_factory=list, max_length=500)
+    delete: List[int] = Field(default_factory=list, max_length=500)
+
+
+class ScriptBatchItemResult(BaseModel):
+    """批量操作中单项的结果"""
+    op: str
+    index: int
+    ok: bool
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ScriptBatchResult(BaseModel):
+    """剧本批量操作结果"""
+    results: List[ScriptBatchItemResult]
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+
+class ScriptImportError(BaseModel):
+    """导入失败的行"""
+    line: int
+    error: str
+
+
+class ScriptImportResult(BaseModel):
+    """剧本导入结果"""
+    imported: int = 0
+    errors: List[ScriptImportError] = []
+
+
+class ScriptGenerateRequest(BaseModel):
+    """AI 生成剧本正文"""
+    prompt: Optional[str] = Field(None, max_length=2000)  # 额外的创作要求
+    priority: int = Field(0, ge=0, le=9)  # 越大越先执行
+
+
+class ScriptSearchHit(BaseModel):
+    """全文检索结果（snippet 已做 HTML 转义，命中词以 <mark> 标出）"""
+    id: int
+    title: str
+    snippet: str = ""
+    score: float = 0.0
+    updated_at: Optional[datetime] = None
+
+
+class SceneShot(BaseModel):
+    """镜头（[画面描述]）"""
+    description: str = ""
+
+
+class SceneDialogue(BaseModel):
+    """对白"""
+    character: str
+    direction: Optional[str] = None
+    line: str = ""
+
+
+class SceneOutline(BaseModel):
+    """场景大纲条目"""
+    position: int
+    heading: Optional[str] = None
+    start_offset: int
+    end_offset: int
+    shot_count: int = 0
+    dialogue_count: int = 0
+    characters: List[str] = []
+
+    class Config:
+        from_attributes = True
+
+
+class SceneDetail(SceneOutline):
+    """单个场景详情"""
+    text: str
+    shots: List[SceneShot] = []
+    dialogues: List[SceneDialogue] = []
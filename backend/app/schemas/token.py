@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import Optional
 
 
@@ -21,3 +22,13 @@ class RefreshTokenRequest(BaseModel):
 
 class TokenRefresh(BaseModel):
     refresh_token: str
+
+
+class SessionInfo(BaseModel):
+    """在线会话（设备）信息"""
+    session_id: str
+    created_at: Optional[datetime] = None
+    last_used_at: Optional[datetime] = None
+    expires_at: datetime
+    user_agent: Optional[str] = None
+    ip: Optional[str] = None
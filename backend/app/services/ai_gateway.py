@@ -0,0 +1,591 @@
+"""
+AI 服务网关
+为文心一言、通义千问、OpenAI 各维护一个长期复用的 httpx 连接池并限制并发，
+按模型能力与成本选择模型，相同的在途请求只向上游发送一次；
+上游失败（超时、限流、5xx）时依次尝试下一个候选模型
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+CHAT = "chat"
+LONG_CONTEXT = "long_context"
+CREATIVE = "creative"
+
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class AIGatewayError(Exception):
+    """AI 网关错误基类"""
+
+
+class NoModelAvailable(AIGatewayError):
+    """没有满足能力与成本要求的已配置模型"""
+
+
+class AIProviderError(AIGatewayError):
+    """上游供应商调用失败"""
+
+    def __init__(self, provider: str, message: str, *, status_code: Optional[int] = None, retryable: bool = True):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+# 200 响应体不是预期的 JSON 结构时解析抛出的异常，按可重试的上游错误处理
+MALFORMED_RESPONSE_ERRORS = (ValueError, KeyError, IndexError, TypeError, AttributeError)
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """模型能力与价格（元 / 千 tokens，按输入输出混合估算，仅用于排序）"""
+    name: str
+    capabilities: FrozenSet[str]
+    cost_per_1k_tokens: float
+    context_tokens: int
+    endpoint: str = ""
+
+
+@dataclass
+class Completion:
+    text: str
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def estimate_tokens(messages: Sequence[Dict[str, str]]) -> int:
+    """粗略估算提示词 token 数（中文约一字一 token，按字符数计偏保守）"""
+    return sum(len(message.get("content") or "") for message in messages)
+
+
+class Provider(ABC):
+    """
+    单个供应商
+
+    httpx.AsyncClient 与并发信号量都绑定在事件循环上，首次在某个事件循环中使用时创建，
+    之后所有请求复用同一个连接池
+    """
+    name = ""
+
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        models: Sequence[ModelSpec],
+        max_concurrency: int,
+        max_connections: int,
+        timeout: float,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url
+        self.models = tuple(models)
+        self.max_concurrency = max_concurrency
+        self.max_connections = max(max_connections, max_concurrency)
+        self.timeout = httpx.Timeout(timeout, connect=5.0)
+        self.transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._latency_total = 0.0
+
+    @property
+    def saturated(self) -> bool:
+        return self.active + self.waiting >= self.max_concurrency
+
+    def _headers(self) -> Dict[str, str]:
+        return {}
+
+    def _bind(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers(),
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self.transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._on_bind()
+        return self._client
+
+    def _on_bind(self) -> None:
+        pass
+
+    async def _acquire(self) -> httpx.AsyncClient:
+        client = self._bind()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return client
+
+    def _release(self, started: float, failed: bool) -> None:
+        self.active -= 1
+        self._semaphore.release()
+        self.requests += 1
+        self.errors += failed
+        self._latency_total += time.perf_counter() - started
+
+    async def complete(
+        self, model: ModelSpec, messages: List[Dict[str, str]], *, max_tokens: int, temperature: float
+    ) -> Completion:
+        client = await self._acquire()
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await self._complete(client, model, messages, max_tokens, temperature)
+            failed = False
+        except httpx.HTTPError as e:
+            raise AIProviderError(self.name, f"{type(e).__name__}: {e}") from e
+        except MALFORMED_RESPONSE_ERRORS as e:
+            raise AIProviderError(self.name, f"Malformed response: {type(e).__name__}: {e}") from e
+        finally:
+            self._release(started, failed)
+        self.prompt_tokens += result.prompt_tokens
+        self.completion_tokens += result.completion_tokens
+        return result
+
+    async def stream(
+        self, model: ModelSpec, messages: List[Dict[str, str]], *, max_tokens: int, temperature: float
+    ) -> AsyncIterator[str]:
+        """逐段产出模型输出；调用方停止迭代（或被取消）时关闭上游连接"""
+        client = await self._acquire()
+        started = time.perf_counter()
+        failed = True
+        try:
+            async with aclosing(self._stream(client, model, messages, max_tokens, temperature)) as pieces:
+                async for piece in pieces:
+                    yield piece
+            failed = False
+        except (GeneratorExit, asyncio.CancelledError):
+            failed = False  # 调用方主动停止（例如客户端断开），不计为上游错误
+            raise
+        except httpx.HTTPError as e:
+            raise AIProviderError(self.name, f"{type(e).__name__}: {e}") from e
+        except MALFORMED_RESPONSE_ERRORS as e:
+            raise AIProviderError(self.name, f"Malformed response: {type(e).__name__}: {e}") from e
+        finally:
+            self._release(started, failed)
+
+    @abstractmethod
+    async def _complete(self, client, model, messages, max_tokens, temperature) -> Completion:
+        ...
+
+    @abstractmethod
+    def _stream(self, client, model, messages, max_tokens, temperature) -> AsyncIterator[str]:
+        ...
+
+    async def _check(self, response: httpx.Response) -> None:
+        if response.status_code < 400:
+            return
+        await response.aread()
+        raise AIProviderError(
+            self.name,
+            f"HTTP {response.status_code}: {response.text[:200]}",
+            status_code=response.status_code,
+            retryable=response.status_code in RETRYABLE_STATUS,
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._loop = self._client = self._semaphore = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": [model.name for model in self.models],
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_latency_ms": round(self._latency_total / self.requests * 1000, 2) if self.requests else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+async def _sse_data(response: httpx.Response) -> AsyncIterator[str]:
+    """读取 SSE 响应中的 data 字段"""
+    async for line in response.aiter_lines():
+        if line.startswith("data:"):
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            if data:
+                yield data
+
+
+class OpenAICompatibleProvider(Provider):
+    """OpenAI Chat Completions 协议（OpenAI、通义千问兼容模式、本地模拟服务）"""
+
+    def __init__(self, *, api_key: str, **kwargs):
+        self.api_key = api_key
+        super().__init__(**kwargs)
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def _body(self, model, messages, max_tokens, temperature, stream: bool) -> Dict[str, Any]:
+        return {
+            "model": model.endpoint or model.name,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": stream,
+        }
+
+    async def _complete(self, client, model, messages, max_tokens, temperature) -> Completion:
+        response = await client.post("/chat/completions", json=self._body(model, messages, max_tokens, temperature, False))
+        await self._check(response)
+        data = response.json()
+        usage = data.get("usage") or {}
+        return Completion(
+            text=data["choices"][0]["message"]["content"] or "",
+            provider=self.name,
+            model=model.name,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+    async def _stream(self, client, model, messages, max_tokens, temperature) -> AsyncIterator[str]:
+        body = self._body(model, messages, max_tokens, temperature, True)
+        async with client.stream("POST", "/chat/completions", json=body) as response:
+            await self._check(response)
+            async for data in _sse_data(response):
+                choices = json.loads(data).get("choices") or []
+                piece = choices[0].get("delta", {}).get("content") if choices else None
+                if piece:
+                    yield piece
+
+
+class OpenAIProvider(OpenAICompatibleProvider):
+    name = "openai"
+
+
+class QwenProvider(OpenAICompatibleProvider):
+    """通义千问（DashScope OpenAI 兼容模式）"""
+    name = "qwen"
+
+
+class MockProvider(OpenAICompatibleProvider):
+    """本地模拟服务（app/services/ai_mock.py），用于测试与离线压测"""
+    name = "mock"
+
+
+# 文心一言：限流、服务繁忙、access_token 失效等可以重试的错误码
+WENXIN_RETRYABLE_CODES = frozenset({2, 4, 18, 110, 111, 336100, 336501, 336502})
+WENXIN_TOKEN_ERRORS = frozenset({110, 111})
+
+
+class WenxinProvider(Provider):
+    """
+    文心一言（千帆）
+
+    使用 API Key / Secret Key 换取 access_token（有效期 30 天），提前一天刷新；
+    system 消息需要放在单独的 system 字段中
+    """
+    name = "wenxin"
+
+    def __init__(self, *, api_key: str, secret_key: str, **kwargs):
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock: Optional[asyncio.Lock] = None
+        super().__init__(**kwargs)
+
+    def _on_bind(self) -> None:
+        self._token_lock = asyncio.Lock()
+
+    async def _access_token(self, client: httpx.AsyncClient) -> str:
+        if self._token and time.time() < self._token_expires_at:
+            return self._token
+        async with self._token_lock:
+            if self._token and time.time() < self._token_expires_at:
+                return self._token
+            response = await client.post("/oauth/2.0/token", params={
+                "grant_type": "client_credentials",
+                "client_id": self.api_key,
+                "client_secret": self.secret_key,
+            })
+            await self._check(response)
+            data = response.json()
+            if "access_token" not in data:
+                raise AIProviderError(self.name, data.get("error_description", "failed to get access token"),
+                                      retryable=False)
+            self._token = data["access_token"]
+            self._token_expires_at = time.time() + max(0, int(data.get("expires_in", 0)) - 86400)
+            return self._token
+
+    def _request(self, model, messages, max_tokens, temperature, stream: bool) -> Tuple[str, Dict[str, Any]]:
+        body: Dict[str, Any] = {
+            "messages": [m for m in messages if m["role"] != "system"],
+            "temperature": max(0.01, min(temperature, 1.0)),
+            "max_output_tokens": max_tokens,
+            "stream": stream,
+        }
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        if system:
+            body["system"] = system
+        return f"/rpc/2.0/ai_custom/v1/wenxinworkshop/chat/{model.endpoint or model.name}", body
+
+    def _raise_for_error(self, data: Dict[str, Any]) -> None:
+        code = data.get("error_code")
+        if code is None:
+            return
+        if code in WENXIN_TOKEN_ERRORS:
+            self._token = None
+        raise AIProviderError(self.name, f"error {code}: {data.get('error_msg', '')}",
+                              retryable=code in WENXIN_RETRYABLE_CODES)
+
+    async def _complete(self, client, model, messages, max_tokens, temperature) -> Completion:
+        path, body = self._request(model, messages, max_tokens, temperature, False)
+        response = await client.post(path, params={"access_token": await self._access_token(client)}, json=body)
+        await self._check(response)
+        data = response.json()
+        self._raise_for_error(data)
+        usage = data.get("usage") or {}
+        return Completion(
+            text=data.get("result", ""),
+            provider=self.name,
+            model=model.name,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+    async def _stream(self, client, model, messages, max_tokens, temperature) -> AsyncIterator[str]:
+        path, body = self._request(model, messages, max_tokens, temperature, True)
+        params = {"access_token": await self._access_token(client)}
+        async with client.stream("POST", path, params=params, json=body) as response:
+            await self._check(response)
+            if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                # 出错时返回普通 JSON
+                await response.aread()
+                self._raise_for_error(response.json())
+            async for data in _sse_data(response):
+                chunk = json.loads(data)
+                self._raise_for_error(chunk)
+                if chunk.get("result"):
+                    yield chunk["result"]
+                if chunk.get("is_end"):
+                    return
+
+
+WENXIN_MODELS = (
+    ModelSpec("ernie-speed-128k", frozenset({CHAT, LONG_CONTEXT}), 0.0, 128_000, endpoint="ernie-speed-128k"),
+    ModelSpec("ernie-4.0-8k", frozenset({CHAT, CREATIVE}), 0.12, 8_000, endpoint="completions_pro"),
+)
+QWEN_MODELS = (
+    ModelSpec("qwen-turbo", frozenset({CHAT, LONG_CONTEXT}), 0.004, 128_000),
+    ModelSpec("qwen-plus", frozenset({CHAT, LONG_CONTEXT, CREATIVE}), 0.012, 128_000),
+    ModelSpec("qwen-max", frozenset({CHAT, CREATIVE}), 0.08, 32_000),
+)
+OPENAI_MODELS = (
+    ModelSpec("gpt-4o-mini", frozenset({CHAT, LONG_CONTEXT}), 0.003, 128_000),
+    ModelSpec("gpt-4o", frozenset({CHAT, LONG_CONTEXT, CREATIVE}), 0.05, 128_000),
+)
+MOCK_MODELS = (
+    ModelSpec("mock-chat", frozenset({CHAT, LONG_CONTEXT, CREATIVE}), 0.0, 1_000_000),
+)
+
+
+def _request_key(messages: List[Dict[str, str]], capabilities: FrozenSet[str], max_tokens: int,
+                 temperature: float, max_cost: Optional[float]) -> str:
+    payload = json.dumps([messages, sorted(capabilities), max_tokens, temperature, max_cost],
+                         ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AIGateway:
+    """
+    AI 网关
+
+    候选模型按（供应商是否已满、单价、注册顺序）排序：优先用最便宜的模型，
+    其所在供应商并发已满时先溢出到次便宜的供应商
+    """
+
+    def __init__(self, providers: Iterable[Provider]):
+        self.providers = list(providers)
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+
+    @property
+    def available(self) -> bool:
+        return bool(self.providers)
+
+    def route(
+        self,
+        capabilities: Iterable[str] = (CHAT,),
+        *,
+        prompt_tokens: int = 0,
+        max_cost: Optional[float] = None,
+    ) -> List[Tuple[Provider, ModelSpec]]:
+        """返回满足要求的候选 (供应商, 模型)，按优先级排序"""
+        required = frozenset(capabilities)
+        candidates = []
+        for order, provider in enumerate(self.providers):
+            for model in provider.models:
+                if not required <= model.capabilities or prompt_tokens > model.context_tokens:
+                    continue
+                if max_cost is not None and model.cost_per_1k_tokens > max_cost:
+                    continue
+                candidates.append(((provider.saturated, model.cost_per_1k_tokens, order), provider, model))
+        candidates.sort(key=lambda item: item[0])
+        return [(provider, model) for _, provider, model in candidates]
+
+    def _candidates(self, messages, capabilities, max_cost) -> List[Tuple[Provider, ModelSpec]]:
+        candidates = self.route(capabilities, prompt_tokens=estimate_tokens(messages), max_cost=max_cost)
+        if not candidates:
+            raise NoModelAvailable(f"no configured model supports {sorted(capabilities)}")
+        return candidates
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        capabilities: Iterable[str] = (CHAT,),
+        max_tokens: int = 1024,
+        temperature: float = 0.8,
+        max_cost: Optional[float] = None,
+    ) -> Completion:
+        """
+        非流式调用
+
+        参数完全相同的并发请求共享同一次上游调用；先到的调用方被取消不会影响其他调用方
+        """
+        capabilities = frozenset(capabilities)
+        self.requests += 1
+        key = (id(asyncio.get_running_loop()), _request_key(messages, capabilities, max_tokens, temperature, max_cost))
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(
+                self._complete_with_fallback(messages, capabilities, max_tokens, temperature, max_cost)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: tuple, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # 所有调用方都已取消时避免 "exception was never retrieved"
+
+    async def _complete_with_fallback(self, messages, capabilities, max_tokens, temperature, max_cost) -> Completion:
+        last_error: Optional[AIProviderError] = None
+        for provider, model in self._candidates(messages, capabilities, max_cost):
+            if last_error is not None:
+                self.fallbacks += 1
+            try:
+                return await provider.complete(model, messages, max_tokens=max_tokens, temperature=temperature)
+            except AIProviderError as e:
+                if not e.retryable:
+                    raise
+                last_error = e
+        raise last_error
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        capabilities: Iterable[str] = (CHAT,),
+        max_tokens: int = 4096,
+        temperature: float = 0.8,
+        max_cost: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """流式调用；只有在尚未产出任何内容时才会切换到下一个候选模型"""
+        self.requests += 1
+        last_error: Optional[AIProviderError] = None
+        for provider, model in self._candidates(messages, frozenset(capabilities), max_cost):
+            if last_error is not None:
+                self.fallbacks += 1
+            started = False
+            try:
+                pieces = provider.stream(model, messages, max_tokens=max_tokens, temperature=temperature)
+                async with aclosing(pieces):
+                    async for piece in pieces:
+                        started = True
+                        yield piece
+                return
+            except AIProviderError as e:
+                if started or not e.retryable:
+                    raise
+                last_error = e
+        raise last_error
+
+    async def aclose(self) -> None:
+        for provider in self.providers:
+            await provider.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "fallbacks": self.fallbacks,
+            "in_flight": len(self._inflight),
+            "providers": {provider.name: provider.stats() for provider in self.providers},
+        }
+
+
+def build_providers() -> List[Provider]:
+    """根据配置创建供应商（未配置密钥的供应商不启用）"""
+    common = {
+        "max_connections": settings.AI_MAX_CONNECTIONS_PER_PROVIDER,
+        "timeout": settings.AI_REQUEST_TIMEOUT_SECONDS,
+    }
+    providers: List[Provider] = []
+    if settings.AI_MOCK_PROVIDER_URL:
+        providers.append(MockProvider(
+            api_key="mock", base_url=settings.AI_MOCK_PROVIDER_URL, models=MOCK_MODELS,
+            max_concurrency=settings.AI_MOCK_MAX_CONCURRENCY, **common,
+        ))
+    if settings.WENXIN_API_KEY and settings.WENXIN_SECRET_KEY:
+        providers.append(WenxinProvider(
+            api_key=settings.WENXIN_API_KEY, secret_key=settings.WENXIN_SECRET_KEY,
+            base_url=settings.WENXIN_BASE_URL, models=WENXIN_MODELS,
+            max_concurrency=settings.WENXIN_MAX_CONCURRENCY, **common,
+        ))
+    if settings.QWEN_API_KEY:
+        providers.append(QwenProvider(
+            api_key=settings.QWEN_API_KEY, base_url=settings.QWEN_BASE_URL, models=QWEN_MODELS,
+            max_concurrency=settings.QWEN_MAX_CONCURRENCY, **common,
+        ))
+    if settings.OPENAI_API_KEY:
+        providers.append(OpenAIProvider(
+            api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL, models=OPENAI_MODELS,
+            max_concurrency=settings.OPENAI_MAX_CONCURRENCY, **common,
+        ))
+    return providers
+
+
+ai_gateway = AIGateway(build_providers())
@@ -0,0 +1,107 @@
+"""
+本地模拟 AI 服务
+实现 OpenAI Chat Completions 协议（含 SSE 流式输出），用固定的首 token 延迟与输出速率模拟模型，
+用于测试和离线压测；设置 AI_MOCK_PROVIDER_URL 后网关会把它当作一个零成本的供应商
+
+用法（在 backend 目录下）:
+    python -m app.services.ai_mock --port 9100
+    AI_MOCK_PROVIDER_URL=http://127.0.0.1:9100/v1 uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def default_reply(messages: List[Dict[str, str]]) -> str:
+    prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return "\n".join(f"{i}. {prompt[:60]}（模拟输出{i}）" for i in range(1, 6))
+
+
+def create_mock_app(
+    *,
+    first_token_delay: float = 0.05,
+    token_interval: float = 0.0,
+    chunk_chars: int = 4,
+    reply: Optional[Callable[[List[Dict[str, str]]], str]] = None,
+    fail_status: Optional[int] = None,
+) -> FastAPI:
+    """
+    创建模拟服务
+
+    app.state 记录收到的请求数与最大并发数（独立进程运行时可通过 GET /v1/mock/stats 读取），
+    便于测试连接复用、并发限制与请求合并
+    """
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.active = 0
+    app.state.max_active = 0
+    reply = reply or default_reply
+
+    @app.get("/v1/mock/stats")
+    async def mock_stats():
+        return {"requests": app.state.requests, "active": app.state.active, "max_active": app.state.max_active}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        if fail_status is not None:
+            return JSONResponse({"error": {"message": "mock failure"}}, status_code=fail_status)
+
+        text = reply(body.get("messages") or [])
+        model = body.get("model", "mock-chat")
+        chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages") or [])
+
+        app.state.active += 1
+        app.state.max_active = max(app.state.max_active, app.state.active)
+        if not body.get("stream"):
+            try:
+                await asyncio.sleep(first_token_delay + token_interval * len(chunks))
+            finally:
+                app.state.active -= 1
+            return {
+                "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(chunks)},
+            }
+
+        async def events():
+            try:
+                await asyncio.sleep(first_token_delay)
+                for chunk in chunks:
+                    data = {"id": "mock", "object": "chat.completion.chunk", "model": model,
+                            "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+                    if token_interval:
+                        await asyncio.sleep(token_interval)
+                yield "data: [DONE]\n\n"
+            finally:
+                app.state.active -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--token-interval", type=float, default=0.01)
+    args = parser.parse_args()
+    app = create_mock_app(first_token_delay=args.first_token_delay, token_interval=args.token_interval)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", timeout_keep_alive=75)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+后台任务队列
+jobs 表是持久化的队列：提交即写入一行，worker 通过单条 UPDATE ... RETURNING 原子认领
+（PostgreSQL 上配合 FOR UPDATE SKIP LOCKED，多个 worker 互不阻塞）；
+Redis 可用时通过列表唤醒空闲的 worker，否则退回进程内事件 + 定时轮询
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_service import async_redis_service
+from app.models.job import Job
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+WAKEUP_KEY = "jobs:wakeup"
+
+
+class PermanentJobError(Exception):
+    """不应重试的任务错误（参数错误、目标已删除等）"""
+
+
+@dataclass
+class JobContext:
+    """传给任务处理函数的上下文"""
+    job_id: int
+    user_id: int
+    type: str
+    attempt: int
+    max_attempts: int
+
+    @property
+    def is_last_attempt(self) -> bool:
+        return self.attempt >= self.max_attempts
+
+
+Handler = Callable[[JobContext, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+FailureHook = Callable[[JobContext, Dict[str, Any], str], Awaitable[None]]
+
+
+@dataclass
+class JobHandler:
+    run: Handler
+    on_failure: Optional[FailureHook] = None  # 最终失败或被取消时调用（例如恢复剧本状态）
+
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(job_type: str, *, on_failure: Optional[FailureHook] = None):
+    """注册任务处理函数"""
+    def decorator(fn: Handler) -> Handler:
+        _handlers[job_type] = JobHandler(fn, on_failure)
+        return fn
+    return decorator
+
+
+def get_handler(job_type: str) -> Optional[JobHandler]:
+    return _handlers.get(job_type)
+
+
+async def run_failure_hook(context: JobContext, payload: Dict[str, Any], error: str) -> None:
+    """任务最终失败或被取消时调用处理函数注册的 on_failure（其自身的异常只记录不抛出）"""
+    handler = get_handler(context.type)
+    if handler is None or handler.on_failure is None:
+        return
+    try:
+        await handler.on_failure(context, payload, error)
+    except Exception as e:
+        print(f"Warning: job {context.job_id} failure hook failed: {e}")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def retry_delay(attempt: int) -> float:
+    """指数退避（带抖动）：base * 2^(attempt-1)，上限 JOB_RETRY_MAX_SECONDS"""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempt - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class LocalJobBroker:
+    """进程内唤醒：同一进程中的 worker（例如随 API 一起运行的 worker）立即被唤醒"""
+
+    def __init__(self):
+        self._waiters: List[tuple] = []
+
+    async def notify(self) -> None:
+        for loop, event in list(self._waiters):
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait(self, timeout: float) -> None:
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._waiters.remove(waiter)
+
+
+class RedisJobBroker(LocalJobBroker):
+    """Redis 可用时同时通过 Redis 列表唤醒其他进程中的 worker"""
+
+    async def notify(self) -> None:
+        await super().notify()
+        await async_redis_service.push_signal(WAKEUP_KEY)
+
+    async def wait(self, timeout: float) -> None:
+        if not async_redis_service.is_available:
+            await super().wait(timeout)
+            return
+        started = time.monotonic()
+        if not await async_redis_service.wait_signal(WAKEUP_KEY, max(1, int(timeout))):
+            # 超时或 Redis 出错：补足剩余的等待时间，避免出错时空转
+            remaining = timeout - (time.monotonic() - started)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    user_id: int
+    type: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+    def context(self) -> JobContext:
+        return JobContext(self.id, self.user_id, self.type, self.attempts, self.max_attempts)
+
+
+class JobQueue:
+    """任务的提交、认领、完成、重试与取消；所有方法都在调用方提供的会话中执行"""
+
+    def __init__(self, broker: LocalJobBroker):
+        self.broker = broker
+        self.enqueued = 0
+        self.claimed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.cancelled = 0
+        self.requeued = 0
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        job_type: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """提交任务并提交事务（调用方在同一事务中的其他修改一并提交），然后唤醒 worker"""
+        if job_type not in _handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        job = Job(
+            user_id=user_id,
+            type=job_type,
+            payload=payload,
+            priority=priority,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+            status=QUEUED,
+            run_after=_utcnow(),
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        self.enqueued += 1
+        await self.broker.notify()
+        return job
+
+    async def claim(self, db: AsyncSession, worker_id: str) -> Optional[ClaimedJob]:
+        """认领一个到期的最高优先级任务"""
+        now = _utcnow()
+        candidate = (
+            select(Job.id)
+            .where(Job.status == QUEUED, Job.run_after <= now)
+            .order_by(Job.priority.desc(), Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == candidate, Job.status == QUEUED)
+            .values(
+                status=RUNNING,
+                attempts=Job.attempts + 1,
+                locked_by=worker_id,
+                heartbeat_at=now,
+                started_at=func.coalesce(Job.started_at, now),
+            )
+            .returning(Job.id, Job.user_id, Job.type, Job.payload, Job.attempts, Job.max_attempts)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        await db.commit()
+        if row is None:
+            return None
+        self.claimed += 1
+        return ClaimedJob(*row)
+
+    async def _finish(self, db: AsyncSession, job_id: int, worker_id: str, **values) -> bool:
+        # 只有仍由本 worker 持有的任务才能被更新（任务可能已因心跳超时被重新认领）
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == RUNNING, Job.locked_by == worker_id)
+            .values(locked_by=None, heartbeat_at=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def complete(self, db: AsyncSession, job: ClaimedJob, worker_id: str, result: Optional[Dict[str, Any]]) -> bool:
+        done = await self._finish(db, job.id, worker_id, status=SUCCEEDED, result=result, error=None,
+                                  finished_at=_utcnow())
+        self.succeeded += done
+        return done
+
+    async def fail(self, db: AsyncSession, job: ClaimedJob, worker_id: str, error: str, *, retry: bool) -> str:
+        """记录失败；还有重试次数时按退避时间重新排队，返回任务的新状态"""
+        if retry and job.attempts < job.max_attempts:
+            run_after = _utcnow() + timedelta(seconds=retry_delay(job.attempts))
+            if await self._finish(db, job.id, worker_id, status=QUEUED, error=error, run_after=run_after):
+                self.retried += 1
+            return QUEUED
+        if await self._finish(db, job.id, worker_id, status=FAILED, error=error, finished_at=_utcnow()):
+            self.failed += 1
+        return FAILED
+
+    async def mark_cancelled(self, db: AsyncSession, job: ClaimedJob, worker_id: str) -> bool:
+        done = await self._finish(db, job.id, worker_id, status=CANCELLED, finished_at=_utcnow())
+        self.cancelled += done
+        return done
+
+    async def release(self, db: AsyncSession, job: ClaimedJob, worker_id: str) -> bool:
+        """worker 退出时把未完成的任务放回队列，本次执行不计入重试次数"""
+        return await self._finish(db, job.id, worker_id, status=QUEUED, attempts=Job.attempts - 1,
+                                  run_after=_utcnow())
+
+    async def heartbeat(self, db: AsyncSession, job_ids: Sequence[int], worker_id: str) -> List[int]:
+        """刷新执行中任务的心跳，返回其中已被请求取消的任务"""
+        if not job_ids:
+            return []
+        await db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.status == RUNNING, Job.locked_by == worker_id)
+            .values(heartbeat_at=_utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        cancelled = (await db.execute(
+            select(Job.id).where(Job.id.in_(job_ids), Job.cancel_requested.is_(True))
+        )).scalars().all()
+        await db.commit()
+        return list(cancelled)
+
+    async def requeue_stale(self, db: AsyncSession) -> int:
+        """
+        心跳超时的任务（worker 已崩溃或被强制结束）重新排队；
+        重试次数用尽的标记为失败，已请求取消的标记为取消
+        """
+        now = _utcnow()
+        rows = (await db.execute(
+            select(Job.id, Job.user_id, Job.type, Job.payload, Job.attempts, Job.max_attempts, Job.cancel_requested)
+            .where(Job.status == RUNNING, Job.heartbeat_at < now - timedelta(seconds=settings.JOB_STALE_SECONDS))
+            .with_for_update(skip_locked=True)
+        )).all()
+        requeue, terminal = [], []
+        for row in rows:
+            if row.cancel_requested or row.attempts >= row.max_attempts:
+                terminal.append(row)
+            else:
+                requeue.append(row.id)
+        released = dict(locked_by=None, heartbeat_at=None, error="worker lost")
+        if requeue:
+            await db.execute(
+                update(Job).where(Job.id.in_(requeue)).values(status=QUEUED, run_after=now, **released)
+                .execution_options(synchronize_session=False)
+            )
+        for row in terminal:
+            await db.execute(
+                update(Job).where(Job.id == row.id)
+                .values(status=CANCELLED if row.cancel_requested else FAILED, finished_at=now, **released)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+
+        for row in terminal:
+            await run_failure_hook(JobContext(row.id, row.user_id, row.type, row.attempts, row.max_attempts),
+                                   row.payload, "worker lost")
+        self.requeued += len(requeue)
+        if requeue:
+            await self.broker.notify()
+        return len(requeue)
+
+    async def cancel(self, db: AsyncSession, job: Job) -> Job:
+        """
+        取消任务：排队中的任务直接取消；执行中的任务设置取消标记，由 worker 在下次心跳时中断
+        """
+        cancelled = False
+        if job.status == QUEUED:
+            result = await db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == QUEUED)
+                .values(status=CANCELLED, cancel_requested=True, finished_at=_utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            cancelled = bool(result.rowcount)
+        elif job.status == RUNNING:
+            await db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == RUNNING)
+                .values(cancel_requested=True)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        if cancelled:
+            # 先提交取消再调用 on_failure：处理函数使用自己的会话，不能与未提交的更新交错
+            self.cancelled += 1
+            await run_failure_hook(JobContext(job.id, job.user_id, job.type, job.attempts, job.max_attempts),
+                                   job.payload, "cancelled")
+        await db.refresh(job)
+        return job
+
+    async def get(self, db: AsyncSession, job_id: int) -> Optional[Job]:
+        return await db.get(Job, job_id)
+
+    async def get_many(self, db: AsyncSession, *, user_id: int, ids: Sequence[int]) -> List[Job]:
+        """批量查询任务状态（只返回属于该用户的任务，按 id 排序）"""
+        if not ids:
+            return []
+        result = await db.execute(
+            select(Job).where(Job.user_id == user_id, Job.id.in_(set(ids))).order_by(Job.id)
+        )
+        return list(result.scalars().all())
+
+    async def stats(self, db: AsyncSession) -> Dict[str, Any]:
+        counts = dict((await db.execute(select(Job.status, func.count()).group_by(Job.status))).all())
+        return {
+            "counts": {status: counts.get(status, 0) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED)},
+            "process": {
+                "enqueued": self.enqueued,
+                "claimed": self.claimed,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "retried": self.retried,
+                "cancelled": self.cancelled,
+                "requeued": self.requeued,
+            },
+        }
+
+
+job_queue = JobQueue(RedisJobBroker())
@@ -0,0 +1,203 @@
+"""
+提示词优化结果缓存
+两级缓存：进程内 LRU（TTL + 条目上限）在前，Redis（跨 worker 共享，较长 TTL）在后
+
+key 由规范化后的提示词与模板版本组成：全角/半角统一、大小写统一、空白与标点折叠，
+因此只在空格、标点或全半角上不同的提示词共用同一份结果；修改模板后版本号变化，旧结果自然失效
+
+同一个 key 只有一个上游调用：进程内用共享的加载任务合并并发请求，
+跨 worker 用 Redis 短期锁，未抢到锁的一方等待结果写入
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.redis_service import async_redis_service
+
+KEY_PREFIX = "prompt_opt"
+
+# NFKC 之后仍为全角的中文标点，折叠为对应的半角标点
+PUNCTUATION_MAP = str.maketrans({
+    "。": ".", "、": ",", "「": '"', "」": '"', "『": '"', "』": '"', "【": "[", "】": "]",
+    "《": '"', "》": '"', "“": '"', "”": '"', "‘": "'", "’": "'", "…": ".", "—": "-", "～": "~",
+})
+# 连续的同类标点（“！！！”、“...”）折叠为一个
+REPEATED_PUNCTUATION_RE = re.compile(r"([^\w\s])\1+")
+WHITESPACE_RE = re.compile(r"\s+")
+# 与非 ASCII 字符或标点相邻的空白没有语义（中文不以空格分词）
+INSIGNIFICANT_SPACE_RE = re.compile(r" (?=[^\x00-\x7f]|[^\w\s])|(?<=[^\x00-\x7f]) |(?<=[^\w\s]) ")
+TRAILING_PUNCTUATION_RE = re.compile(r"[^\w\s\"')\]]+$")
+
+
+def normalize_prompt(prompt: str) -> str:
+    text = unicodedata.normalize("NFKC", prompt).translate(PUNCTUATION_MAP).casefold()
+    text = WHITESPACE_RE.sub(" ", text).strip()
+    text = REPEATED_PUNCTUATION_RE.sub(r"\1", text)
+    text = INSIGNIFICANT_SPACE_RE.sub("", text)
+    return TRAILING_PUNCTUATION_RE.sub("", text)
+
+
+def cache_key(prompt: str, version: str) -> str:
+    digest = hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest()[:32]
+    return f"{KEY_PREFIX}:{version}:{digest}"
+
+
+class PromptCache:
+    """
+    两级结果缓存
+
+    compute 返回 None 表示结果不可缓存（例如模型调用失败后的模板兜底），此时直接返回兜底结果
+    """
+
+    def __init__(self, *, ttl_seconds: float, max_size: int, redis_ttl_seconds: float, lock_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.lock_waits = 0
+        self.uncacheable = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get_or_compute(
+        self,
+        prompt: str,
+        version: str,
+        compute: Callable[[], Awaitable[Optional[List[str]]]],
+        fallback: Callable[[], List[str]],
+    ) -> List[str]:
+        key = cache_key(prompt, version)
+        value = self._get_local(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # 加载放在独立的任务中：发起请求的客户端断开时，等待同一结果的其他请求不受影响
+            task = asyncio.ensure_future(self._load(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        value = await asyncio.shield(task)
+        return value if value is not None else fallback()
+
+    async def _load(self, key: str, compute: Callable[[], Awaitable[Optional[List[str]]]]) -> Optional[List[str]]:
+        value = await self._get_redis(key)
+        if value is not None:
+            self.redis_hits += 1
+            self._set_local(key, value)
+            return value
+
+        lock_key = f"{key}:lock"
+        if not await async_redis_service.set_value(lock_key, "1", self.lock_seconds, only_if_absent=True):
+            # Redis 不可用时 set_value 也返回 False，此时无需等待
+            if async_redis_service.is_available:
+                value = await self._wait_for_redis(key)
+                if value is not None:
+                    self.lock_waits += 1
+                    self._set_local(key, value)
+                    return value
+            locked = False
+        else:
+            locked = True
+
+        self.misses += 1
+        try:
+            value = await compute()
+            if value is None:
+                self.uncacheable += 1
+                return None
+            self._set_local(key, value)
+            await async_redis_service.set_value(key, json.dumps(value, ensure_ascii=False), self.redis_ttl_seconds)
+            return value
+        finally:
+            if locked:
+                await async_redis_service.delete_value(lock_key)
+
+    async def _wait_for_redis(self, key: str) -> Optional[List[str]]:
+        """等待持有锁的 worker 写入结果，锁过期仍未写入时返回 None（由本进程自行计算）"""
+        deadline = time.monotonic() + self.lock_seconds
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            value = await self._get_redis(key)
+            if value is not None:
+                return value
+            delay = min(delay * 2, 1.0)
+        return None
+
+    async def _get_redis(self, key: str) -> Optional[List[str]]:
+        raw = await async_redis_service.get_value(key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def _get_local(self, key: str) -> Optional[List[str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return list(entry[1])
+
+    def _set_local(self, key: str, value: List[str]) -> None:
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, list(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """清空进程内缓存（不影响 Redis）"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等统计信息"""
+        hits = self.local_hits + self.redis_hits + self.coalesced + self.lock_waits
+        total = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "redis_ttl_seconds": self.redis_ttl_seconds,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "coalesced": self.coalesced,
+            "lock_waits": self.lock_waits,
+            "misses": self.misses,
+            "uncacheable": self.uncacheable,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+prompt_cache = PromptCache(
+    ttl_seconds=settings.PROMPT_CACHE_TTL_SECONDS,
+    max_size=settings.PROMPT_CACHE_MAX_SIZE,
+    redis_ttl_seconds=settings.PROMPT_CACHE_REDIS_TTL_SECONDS,
+    lock_seconds=settings.PROMPT_CACHE_LOCK_SECONDS,
+)
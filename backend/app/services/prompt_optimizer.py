@@ -0,0 +1,65 @@
+"""
+提示词优化
+已配置 AI 供应商时由模型改写提示词，否则（或调用失败时）退回固定的改写模板；
+模型结果经 prompt_cache 缓存，只在空白、标点或全半角上不同的提示词共用一次调用
+"""
+
+import hashlib
+import re
+from typing import List, Optional
+
+from app.services.ai_gateway import CHAT, AIGatewayError, ai_gateway
+from app.services.prompt_cache import prompt_cache
+
+SUGGESTION_COUNT = 5
+
+SYSTEM_PROMPT = (
+    "你是资深的短视频编剧。用户会给出一个剧本创作提示词，请从角色设定、画面感、剧情转折、"
+    f"对话风格、氛围基调等角度改写出 {SUGGESTION_COUNT} 个更具体的版本，每行一个，不要编号，不要解释。"
+)
+
+# 缓存 key 的一部分：修改系统提示词或建议数量后旧的缓存结果不再命中
+TEMPLATE_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode()).hexdigest()[:8]
+
+# 模型输出中常见的编号前缀，例如 `1.`、`2、`、`(3)`、`- `
+NUMBERING_RE = re.compile(r"^\s*(?:[-*•]|[（(]?\d+[)）.、．:：]?)\s*")
+
+
+def template_suggestions(prompt: str) -> List[str]:
+    return [
+        f"{prompt}，包含详细的角色设定和情感冲突",
+        f"{prompt}，突出视觉效果和画面感",
+        f"{prompt}，加入意想不到的剧情转折",
+        f"{prompt}，注重对话的自然流畅和个性化",
+        f"{prompt}，营造特定的氛围和情绪基调"
+    ]
+
+
+def parse_suggestions(text: str) -> List[str]:
+    lines = (NUMBERING_RE.sub("", line).strip() for line in text.splitlines())
+    return [line for line in lines if line][:SUGGESTION_COUNT]
+
+
+async def generate_suggestions(prompt: str) -> Optional[List[str]]:
+    """调用模型改写提示词，失败或输出无法解析时返回 None（不缓存，由调用方退回模板）"""
+    try:
+        completion = await ai_gateway.complete(
+            [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+            capabilities=(CHAT,),
+            max_tokens=800,
+        )
+    except AIGatewayError as e:
+        print(f"Warning: prompt optimization failed: {e}")
+        return None
+    return parse_suggestions(completion.text) or None
+
+
+async def optimize_prompt(prompt: str) -> List[str]:
+    if not ai_gateway.available:
+        return template_suggestions(prompt)
+    return await prompt_cache.get_or_compute(
+        prompt,
+        TEMPLATE_VERSION,
+        lambda: generate_suggestions(prompt),
+        lambda: template_suggestions(prompt),
+    )
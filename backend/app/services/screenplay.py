@@ -0,0 +1,211 @@
+"""
+剧本解析模块
+将正文按 `=== 场景N ===` 切分为场景，并从场景中解析出
+`[画面描述]` 镜头与 `角色：（台词）` 对白，结果持久化到 script_scenes 表；
+正文变化时只重新解析内容哈希发生变化的场景
+"""
+
+import hashlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.scene import ScriptScene
+
+SCENE_HEADER_RE = re.compile(r"^[ \t]*===[ \t]*(.+?)[ \t]*===[ \t]*$", re.MULTILINE)
+SHOT_MARKER = "[画面描述]"
+DIALOGUE_RE = re.compile(
+    r"^(?P<character>[^\s：:（()\[\]=]{1,20})[：:][ \t]*"
+    r"(?:[（(](?P<paren>[^）)]*)[）)])?[ \t]*(?P<text>.*)$"
+)
+# 括号内是表演提示而不是台词本身，台词在下一行（例如 `主角：（独白）`）
+DIRECTION_WORDS = frozenset({"对话", "独白", "内心独白", "旁白", "画外音", "OS", "VO", "V.O.", "O.S."})
+# 结束标记，不构成场景
+END_HEADINGS = frozenset({"完", "剧终", "全剧终", "END", "THE END"})
+# 与 script_scenes.heading 列的长度一致，过长的标题截断保存
+MAX_HEADING_LENGTH = 255
+
+
+@dataclass
+class SceneChunk:
+    """正文中的一个场景片段（未解析）"""
+    position: int
+    heading: Optional[str]
+    start: int
+    end: int
+    text: str
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha1(self.text.encode("utf-8")).hexdigest()
+
+
+def split_scenes(content: Optional[str]) -> List[SceneChunk]:
+    """
+    按场景标题切分正文，偏移量以字符计
+
+    第一个场景标题之前的内容（标题、类型等元信息）不属于任何场景；
+    没有任何场景标题时整篇正文视为一个场景；遇到 `=== 完 ===` 等结束标记即停止
+    """
+    if not content:
+        return []
+    headers = list(SCENE_HEADER_RE.finditer(content))
+    if not headers:
+        return [SceneChunk(1, None, 0, len(content), content)] if content.strip() else []
+
+    chunks: List[SceneChunk] = []
+    for i, header in enumerate(headers):
+        heading = header.group(1).strip()
+        if heading.upper() in END_HEADINGS:
+            break
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        chunks.append(SceneChunk(
+            len(chunks) + 1, heading[:MAX_HEADING_LENGTH], header.start(), end, content[header.start():end],
+        ))
+    return chunks
+
+
+def parse_scene(text: str) -> Dict[str, Any]:
+    """解析单个场景中的镜头与对白"""
+    shots: List[Dict[str, Any]] = []
+    dialogues: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    current_field = ""
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            current = None
+            continue
+        if SCENE_HEADER_RE.match(line):
+            current = None
+            continue
+        if stripped.startswith(SHOT_MARKER):
+            current = {"description": stripped[len(SHOT_MARKER):].strip()}
+            current_field = "description"
+            shots.append(current)
+            continue
+        match = DIALOGUE_RE.match(stripped)
+        if match:
+            paren = (match.group("paren") or "").strip()
+            inline = match.group("text").strip()
+            if paren and not inline and paren not in DIRECTION_WORDS:
+                # `角色：（台词）`：括号内就是完整的台词，后面的行不再续接
+                dialogues.append({"character": match.group("character"), "direction": None, "line": paren})
+                current = None
+            else:
+                current = {"character": match.group("character"), "direction": paren or None, "line": inline}
+                current_field = "line"
+                dialogues.append(current)
+            continue
+        # 续行：接在当前镜头描述或对白之后
+        if current is not None:
+            current[current_field] = (current[current_field] + "\n" + stripped).strip()
+
+    characters = list(dict.fromkeys(d["character"] for d in dialogues))
+    return {"shots": shots, "dialogues": dialogues, "characters": characters}
+
+
+def _scene_values(script_id: int, chunk: SceneChunk) -> Dict[str, Any]:
+    parsed = parse_scene(chunk.text)
+    return {
+        "script_id": script_id,
+        "position": chunk.position,
+        "heading": chunk.heading,
+        "start_offset": chunk.start,
+        "end_offset": chunk.end,
+        "content_hash": chunk.content_hash,
+        "text": chunk.text,
+        "shot_count": len(parsed["shots"]),
+        "dialogue_count": len(parsed["dialogues"]),
+        **parsed,
+    }
+
+
+async def sync_scenes(db: AsyncSession, script_id: int, content: Optional[str]) -> Dict[str, int]:
+    """
+    根据新的正文同步场景索引（在调用方的事务中执行，不提交）
+
+    按内容哈希匹配已有场景：未变化的场景只在位置变化时更新序号和偏移量，
+    新增或修改过的场景才重新解析，不再存在的场景删除
+    """
+    chunks = split_scenes(content)
+    rows = (await db.execute(
+        select(ScriptScene.id, ScriptScene.position, ScriptScene.content_hash,
+               ScriptScene.start_offset, ScriptScene.end_offset)
+        .where(ScriptScene.script_id == script_id)
+    )).all()
+    existing = defaultdict(list)
+    for row in rows:
+        existing[row.content_hash].append(row)
+
+    moved: List[Dict[str, Any]] = []
+    parsed: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        candidates = existing.get(chunk.content_hash)
+        if candidates:
+            row = candidates.pop(0)
+            if (row.position, row.start_offset, row.end_offset) != (chunk.position, chunk.start, chunk.end):
+                moved.append({"_id": row.id, "_position": chunk.position, "_start": chunk.start, "_end": chunk.end})
+        else:
+            parsed.append(_scene_values(script_id, chunk))
+    removed = [row.id for candidates in existing.values() for row in candidates]
+
+    if removed:
+        await db.execute(delete(ScriptScene).where(ScriptScene.id.in_(removed)))
+    if moved:
+        table = ScriptScene.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(
+                position=bindparam("_position"),
+                start_offset=bindparam("_start"),
+                end_offset=bindparam("_end"),
+            ),
+            moved,
+        )
+    if parsed:
+        await db.execute(insert(ScriptScene), parsed)
+    return {"parsed": len(parsed), "moved": len(moved), "removed": len(removed)}
+
+
+OUTLINE_COLUMNS = (
+    ScriptScene.position,
+    ScriptScene.heading,
+    ScriptScene.start_offset,
+    ScriptScene.end_offset,
+    ScriptScene.shot_count,
+    ScriptScene.dialogue_count,
+    ScriptScene.characters,
+)
+
+
+async def get_scene_outline(db: AsyncSession, script_id: int) -> List[Dict[str, Any]]:
+    """场景大纲：只读取标题、位置和统计信息，不读取场景原文"""
+    rows = await db.execute(
+        select(*OUTLINE_COLUMNS)
+        .where(ScriptScene.script_id == script_id)
+        .order_by(ScriptScene.position)
+    )
+    return [row._asdict() for row in rows.all()]
+
+
+async def get_scene(db: AsyncSession, script_id: int, position: int) -> Optional[ScriptScene]:
+    """读取单个场景（含原文与解析结果）"""
+    result = await db.execute(
+        select(ScriptScene)
+        .where(ScriptScene.script_id == script_id, ScriptScene.position == position)
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def remove_scenes(db: AsyncSession, script_ids: List[int]) -> None:
+    """删除指定剧本的场景索引（在调用方的事务中执行，不提交）"""
+    if script_ids:
+        await db.execute(delete(ScriptScene).where(ScriptScene.script_id.in_(script_ids)))
@@ -0,0 +1,192 @@
+"""
+剧本生成
+根据剧本的标题、类型、时长和用户提示词调用 AI 网关生成正文，两种方式：
+- 后台任务：接口只提交任务并返回任务 ID，生成完成后一次性写入正文
+- SSE 流式：模型输出逐段推送给客户端，累计的正文定期写入 Script.content，客户端断开时取消上游调用
+"""
+
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import anyio
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.crud.script import async_script as crud_script
+from app.db.base import AsyncSessionLocal
+from app.models.script import Script
+from app.services.ai_gateway import CHAT, CREATIVE, AIGatewayError, AIProviderError, NoModelAvailable, ai_gateway
+from app.services.job_queue import JobContext, PermanentJobError, job_handler
+
+GENERATE_SCRIPT = "script.generate"
+
+SYSTEM_PROMPT = """你是资深的短视频编剧。请根据要求创作完整的剧本正文，严格使用以下格式：
+=== 场景N：场景名 ===
+[画面描述] 镜头与画面说明
+角色名：（台词）
+所有场景结束后单独一行写 === 完 ===。只输出剧本正文，不要任何解释。"""
+
+
+def build_generation_messages(script: Script, prompt: Optional[str]) -> List[Dict[str, str]]:
+    lines = [f"标题：{script.title}"]
+    if script.genre:
+        lines.append(f"类型：{script.genre}")
+    if script.target_audience:
+        lines.append(f"目标受众：{script.target_audience}")
+    lines.append(f"目标时长：{script.duration or 5}分钟")
+    if script.description:
+        lines.append(f"简介：{script.description}")
+    if prompt:
+        lines.append(f"创作要求：{prompt}")
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": "\n".join(lines)}]
+
+
+async def _reset_status(context: JobContext, payload: Dict[str, Any], error: str) -> None:
+    """生成最终失败或被取消时，把剧本从 generating 恢复为 draft"""
+    async with AsyncSessionLocal() as db:
+        script = await crud_script.get(db, id=payload["script_id"])
+        if script is not None and script.status == "generating":
+            await crud_script.update(db, db_obj=script, obj_in={"status": "draft"})
+
+
+@job_handler(GENERATE_SCRIPT, on_failure=_reset_status)
+async def generate_script(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async with AsyncSessionLocal() as db:
+        script = await crud_script.get(db, id=payload["script_id"])
+        if script is None:
+            raise PermanentJobError("Script not found")
+        messages = build_generation_messages(script, payload.get("prompt"))
+
+    try:
+        completion = await ai_gateway.complete(messages, capabilities=(CHAT, CREATIVE), max_tokens=4096)
+    except NoModelAvailable as e:
+        raise PermanentJobError(str(e)) from e
+    except AIProviderError as e:
+        if not e.retryable:
+            raise PermanentJobError(str(e)) from e
+        raise
+
+    async with AsyncSessionLocal() as db:
+        script = await crud_script.get(db, id=payload["script_id"])
+        if script is None:
+            raise PermanentJobError("Script not found")
+        await crud_script.update(db, db_obj=script, obj_in={"content": completion.text, "status": "completed"})
+    return {
+        "script_id": payload["script_id"],
+        "provider": completion.provider,
+        "model": completion.model,
+        "characters": len(completion.text),
+    }
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def save_partial_content(script_id: int, content: str) -> None:
+    """
+    保存生成中的正文（只更新正文与版本号，不重建检索词和场景索引，生成结束时再统一更新）
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Script)
+            .where(Script.id == script_id)
+            .values(content=content, version=Script.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+async def finish_generation(script_id: int, content: str, completed: bool) -> Optional[int]:
+    """写入最终正文并更新索引；未完成（出错或客户端断开）时保留已生成的部分并恢复为 draft"""
+    async with AsyncSessionLocal() as db:
+        script = await crud_script.get(db, id=script_id)
+        if script is None:
+            return None
+        obj_in: Dict[str, Any] = {"status": "completed" if completed else "draft"}
+        if content:
+            obj_in["content"] = content
+        script = await crud_script.update(db, db_obj=script, obj_in=obj_in)
+        return script.version
+
+
+_END = object()
+
+
+async def _pump(messages: List[Dict[str, str]], queue: asyncio.Queue) -> None:
+    """读取上游输出放入有界队列；队列满时暂停读取，由 TCP 流控把压力传回上游"""
+    try:
+        async with aclosing(ai_gateway.stream(
+            messages, capabilities=(CHAT, CREATIVE), max_tokens=settings.GENERATION_MAX_TOKENS
+        )) as pieces:
+            async for piece in pieces:
+                await queue.put(piece)
+    except AIGatewayError as e:
+        await queue.put(e)
+    except Exception as e:
+        # 其他异常同样要通知消费方，否则事件流会一直等待队列直到客户端断开
+        print(f"Warning: Generation stream failed: {e!r}")
+        await queue.put(AIGatewayError("Generation failed"))
+    else:
+        await queue.put(_END)
+
+
+async def stream_generation(script_id: int, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    """
+    生成 SSE 事件流：start → token… → done / error
+
+    客户端读得慢时，队列中积压的片段合并为一个 token 事件发送；
+    空闲超过 SSE_HEARTBEAT_SECONDS 时发送注释行保持连接；
+    每隔 GENERATION_FLUSH_SECONDS 秒或新增 GENERATION_FLUSH_CHARS 个字符把累计正文写入数据库
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.GENERATION_STREAM_BUFFER)
+    producer = asyncio.create_task(_pump(messages, queue))
+    parts: List[str] = []
+    length = flushed = 0
+    last_flush = time.monotonic()
+    finished = saved = False
+    try:
+        yield sse_event("start", {"script_id": script_id})
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            batch = []
+            while isinstance(item, str):
+                batch.append(item)
+                if queue.empty():
+                    item = None
+                    break
+                item = queue.get_nowait()
+            if batch:
+                text = "".join(batch)
+                parts.append(text)
+                length += len(text)
+                yield sse_event("token", {"text": text})
+            if isinstance(item, AIGatewayError):
+                yield sse_event("error", {"detail": str(item)})
+                break
+            if item is _END:
+                finished = True
+                break
+            now = time.monotonic()
+            if length - flushed >= settings.GENERATION_FLUSH_CHARS or now - last_flush >= settings.GENERATION_FLUSH_SECONDS:
+                await save_partial_content(script_id, "".join(parts))
+                flushed, last_flush = length, now
+
+        version = await finish_generation(script_id, "".join(parts), finished)
+        saved = True
+        if finished:
+            yield sse_event("done", {"characters": length, "version": version})
+    finally:
+        producer.cancel()
+        # 客户端断开时请求所在的取消域已被取消，收尾的数据库写入需要屏蔽取消
+        with anyio.CancelScope(shield=True):
+            await asyncio.gather(producer, return_exceptions=True)
+            if not saved:
+                await finish_generation(script_id, "".join(parts), False)
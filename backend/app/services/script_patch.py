@@ -0,0 +1,42 @@
+"""
+剧本内容增量更新模块
+将客户端提交的文本区间编辑应用到基准版本的正文上
+"""
+
+from typing import Iterable, Sequence
+
+from app.schemas.script import ScriptTextEdit
+
+
+class InvalidPatchError(ValueError):
+    """编辑区间非法（越界或相互重叠）"""
+
+
+def apply_text_edits(content: str, edits: Sequence[ScriptTextEdit]) -> str:
+    """
+    将一组编辑应用到 content 上
+
+    所有偏移量都基于同一个基准版本（以 Unicode 码点计），互不重叠；
+    按起点排序后一次拼接完成，各编辑之间不会互相影响偏移
+    """
+    ordered = sorted(edits, key=lambda e: (e.start, e.end))
+    _check_ranges(ordered, len(content))
+
+    parts = []
+    cursor = 0
+    for edit in ordered:
+        parts.append(content[cursor:edit.start])
+        parts.append(edit.text)
+        cursor = edit.end
+    parts.append(content[cursor:])
+    return "".join(parts)
+
+
+def _check_ranges(ordered: Iterable[ScriptTextEdit], length: int) -> None:
+    previous_end = 0
+    for edit in ordered:
+        if edit.start > edit.end or edit.end > length:
+            raise InvalidPatchError(f"Edit range [{edit.start}, {edit.end}) is out of bounds")
+        if edit.start < previous_end:
+            raise InvalidPatchError(f"Edit range [{edit.start}, {edit.end}) overlaps a previous edit")
+        previous_end = edit.end
@@ -0,0 +1,211 @@
+"""
+剧本全文检索模块
+CJK 连续字符切分为二元组（bigram），并补充每段的最后一个字以支持单字检索；
+拉丁字母和数字按整词切分。检索词以空格拼接后写入 script_search_index，
+PostgreSQL 使用 tsvector + GIN 索引，SQLite 使用 FTS5；高亮摘要在应用侧生成
+"""
+
+import html
+import re
+import unicodedata
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import column, delete, func, insert, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.script import Script
+from app.models.script_search import SEARCH_CONFIG, SQLITE_FTS_TABLE, ScriptSearchIndex, search_document
+
+# 单个剧本最多保留的（去重后）检索词数，PostgreSQL 的 tsvector 上限为 1MB
+MAX_INDEX_TOKENS = 50000
+SNIPPET_CHARS = 80
+# SQLite bm25 的列权重（标题, 正文）
+SQLITE_COLUMN_WEIGHTS = (10.0, 1.0)
+
+# 假名、CJK 统一表意文字（含扩展 A 与兼容区）、谚文
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_RUN_RE = re.compile(f"([{_CJK}]+)|([^\\W_{_CJK}]+)")
+
+# (检索词, 是否前缀匹配)
+QueryTerm = Tuple[str, bool]
+# (script_id, user_id, title, description, content)
+SearchRow = Tuple[int, int, Optional[str], Optional[str], Optional[str]]
+
+
+def normalize(text: str) -> str:
+    """全角转半角、兼容字符归一并转小写"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _iter_tokens(text: str):
+    for match in _RUN_RE.finditer(normalize(text)):
+        cjk, word = match.groups()
+        if word:
+            yield word
+            continue
+        for i in range(len(cjk) - 1):
+            yield cjk[i:i + 2]
+        yield cjk[-1]
+
+
+def index_tokens(text: Optional[str]) -> str:
+    """生成建索引用的检索词串（去重，最多 MAX_INDEX_TOKENS 个）"""
+    if not text:
+        return ""
+    return " ".join(islice(dict.fromkeys(_iter_tokens(text)), MAX_INDEX_TOKENS))
+
+
+def build_index_values(title: Optional[str], description: Optional[str], content: Optional[str]) -> Dict[str, str]:
+    """生成一行检索词表的值"""
+    return {
+        "title_tokens": index_tokens(title),
+        "body_tokens": index_tokens(" ".join(part for part in (description, content) if part)),
+    }
+
+
+def query_terms(q: str) -> List[QueryTerm]:
+    """
+    将查询切分为检索词，各检索词之间为 AND 关系
+
+    多字 CJK 片段按二元组匹配，单个汉字按前缀匹配（命中以该字开头的二元组或段尾单字）
+    """
+    terms: List[QueryTerm] = []
+    for match in _RUN_RE.finditer(normalize(q)):
+        cjk, word = match.groups()
+        if word:
+            terms.append((word, False))
+        elif len(cjk) == 1:
+            terms.append((cjk, True))
+        else:
+            terms.extend((cjk[i:i + 2], False) for i in range(len(cjk) - 1))
+    return list(dict.fromkeys(terms))
+
+
+def _needle_pattern(q: str) -> Optional["re.Pattern"]:
+    """高亮用的匹配模式：优先匹配完整的查询片段，其次是二元组"""
+    needles = {match.group(0) for match in _RUN_RE.finditer(normalize(q))}
+    needles.update(term for term, _ in query_terms(q))
+    if not needles:
+        return None
+    ordered = sorted(needles, key=len, reverse=True)
+    return re.compile("|".join(re.escape(needle) for needle in ordered), re.IGNORECASE)
+
+
+def _highlight(text: str, pattern: "re.Pattern") -> str:
+    parts = []
+    cursor = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[cursor:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        cursor = match.end()
+    parts.append(html.escape(text[cursor:]))
+    return "".join(parts)
+
+
+def build_snippet(text: Optional[str], q: str, width: int = SNIPPET_CHARS) -> str:
+    """
+    截取首个命中位置附近的文本并用 <mark> 标出命中词
+
+    返回值已做 HTML 转义，可以直接渲染；没有命中（例如只命中标题）时返回正文开头
+    """
+    if not text:
+        return ""
+    pattern = _needle_pattern(q)
+    match = pattern.search(text) if pattern is not None else None
+    start = max(0, match.start() - width // 3) if match else 0
+    end = min(len(text), start + width)
+    window = re.sub(r"\s+", " ", text[start:end]).strip()
+    snippet = _highlight(window, pattern) if pattern is not None else html.escape(window)
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+async def reindex_scripts(db: AsyncSession, rows: Iterable[SearchRow]) -> None:
+    """
+    重建指定剧本的检索词（在调用方的事务中执行，不提交）
+
+    只处理传入的剧本，写入路径在标题、简介或正文变化时调用
+    """
+    values = [
+        {"script_id": script_id, "user_id": user_id, **build_index_values(title, description, content)}
+        for script_id, user_id, title, description, content in rows
+    ]
+    if not values:
+        return
+    await db.execute(
+        delete(ScriptSearchIndex)
+        .where(ScriptSearchIndex.script_id.in_([value["script_id"] for value in values]))
+    )
+    await db.execute(insert(ScriptSearchIndex), values)
+
+
+async def remove_from_index(db: AsyncSession, script_ids: Sequence[int]) -> None:
+    """删除指定剧本的检索词（在调用方的事务中执行，不提交）"""
+    if script_ids:
+        await db.execute(
+            delete(ScriptSearchIndex).where(ScriptSearchIndex.script_id.in_(list(script_ids)))
+        )
+
+
+def _postgresql_select(user_id: int, terms: List[QueryTerm]):
+    query = " & ".join(f"'{term}'" + (":*" if prefix else "") for term, prefix in terms)
+    document = search_document()
+    tsquery = func.to_tsquery(SEARCH_CONFIG, query)
+    score = func.ts_rank(document, tsquery)
+    return (
+        select(Script.id, Script.title, Script.updated_at, score.label("score"))
+        .select_from(ScriptSearchIndex)
+        .join(Script, Script.id == ScriptSearchIndex.script_id)
+        .where(ScriptSearchIndex.user_id == user_id, document.op("@@")(tsquery))
+        .order_by(score.desc(), Script.id.desc())
+    )
+
+
+def _sqlite_select(user_id: int, terms: List[QueryTerm]):
+    query = " AND ".join(f'"{term}"' + ("*" if prefix else "") for term, prefix in terms)
+    fts = table(SQLITE_FTS_TABLE, column("rowid"))
+    fts_ref = literal_column(SQLITE_FTS_TABLE)
+    # bm25 越小越相关，取负数使得分越大越相关
+    score = -func.bm25(fts_ref, *SQLITE_COLUMN_WEIGHTS)
+    return (
+        select(Script.id, Script.title, Script.updated_at, score.label("score"))
+        .select_from(fts)
+        .join(Script, Script.id == fts.c.rowid)
+        .where(Script.user_id == user_id, fts_ref.op("MATCH")(query))
+        .order_by(score.desc(), Script.id.desc())
+    )
+
+
+async def search_scripts(
+    db: AsyncSession, *, user_id: int, q: str, skip: int = 0, limit: int = 20
+) -> List[Dict[str, Any]]:
+    """在用户的剧本中检索，返回按相关度排序的结果及高亮摘要"""
+    terms = query_terms(q)
+    if not terms:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = _postgresql_select(user_id, terms)
+    else:
+        stmt = _sqlite_select(user_id, terms)
+    rows = (await db.execute(stmt.offset(skip).limit(limit))).all()
+    if not rows:
+        return []
+
+    # 只为当前页的结果读取并解压正文
+    bodies = {
+        script_id: content or description
+        for script_id, description, content in (await db.execute(
+            select(Script.id, Script.description, Script.content)
+            .where(Script.id.in_([row.id for row in rows]))
+        )).all()
+    }
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "snippet": build_snippet(bodies.get(row.id), q),
+            "score": float(row.score or 0.0),
+            "updated_at": row.updated_at,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,120 @@
+"""
+剧本导入导出模块
+NDJSON 格式（每行一个剧本），可选 gzip 封装；导出和导入都是流式处理，
+内存占用只与单批大小有关
+"""
+
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.script import async_script as crud_script
+from app.schemas.script import ScriptCreate
+
+EXPORT_BATCH_SIZE = 200
+IMPORT_BATCH_SIZE = 500
+# 单行（单个剧本）的最大字节数，防止没有换行的请求体占满内存
+MAX_IMPORT_LINE_BYTES = 16 * 1024 * 1024
+MAX_IMPORT_ERRORS = 100
+
+
+class InvalidImportError(ValueError):
+    """导入数据无法解析（gzip 损坏或单行过长）"""
+
+
+def _gzip_compressor():
+    return zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+
+async def export_ndjson(
+    db: AsyncSession, *, user_id: int, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """按批生成用户全部剧本的 NDJSON（compress 为 True 时输出 gzip 流）"""
+    compressor = _gzip_compressor() if compress else None
+    async for rows in crud_script.stream_by_user(db, user_id=user_id, batch_size=EXPORT_BATCH_SIZE):
+        chunk = b"".join(orjson.dumps(row) + b"\n" for row in rows)
+        if compressor is not None:
+            chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def _inflate(decompressor, data: bytes) -> Iterator[bytes]:
+    """分段解压，每段不超过 MAX_IMPORT_LINE_BYTES，压缩率极高的数据不会一次性展开到内存"""
+    while data:
+        try:
+            yield decompressor.decompress(data, MAX_IMPORT_LINE_BYTES)
+        except zlib.error as e:
+            raise InvalidImportError("Invalid gzip data") from e
+        data = decompressor.unconsumed_tail
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], *, compressed: bool = False
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """将字节流切分为 (行号, 行内容)，跳过空行"""
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16) if compressed else None
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        for piece in (_inflate(decompressor, chunk) if decompressor is not None else (chunk,)):
+            buffer += piece
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_no += 1
+                if line.strip():
+                    yield line_no, line
+            if len(buffer) > MAX_IMPORT_LINE_BYTES:
+                raise InvalidImportError(f"Line {line_no + 1} is too long")
+    if decompressor is not None and not decompressor.eof:
+        raise InvalidImportError("Truncated gzip data")
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+async def import_ndjson(
+    db: AsyncSession, *, user_id: int, chunks: AsyncIterator[bytes], compressed: bool = False
+) -> Dict[str, Any]:
+    """
+    流式导入 NDJSON，每 IMPORT_BATCH_SIZE 个剧本批量插入并提交一次
+
+    每行按 ScriptCreate 校验（导出文件中的 id、version 等字段会被忽略），
+    格式错误或标题重复的行记入 errors（最多 MAX_IMPORT_ERRORS 条），不影响其他行
+    """
+    imported = 0
+    errors: List[Dict[str, Any]] = []
+    batch: List[ScriptCreate] = []
+    batch_lines: List[int] = []
+
+    def add_error(line: int, error: str) -> None:
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append({"line": line, "error": error})
+
+    async def flush() -> int:
+        results = await crud_script.apply_batch(db, user_id=user_id, creates=batch)
+        for item in results:
+            if not item["ok"]:
+                add_error(batch_lines[item["index"]], item["error"])
+        batch.clear()
+        batch_lines.clear()
+        return sum(1 for item in results if item["ok"])
+
+    async for line_no, line in iter_ndjson_lines(chunks, compressed=compressed):
+        try:
+            batch.append(ScriptCreate.model_validate_json(line))
+        except ValidationError as e:
+            add_error(line_no, e.errors()[0]["msg"] if e.errors() else "Invalid line")
+            continue
+        batch_lines.append(line_no)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            imported += await flush()
+    if batch:
+        imported += await flush()
+
+    errors.sort(key=lambda e: e["line"])
+    return {"imported": imported, "errors": errors}
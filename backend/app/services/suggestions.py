@@ -0,0 +1,271 @@
+"""
+剧本内容优化建议引擎
+正文只用一个预编译的正则切分一次，所有规则共享切分结果与子串判断结果，
+各自按偏移量拼接出建议正文；结果按 (正文哈希, 规则集版本) 缓存，重复提交同一稿件时直接返回
+"""
+
+import hashlib
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from app.core.config import settings
+
+SHOT_MARKER = "[画面描述]"
+
+# 只匹配规则关心的行（场景标题、`角色：台词` 对白），其余行在正则引擎内部跳过
+TOKEN_RE = re.compile(
+    r"^(?:(?P<scene>=== 场景[^=\n]+===)"
+    r"|(?P<dialogue>(?P<speaker>[^：\n]+)：(?P<paren>（)?(?P<speech>[^\n]*)))",
+    re.MULTILINE,
+)
+
+
+@dataclass
+class SuggestionContext:
+    """生成建议时用到的剧本信息"""
+    title: str = "剧本"
+    genre: str = "剧情"
+    duration: int = 5
+
+
+class Document:
+    """
+    一次建议计算中所有规则共享的正文视图
+
+    tokens 在首次访问时通过一次 finditer 生成并按类型分组；
+    contains 缓存子串判断结果，多个规则检查同一标记时只扫描一次
+    """
+
+    def __init__(self, content: str, context: SuggestionContext):
+        self.content = content
+        self.context = context
+        self._tokens: Optional[Dict[str, List["re.Match"]]] = None
+        self._contains: Dict[str, bool] = {}
+
+    @property
+    def tokens(self) -> Dict[str, List["re.Match"]]:
+        if self._tokens is None:
+            grouped: Dict[str, List["re.Match"]] = {"scene": [], "dialogue": []}
+            for match in TOKEN_RE.finditer(self.content):
+                grouped[match.lastgroup].append(match)
+            self._tokens = grouped
+        return self._tokens
+
+    def contains(self, marker: str) -> bool:
+        found = self._contains.get(marker)
+        if found is None:
+            found = self._contains[marker] = marker in self.content
+        return found
+
+    def render(self, edits: List[tuple]) -> str:
+        """按 (起始偏移, 结束偏移, 替换文本) 列表（已按偏移排序）重新拼接正文"""
+        content = self.content
+        parts = []
+        last = 0
+        for start, end, text in edits:
+            parts.append(content[last:start])
+            parts.append(text)
+            last = end
+        parts.append(content[last:])
+        return "".join(parts)
+
+
+class SuggestionRule(ABC):
+    """
+    建议规则基类
+
+    applies 判断是否需要给出建议，suggest 生成建议正文；
+    两者都应通过 Document 读取 tokens / contains，不要再单独扫描正文
+    """
+    type: str = ""
+    title: str = ""
+    description: str = ""
+    version: int = 1
+
+    @abstractmethod
+    def applies(self, document: Document) -> bool:
+        ...
+
+    @abstractmethod
+    def suggest(self, document: Document) -> str:
+        ...
+
+
+_registry: List[SuggestionRule] = []
+
+
+def register_rule(rule: Type[SuggestionRule]) -> Type[SuggestionRule]:
+    """注册规则（按注册顺序输出建议）"""
+    _registry.append(rule())
+    return rule
+
+
+@register_rule
+class StructureRule(SuggestionRule):
+    """没有场景标题时，建议按四幕结构组织"""
+    type = "structure"
+    title = "剧本结构优化"
+    description = "建议按照标准剧本结构组织内容"
+
+    def applies(self, document: Document) -> bool:
+        return not document.contains("=== 场景")
+
+    def suggest(self, document: Document) -> str:
+        ctx = document.context
+        return "".join((
+            f"{ctx.title}\n\n类型：{ctx.genre}\n目标时长：{ctx.duration}分钟\n\n",
+            "=== 场景1：开头 ===\n\n[画面描述]\n", document.content,
+            "\n\n=== 场景2：发展 ===\n\n[画面描述]\n...",
+            "\n\n=== 场景3：高潮 ===\n\n[画面描述]\n...",
+            "\n\n=== 场景4：结局 ===\n\n[画面描述]\n...",
+            "\n\n=== 完 ===",
+        ))
+
+
+@register_rule
+class DialogueRule(SuggestionRule):
+    """没有 `角色：（台词）` 格式的对白时，建议把 `角色：台词` 改为标准格式"""
+    type = "dialogue"
+    title = "对话格式优化"
+    description = "建议使用标准对话格式"
+    version = 2  # 修复替换文本中的 $1/$2 未被替换的问题
+
+    def applies(self, document: Document) -> bool:
+        return not document.contains("：（")
+
+    def suggest(self, document: Document) -> str:
+        # 没有 `：（` 时对白行不会带括号，台词为空的行保持原样
+        return document.render([
+            (match.start("speech"), match.end("speech"), f"（{match.group('speech')}）")
+            for match in document.tokens["dialogue"]
+            if match.group("speech")
+        ])
+
+
+@register_rule
+class ShotDescriptionRule(SuggestionRule):
+    """没有画面描述时，建议在每个场景标题后补充"""
+    type = "description"
+    title = "画面描述增强"
+    description = "建议添加详细的画面描述"
+    version = 2  # 修复替换文本中的 $& 未被替换的问题
+
+    INSERT = "\n\n[画面描述]\n镜头推进，展示场景细节..."
+
+    def applies(self, document: Document) -> bool:
+        return not document.contains(SHOT_MARKER)
+
+    def suggest(self, document: Document) -> str:
+        return document.render([
+            (match.end(), match.end(), self.INSERT) for match in document.tokens["scene"]
+        ])
+
+
+@register_rule
+class CharacterRule(SuggestionRule):
+    """主角、配角没有同时出现时，建议明确角色设定"""
+    type = "character"
+    title = "角色设定完善"
+    description = "建议明确角色设定和关系"
+
+    OPENING = "=== 场景1：开头 ==="
+    SETTINGS = "\n\n[角色设定]\n主角：主要人物，性格特点...\n配角：重要配角，与主角的关系..."
+
+    def applies(self, document: Document) -> bool:
+        return not (document.contains("主角") and document.contains("配角"))
+
+    def suggest(self, document: Document) -> str:
+        content = document.content
+        if document.contains("角色A"):
+            content = content.replace("角色A", "主角")
+        if document.contains("角色B"):
+            content = content.replace("角色B", "配角")
+        if document.contains(self.OPENING):
+            content = content.replace(self.OPENING, self.OPENING + self.SETTINGS)
+        return content
+
+
+class SuggestionEngine:
+    """
+    建议引擎
+
+    结果缓存以正文字符数计量（建议正文通常与原文同量级），超过 max_chars 时按 LRU 淘汰
+    """
+
+    def __init__(self, rules: Sequence[SuggestionRule], max_chars: int):
+        self.rules = list(rules)
+        self.max_chars = max_chars
+        self.version = hashlib.sha1(
+            ",".join(f"{rule.type}:{rule.version}" for rule in self.rules).encode("utf-8")
+        ).hexdigest()[:12]
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, content: str, context: SuggestionContext) -> tuple:
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return digest, context.title, context.genre, context.duration, self.version
+
+    def suggest(self, content: str, context: Optional[SuggestionContext] = None) -> List[Dict[str, Any]]:
+        """生成建议（命中缓存时直接返回）"""
+        context = context or SuggestionContext()
+        key = self._key(content, context)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        suggestions = self._run(content, context)
+        size = sum(len(item["suggestion"]) for item in suggestions)
+        if size <= self.max_chars:
+            with self._lock:
+                if key not in self._cache:
+                    self._cache[key] = (size, suggestions)
+                    self._cache_chars += size
+                while self._cache_chars > self.max_chars:
+                    _, (evicted, _) = self._cache.popitem(last=False)
+                    self._cache_chars -= evicted
+        return suggestions
+
+    def _run(self, content: str, context: SuggestionContext) -> List[Dict[str, Any]]:
+        document = Document(content, context)
+        return [
+            {
+                "type": rule.type,
+                "title": rule.title,
+                "description": rule.description,
+                "suggestion": rule.suggest(document),
+            }
+            for rule in self.rules
+            if rule.applies(document)
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cache_chars = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "rule_set_version": self.version,
+            "rules": [rule.type for rule in self.rules],
+            "entries": len(self._cache),
+            "cached_chars": self._cache_chars,
+            "max_chars": self.max_chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+suggestion_engine = SuggestionEngine(_registry, max_chars=settings.SUGGESTION_CACHE_MAX_CHARS)
@@ -0,0 +1,208 @@
+"""
+后台任务 worker
+每个 worker 进程运行一个事件循环，同时执行最多 JOB_WORKER_CONCURRENCY 个任务（生成类任务以等待上游为主）；
+定时发送心跳、响应取消请求，并回收心跳超时（worker 已崩溃）的任务
+
+用法（在 backend 目录下）:
+    python -m app.worker                      # JOB_WORKER_PROCESSES 个进程
+    python -m app.worker --processes 4 --concurrency 16
+
+未单独部署 worker 时，JOB_WORKER_IN_PROCESS=true 会在每个 API 进程中启动一个 worker
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.redis_service import redis_service
+from app.db.base import AsyncSessionLocal
+from app.services.job_queue import (
+    FAILED,
+    ClaimedJob,
+    JobQueue,
+    PermanentJobError,
+    get_handler,
+    job_queue,
+    run_failure_hook,
+)
+
+# 导入以注册任务处理函数
+import app.services.script_generation  # noqa: F401
+
+
+class Worker:
+    """单进程内的任务执行器"""
+
+    def __init__(self, queue: JobQueue, *, concurrency: int, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._running: Dict[int, asyncio.Task] = {}
+        self._cancel_requested: set = set()
+
+    async def run_once(self) -> int:
+        """依次执行所有当前到期的任务，返回执行的任务数（用于测试和一次性脚本）"""
+        count = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                job = await self.queue.claim(db, self.worker_id)
+            if job is None:
+                return count
+            await self._execute(job)
+            count += 1
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """持续认领并执行任务，直到 stop 被设置；退出时把未完成的任务放回队列"""
+        maintenance = asyncio.create_task(self._maintenance(stop))
+        try:
+            while not stop.is_set():
+                if len(self._running) < self.concurrency:
+                    try:
+                        async with AsyncSessionLocal() as db:
+                            job = await self.queue.claim(db, self.worker_id)
+                    except Exception as e:
+                        print(f"Warning: failed to claim job: {e}")
+                        job = None
+                    if job is not None:
+                        task = asyncio.create_task(self._execute(job))
+                        self._running[job.id] = task
+                        task.add_done_callback(lambda _, job_id=job.id: self._running.pop(job_id, None))
+                        continue
+                    await self._wait(stop, self.queue.broker.wait(settings.JOB_POLL_SECONDS))
+                else:
+                    await self._wait(stop, asyncio.wait(list(self._running.values()),
+                                                        return_when=asyncio.FIRST_COMPLETED))
+            await self._drain()
+        finally:
+            maintenance.cancel()
+            await asyncio.gather(maintenance, return_exceptions=True)
+
+    @staticmethod
+    async def _wait(stop: asyncio.Event, awaitable) -> None:
+        waiter = asyncio.ensure_future(awaitable)
+        stopper = asyncio.ensure_future(stop.wait())
+        await asyncio.wait({waiter, stopper}, timeout=settings.JOB_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+        for future in (waiter, stopper):
+            future.cancel()
+
+    async def _drain(self) -> None:
+        """等待执行中的任务结束（最多 JOB_SHUTDOWN_GRACE_SECONDS 秒），之后中断并放回队列"""
+        if not self._running:
+            return
+        _, pending = await asyncio.wait(list(self._running.values()), timeout=settings.JOB_SHUTDOWN_GRACE_SECONDS)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    async def _maintenance(self, stop: asyncio.Event) -> None:
+        """心跳、取消检查与回收超时任务"""
+        while not stop.is_set():
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    for job_id in await self.queue.heartbeat(db, list(self._running), self.worker_id):
+                        task = self._running.get(job_id)
+                        if task is not None and job_id not in self._cancel_requested:
+                            self._cancel_requested.add(job_id)
+                            task.cancel()
+                    await self.queue.requeue_stale(db)
+            except Exception as e:
+                print(f"Warning: job maintenance failed: {e}")
+
+    async def _execute(self, job: ClaimedJob) -> None:
+        handler = get_handler(job.type)
+        context = job.context()
+        try:
+            if handler is None:
+                raise PermanentJobError(f"No handler registered for job type {job.type!r}")
+            result = await handler.run(context, dict(job.payload or {}))
+        except asyncio.CancelledError:
+            async with AsyncSessionLocal() as db:
+                if job.id in self._cancel_requested:
+                    await self.queue.mark_cancelled(db, job, self.worker_id)
+                    await run_failure_hook(context, job.payload, "cancelled")
+                else:
+                    await self.queue.release(db, job, self.worker_id)
+            self._cancel_requested.discard(job.id)
+            return
+        except Exception as e:
+            permanent = isinstance(e, PermanentJobError)
+            error = str(e) if permanent else f"{type(e).__name__}: {e}"
+            if not permanent:
+                traceback.print_exc()
+            async with AsyncSessionLocal() as db:
+                status = await self.queue.fail(db, job, self.worker_id, error, retry=not permanent)
+            if status == FAILED:
+                await run_failure_hook(context, job.payload, error)
+            return
+        async with AsyncSessionLocal() as db:
+            await self.queue.complete(db, job, self.worker_id, result)
+
+
+def _process_main(concurrency: int) -> None:
+    async def main() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await asyncio.to_thread(redis_service.connect)
+        worker = Worker(job_queue, concurrency=concurrency)
+        print(f"worker {worker.worker_id} started (concurrency={concurrency})")
+        await worker.run(stop)
+
+    asyncio.run(main())
+
+
+def run_pool(processes: int, concurrency: int) -> None:
+    """启动 worker 进程池；异常退出的进程会被重新拉起，收到 SIGTERM/SIGINT 时等待各进程处理完当前任务后退出"""
+    if processes <= 1:
+        _process_main(concurrency)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    stopping = False
+
+    def stop(*_) -> None:
+        nonlocal stopping
+        stopping = True
+        for process in children:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    children = []
+    for _ in range(processes):
+        process = context.Process(target=_process_main, args=(concurrency,), daemon=False)
+        process.start()
+        children.append(process)
+
+    while not stopping:
+        for i, process in enumerate(children):
+            if not process.is_alive() and not stopping:
+                print(f"worker process {process.pid} exited with {process.exitcode}, restarting")
+                children[i] = context.Process(target=_process_main, args=(concurrency,), daemon=False)
+                children[i].start()
+        time.sleep(1)
+    for process in children:
+        process.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=settings.JOB_WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    run_pool(args.processes, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+AI 网关离线吞吐基准测试
+
+在独立进程中启动模拟 AI 服务（uvicorn，真实 TCP 连接），比较：
+每个请求新建 httpx 客户端（无连接复用、无并发限制）、网关连接池、
+网关连接池 + 一半请求是重复提示词（请求合并）时的吞吐量、p50 / p99 延迟与上游实际收到的请求数；
+最后测量流式调用的首 token 延迟
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_ai_gateway [--requests 1000] [--concurrency 200] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import aclosing
+
+import httpx
+
+from app.services.ai_gateway import MOCK_MODELS, AIGateway, MockProvider
+
+
+def start_server(latency: float) -> tuple:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen([
+        sys.executable, "-m", "app.services.ai_mock", "--port", str(port),
+        "--first-token-delay", str(latency), "--token-interval", "0.002",
+    ])
+    base_url = f"http://127.0.0.1:{port}/v1"
+    for _ in range(200):
+        try:
+            httpx.get(f"{base_url}/mock/stats")
+            break
+        except httpx.TransportError:
+            time.sleep(0.05)
+    return process, base_url
+
+
+async def upstream_requests(base_url: str) -> int:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{base_url}/mock/stats")).json()["requests"]
+
+
+def messages(i: int, duplicates: bool):
+    return [{"role": "user", "content": f"提示词 {i % 50 if duplicates and i % 2 else i}"}]
+
+
+async def run(label: str, call, total: int, concurrency: int, base_url: str) -> None:
+    before = await upstream_requests(base_url)
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with limit:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<22s} {total / elapsed:9.1f} {p50:9.1f} {p99:9.1f} {await upstream_requests(base_url) - before:9d}")
+
+
+async def main_async(args) -> None:
+    process, base_url = start_server(args.latency)
+    try:
+        await measure(args, base_url)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def measure(args, base_url: str) -> None:
+    gateway = AIGateway([MockProvider(
+        api_key="bench", base_url=base_url, models=MOCK_MODELS,
+        max_concurrency=args.provider_concurrency, max_connections=args.provider_concurrency, timeout=60,
+    )])
+
+    async def unpooled(i: int) -> None:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            response = await client.post("/chat/completions", json={"model": "mock-chat", "messages": messages(i, False)})
+            response.raise_for_status()
+
+    print(f"{'mode':<22s} {'req/s':>9s} {'p50(ms)':>9s} {'p99(ms)':>9s} {'upstream':>9s}")
+    await run("per-request client", unpooled, args.requests, args.concurrency, base_url)
+    await run("gateway pool", lambda i: gateway.complete(messages(i, False)), args.requests, args.concurrency, base_url)
+    await run("gateway pool + dedupe", lambda i: gateway.complete(messages(i, True)), args.requests, args.concurrency, base_url)
+
+    ttfb = []
+    for i in range(20):
+        started = time.perf_counter()
+        async with aclosing(gateway.stream(messages(i, False))) as pieces:
+            async for _ in pieces:
+                ttfb.append(time.perf_counter() - started)
+                break
+    print(f"stream first token p50: {statistics.median(ttfb) * 1000:.1f} ms")
+    print(gateway.stats()["providers"]["mock"])
+    await gateway.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--provider-concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+登录洪泛下的剧本接口延迟
+
+在独立进程中启动完整应用（uvicorn，SQLite，真实 bcrypt 强度），先测量无干扰时已登录用户
+GET /scripts/ 的延迟，再在固定速率的撞库（已存在账号 + 错误密码）洪泛下分别测量关闭 / 开启限流时的延迟，
+同时统计测量期间洪泛请求的状态码分布
+
+压测客户端与服务端共用 CPU，洪泛速率过高时测到的主要是客户端自身的开销
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_auth_flood [--duration 10] [--warmup 30] [--flood-rate 30] [--bcrypt-rounds 12]
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PASSWORD = "Bench123456!"
+
+
+def start_server(rate_limit: bool, bcrypt_rounds: int, workdir: str) -> tuple:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, f'bench-{port}.db')}",
+        BCRYPT_ROUNDS=str(bcrypt_rounds),
+        RATE_LIMIT_ENABLED=str(rate_limit).lower(),
+        JOB_WORKER_IN_PROCESS="false",
+    )
+    env.pop("REDIS_URL", None)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}/api/v1"
+    for _ in range(400):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health")
+            break
+        except httpx.TransportError:
+            time.sleep(0.05)
+    return process, base_url
+
+
+async def measure_scripts(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event) -> list:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/scripts/", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.02)
+    return latencies
+
+
+async def flood(client: httpx.AsyncClient, victims: list, rate: float, concurrency: int, stop: asyncio.Event,
+                statuses: collections.Counter) -> None:
+    """
+    开环洪泛：按固定速率对已存在的账号尝试错误密码（每次都要校验 bcrypt），
+    在途请求数达到上限时跳过，攻击方的发送速率不受服务端快慢影响
+    """
+    in_flight = set()
+
+    async def one(i: int) -> None:
+        try:
+            response = await client.post("/auth/login", data={
+                "username": victims[i % len(victims)], "password": f"wrong-password-{i}",
+            })
+            statuses[response.status_code] += 1
+        except httpx.TransportError:
+            statuses["error"] += 1
+
+    i = 0
+    started = time.perf_counter()
+    while not stop.is_set():
+        i += 1
+        if len(in_flight) < concurrency:
+            task = asyncio.create_task(one(i))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        else:
+            statuses["skipped"] += 1
+        await asyncio.sleep(max(0.0, started + i / rate - time.perf_counter()))
+    await asyncio.gather(*in_flight)
+
+
+def summary(label: str, latencies: list, statuses: collections.Counter) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    flood_total = sum(statuses.values())
+    detail = " ".join(f"{code}:{count}" for code, count in sorted(statuses.items(), key=str))
+    print(f"{label:<24s} {len(latencies):7d} {p50:9.1f} {p95:9.1f} {p99:9.1f} {flood_total:8d}  {detail}")
+
+
+async def scenario(base_url: str, args, flood_concurrency: int, label: str) -> None:
+    limits = httpx.Limits(max_connections=flood_concurrency + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        email = f"writer-{time.monotonic_ns()}@bench.io"
+        response = await client.post("/auth/register", json={
+            "email": email, "username": email.split("@")[0], "password": PASSWORD,
+        })
+        response.raise_for_status()
+        token = (await client.post("/auth/login", data={"username": email, "password": PASSWORD})).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        for i in range(20):
+            await client.post("/scripts/", json={"title": f"剧本{i}", "content": "雨夜。" * 200}, headers=headers)
+        victims = []
+        for i in range(args.victims):
+            victim = f"victim{i}-{time.monotonic_ns()}@bench.io"
+            await client.post("/auth/register", json={
+                "email": victim, "username": victim.split("@")[0], "password": PASSWORD,
+            })
+            victims.append(victim)
+
+        stop = asyncio.Event()
+        statuses: collections.Counter = collections.Counter()
+        flooder = asyncio.create_task(flood(client, victims, args.flood_rate, flood_concurrency, stop, statuses)) \
+            if flood_concurrency else None
+        if flooder is not None:
+            # 先让令牌桶的初始突发额度耗尽，测量的是洪泛持续时的稳态
+            await asyncio.sleep(args.warmup)
+            statuses.clear()
+        measurer = asyncio.create_task(measure_scripts(client, headers, stop))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        latencies = await measurer
+        if flooder is not None:
+            await flooder
+        summary(label, latencies, statuses)
+
+
+async def main_async(args) -> None:
+    print(f"{'scenario':<24s} {'requests':>7s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'logins':>8s}  statuses")
+    with tempfile.TemporaryDirectory(prefix="afm-bench-") as workdir:
+        for rate_limit in (False, True):
+            process, base_url = start_server(rate_limit, args.bcrypt_rounds, workdir)
+            try:
+                name = "rate limit" if rate_limit else "no limit"
+                if not rate_limit:
+                    await scenario(base_url, args, 0, "no flood")
+                await scenario(base_url, args, args.flood_concurrency, f"flood, {name}")
+            finally:
+                process.terminate()
+                process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=30.0, help="洪泛开始后多久开始测量（秒）")
+    parser.add_argument("--flood-rate", type=float, default=30.0, help="洪泛登录请求数/秒")
+    parser.add_argument("--flood-concurrency", type=int, default=64, help="洪泛的最大在途请求数")
+    parser.add_argument("--victims", type=int, default=5, help="被尝试密码的账号数")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+CompressedText 存储节省与编解码开销
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_compressed_text
+"""
+
+import random
+import timeit
+
+from app.core.config import settings
+from app.db.types import decode_text, encode_text
+
+LINES = [
+    "=== 场景{n}：{place} ===",
+    "[画面描述]",
+    "{place}，{time}，镜头缓缓推进，光线从窗外斜照进来。",
+    "{name}：（{line}）",
+    "{name}沉默片刻，转身望向远处。",
+]
+PLACES = ["城市天台", "老街茶馆", "医院走廊", "海边公路", "地下停车场"]
+TIMES = ["清晨", "黄昏", "深夜", "雨夜"]
+NAMES = ["林晓", "陈默", "苏然", "周野"]
+DIALOGUE = ["你终于来了", "我们之间还有什么好说的", "这件事你早就知道了对不对", "别回头，一直往前走"]
+
+
+def screenplay(kb: int) -> str:
+    rng = random.Random(kb)
+    parts, n = [], 1
+    while len("".join(parts).encode("utf-8")) < kb * 1024:
+        for template in LINES:
+            parts.append(template.format(
+                n=n, place=rng.choice(PLACES), time=rng.choice(TIMES),
+                name=rng.choice(NAMES), line=rng.choice(DIALOGUE),
+            ) + "\n")
+        n += 1
+    return "".join(parts)
+
+
+def main() -> None:
+    threshold, level = settings.SCRIPT_COMPRESSION_THRESHOLD, settings.SCRIPT_COMPRESSION_LEVEL
+    print(f"threshold={threshold}B level={level}")
+    print(f"{'size':>8s} {'stored':>8s} {'saved':>7s} {'encode':>12s} {'decode':>12s}")
+    for kb in (1, 4, 16, 64, 256):
+        text = screenplay(kb)
+        raw_size = len(text.encode("utf-8"))
+        data = encode_text(text, threshold, level)
+        number = max(1, 2000 // kb)
+        enc = min(timeit.repeat(lambda: encode_text(text, threshold, level), number=number, repeat=3)) / number
+        dec = min(timeit.repeat(lambda: decode_text(data), number=number, repeat=3)) / number
+        per_kb = raw_size / 1024
+        print(
+            f"{raw_size:8d} {len(data):8d} {(1 - len(data) / raw_size) * 100:6.1f}% "
+            f"{enc / per_kb * 1e6:8.2f}us/KB {dec / per_kb * 1e6:8.2f}us/KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+剧本详情响应的序列化与压缩开销
+
+对 200 KB 剧本的详情响应比较：标准库 json / orjson 序列化，
+以及 orjson + gzip / brotli 压缩后的 p50、p99 延迟与实际传输字节数。
+请求通过 ASGI 直接进入应用，不经过网络与数据库，只衡量序列化和压缩本身
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_response_encoding [--kb 200] [--requests 300]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.core.compression import CompressionMiddleware, brotli
+from app.schemas.script import ScriptResponse
+from benchmarks.bench_compressed_text import screenplay
+
+
+def build_app(response_class, compress: bool) -> FastAPI:
+    app = FastAPI(default_response_class=response_class)
+    if compress:
+        app.add_middleware(CompressionMiddleware)
+    return app
+
+
+def make_payload(kb: int) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "id": 1, "user_id": 1, "version": 3, "title": "基准剧本",
+        "description": "用于响应编码基准测试", "content": screenplay(kb),
+        "genre": "悬疑", "target_audience": "青年", "duration": 5, "status": "draft",
+        "created_at": now, "updated_at": now,
+    }
+
+
+async def run_case(name: str, app: FastAPI, accept_encoding: str, requests: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"Accept-Encoding": accept_encoding}
+        for _ in range(10):
+            await client.get("/script", headers=headers)
+        latencies, wire_bytes = [], 0
+        for _ in range(requests):
+            started = time.perf_counter()
+            resp = await client.get("/script", headers=headers)
+            await resp.aread()
+            latencies.append(time.perf_counter() - started)
+            wire_bytes = resp.num_bytes_downloaded
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{name:<16s} {p50:9.2f} {p99:9.2f} {wire_bytes:11d}")
+
+
+async def main(kb: int, requests: int) -> None:
+    payload = make_payload(kb)
+    cases = [
+        ("json", JSONResponse, False, "identity"),
+        ("orjson", ORJSONResponse, False, "identity"),
+        ("orjson+gzip", ORJSONResponse, True, "gzip"),
+    ]
+    if brotli is not None:
+        cases.append(("orjson+br", ORJSONResponse, True, "br"))
+    else:
+        print("brotli 未安装，跳过 br 用例")
+
+    print(f"content={len(payload['content'].encode('utf-8'))}B requests={requests}")
+    print(f"{'case':<16s} {'p50(ms)':>9s} {'p99(ms)':>9s} {'wire bytes':>11s}")
+    for name, response_class, compress, accept_encoding in cases:
+        app = build_app(response_class, compress)
+
+        @app.get("/script", response_model=ScriptResponse)
+        async def get_script():
+            return payload
+
+        await run_case(name, app, accept_encoding, requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kb", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.kb, args.requests))
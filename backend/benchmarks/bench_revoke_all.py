@@ -0,0 +1,84 @@
+"""
+revoke_all_user_tokens 基准：KEYS 扫描 vs 用户会话索引
+
+向本地 Redis 写入 BENCH_KEYS（默认 100 万）个其他用户的 refresh token，
+再分别用旧的 KEYS 模式匹配和新的会话索引撤销目标用户的 5 个会话。
+会清空 BENCH_REDIS_URL 指向的数据库，请使用独立的 db 编号。
+
+用法（在 backend 目录下）:
+    BENCH_REDIS_URL=redis://localhost:6379/15 python -m benchmarks.bench_revoke_all
+"""
+
+import os
+import time
+
+import redis
+
+from app.core.redis_service import (
+    REVOKE_ALL_USER_TOKENS_LUA,
+    STORE_REFRESH_TOKEN_LUA,
+    _revoke_all_params,
+    _session_index_key,
+    _session_meta,
+    _token_hash,
+    _token_key,
+)
+
+REDIS_URL = os.environ.get("BENCH_REDIS_URL", "redis://localhost:6379/15")
+KEYS = int(os.environ.get("BENCH_KEYS", "1000000"))
+TARGET_USER = 0
+TTL = 7 * 24 * 3600
+
+
+def fill(client: redis.Redis) -> None:
+    client.flushdb()
+    store = client.register_script(STORE_REFRESH_TOKEN_LUA)
+    pipe = client.pipeline(transaction=False)
+    for i in range(KEYS):
+        user_id = 1 + i // 3
+        token = f"token-{i}"
+        store(
+            keys=[_token_key(user_id, token), _session_index_key(user_id)],
+            args=[TTL, _token_hash(token), _session_meta(TTL), int(time.time())],
+            client=pipe,
+        )
+        if i % 10000 == 0:
+            pipe.execute()
+    pipe.execute()
+
+
+def add_target_sessions(client: redis.Redis) -> None:
+    store = client.register_script(STORE_REFRESH_TOKEN_LUA)
+    for n in range(5):
+        token = f"target-{n}"
+        store(
+            keys=[_token_key(TARGET_USER, token), _session_index_key(TARGET_USER)],
+            args=[TTL, _token_hash(token), _session_meta(TTL), int(time.time())],
+        )
+
+
+def main() -> None:
+    client = redis.from_url(REDIS_URL, decode_responses=True)
+    print(f"filling {KEYS} keys into {REDIS_URL} ...")
+    fill(client)
+
+    add_target_sessions(client)
+    start = time.perf_counter()
+    keys = client.keys(f"refresh_token:{TARGET_USER}:*")
+    client.delete(*keys)
+    keys_ms = (time.perf_counter() - start) * 1000
+
+    add_target_sessions(client)
+    revoke_all = client.register_script(REVOKE_ALL_USER_TOKENS_LUA)
+    start = time.perf_counter()
+    keys, args = _revoke_all_params(TARGET_USER, client.hkeys(_session_index_key(TARGET_USER)))
+    revoke_all(keys=keys, args=args)
+    index_ms = (time.perf_counter() - start) * 1000
+
+    print(f"KEYS scan   {keys_ms:10.2f} ms (blocks Redis for every client)")
+    print(f"index (Lua) {index_ms:10.2f} ms")
+    client.flushdb()
+
+
+if __name__ == "__main__":
+    main()
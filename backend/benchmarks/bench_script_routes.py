@@ -0,0 +1,121 @@
+"""
+剧本列表/详情接口吞吐量基准测试
+
+对比两种实现：
+- before: 同步 def 路由 + 同步 Session（占用 Starlette 线程池）
+- after:  async def 路由 + AsyncSession（app.main 中的实际路由）
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_script_routes
+    BENCH_DATABASE_URL=postgresql://... BENCH_CONCURRENCY=200 python -m benchmarks.bench_script_routes
+
+默认使用临时 SQLite 数据库；SQLite 写锁和 aiosqlite 的线程桥接会掩盖差异，
+要得到有意义的数字请指向真实的 PostgreSQL。
+注意：并发数超过线程池（40）与连接池（5+10）时，同步版本会因为依赖清理也要占用
+线程而卡死直到连接超时，这正是本次改造要消除的问题，因此默认并发取 32。
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+_db_url = os.environ.get("BENCH_DATABASE_URL")
+if not _db_url:
+    _db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='afm-bench-'), 'bench.db')}"
+os.environ["DATABASE_URL"] = _db_url
+
+import httpx  # noqa: E402
+from fastapi import APIRouter, Depends, FastAPI, HTTPException  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.api.deps import get_db, oauth2_scheme  # noqa: E402
+from app.core.security import create_access_token, decode_token  # noqa: E402
+from app.crud.user import user as crud_user  # noqa: E402
+from app.db.base import Base, SessionLocal, engine  # noqa: E402
+from app.main import app as async_app  # noqa: E402
+from app.models.script import Script  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.script import ScriptResponse  # noqa: E402
+
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "32"))
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "2000"))
+SCRIPTS = int(os.environ.get("BENCH_SCRIPTS", "50"))
+
+
+def _legacy_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+    payload = decode_token(token)
+    user = crud_user.get(db, id=int(payload["sub"])) if payload else None
+    if user is None:
+        raise HTTPException(status_code=401)
+    return user
+
+
+def build_sync_app() -> FastAPI:
+    """重建改造前的同步路由"""
+    router = APIRouter()
+
+    @router.get("/", response_model=list[ScriptResponse])
+    def list_scripts(db: Session = Depends(get_db), current_user: User = Depends(_legacy_current_user)):
+        return (
+            db.query(Script)
+            .filter(Script.user_id == current_user.id)
+            .order_by(Script.updated_at.desc(), Script.id.desc())
+            .limit(100)
+            .all()
+        )
+
+    @router.get("/{script_id}", response_model=ScriptResponse)
+    def get_script(script_id: int, db: Session = Depends(get_db), current_user: User = Depends(_legacy_current_user)):
+        return db.get(Script, script_id)
+
+    sync_app = FastAPI()
+    sync_app.include_router(router, prefix="/api/v1/scripts")
+    return sync_app
+
+
+def seed() -> tuple:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email="bench@afm.io", username="bench", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add_all(
+            Script(title=f"剧本{i}", content="=== 场景1 ===\n" * 50, user_id=user.id)
+            for i in range(SCRIPTS)
+        )
+        db.commit()
+        first_id = db.query(Script.id).filter(Script.user_id == user.id).first()[0]
+        return user.id, first_id
+    finally:
+        db.close()
+
+
+async def run(target: FastAPI, path: str, headers: dict) -> float:
+    transport = httpx.ASGITransport(app=target)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                resp = await client.get(path, headers=headers)
+                assert resp.status_code == 200, resp.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(REQUESTS)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    user_id, script_id = seed()
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    sync_app = build_sync_app()
+    print(f"database={engine.url.get_backend_name()} concurrency={CONCURRENCY} requests={REQUESTS}")
+    for label, path in (("list", "/api/v1/scripts/"), ("get", f"/api/v1/scripts/{script_id}")):
+        before = await run(sync_app, path, headers)
+        after = await run(async_app, path, headers)
+        print(f"{label:5s} before={before:8.1f} req/s  after={after:8.1f} req/s  x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
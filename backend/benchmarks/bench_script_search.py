@@ -0,0 +1,115 @@
+"""
+剧本全文检索延迟基准测试
+
+生成大量合成剧本（默认 10 万个，全部属于同一用户，即最坏情况），
+建立检索词后对几类查询（高频二元组、低频词、单字前缀、多词组合、无结果）
+测量 search_scripts 的 p50 / p99 延迟（含读取当前页正文并生成摘要）
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_script_search
+    BENCH_DATABASE_URL=postgresql://... BENCH_SCRIPTS=100000 python -m benchmarks.bench_script_search
+
+默认使用临时 SQLite 数据库（FTS5）；指向 PostgreSQL 时使用 tsvector + GIN 索引
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+_db_url = os.environ.get("BENCH_DATABASE_URL")
+if not _db_url:
+    _db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='afm-bench-'), 'bench.db')}"
+os.environ["DATABASE_URL"] = _db_url
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.db.base import AsyncSessionLocal, Base, SessionLocal, engine  # noqa: E402
+from app.models.script import Script  # noqa: E402
+from app.models.script_search import ScriptSearchIndex  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.script_search import build_index_values, search_scripts  # noqa: E402
+from benchmarks.bench_compressed_text import DIALOGUE, NAMES, PLACES, TIMES  # noqa: E402
+
+SCRIPTS = int(os.environ.get("BENCH_SCRIPTS", "100000"))
+REPEAT = int(os.environ.get("BENCH_REPEAT", "50"))
+BATCH = 1000
+
+QUERIES = [
+    ("高频二元组", "终于来了"),
+    ("低频词", "skyline"),
+    ("单字前缀", "雨"),
+    ("多词组合", "林晓 天台 深夜"),
+    ("无结果", "不存在的台词"),
+]
+
+
+def synthetic_script(rng: random.Random, i: int) -> dict:
+    lines = []
+    for n in range(1, rng.randint(3, 8)):
+        place, name = rng.choice(PLACES), rng.choice(NAMES)
+        lines.append(f"=== 场景{n}：{place} ===")
+        lines.append(f"[画面描述] {place}，{rng.choice(TIMES)}。")
+        lines.append(f"{name}：（{rng.choice(DIALOGUE)}）")
+    if i % 1000 == 0:
+        lines.append("远处的 Skyline 在雾中若隐若现。")
+    return {"title": f"剧本{i}", "content": "\n".join(lines)}
+
+
+def seed() -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email="bench@afm.io", username="bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+
+    rng = random.Random(42)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, SCRIPTS, BATCH):
+            rows = [synthetic_script(rng, i) for i in range(offset, min(offset + BATCH, SCRIPTS))]
+            ids = conn.execute(
+                insert(Script).returning(Script.id, sort_by_parameter_order=True),
+                [{**row, "user_id": user_id} for row in rows],
+            ).scalars().all()
+            conn.execute(insert(ScriptSearchIndex), [
+                {"script_id": script_id, "user_id": user_id, **build_index_values(row["title"], None, row["content"])}
+                for script_id, row in zip(ids, rows)
+            ])
+    print(f"seeded {SCRIPTS} scripts in {time.perf_counter() - started:.1f}s ({engine.dialect.name})")
+    return user_id
+
+
+async def measure(user_id: int) -> None:
+    print(f"{'query':<12s} {'hits':>5s} {'p50(ms)':>9s} {'p99(ms)':>9s}")
+    async with AsyncSessionLocal() as db:
+        for label, q in QUERIES:
+            await search_scripts(db, user_id=user_id, q=q)
+            latencies = []
+            hits = 0
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                hits = len(await search_scripts(db, user_id=user_id, q=q, limit=20))
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            p50 = statistics.median(latencies) * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            print(f"{label:<12s} {hits:5d} {p50:9.2f} {p99:9.2f}")
+
+
+def main() -> None:
+    user_id = seed()
+    try:
+        asyncio.run(measure(user_id))
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+启动时迁移的耗时：每个进程直接执行 alembic upgrade head 与迁移协调 (run_startup_migrations) 的对比
+
+每次测量都在新进程中进行（导入 app.main 之后计时，与 lifespan 中的位置一致）：
+1. 数据库已是最新版本时，单个进程启动阶段花在迁移上的时间
+2. 空数据库上同时启动 N 个进程时，全部就绪的总耗时与迁移失败的进程数
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_startup_migrations [--workers 4] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+LEGACY = """
+import time
+import app.main
+started = time.perf_counter()
+from alembic.config import Config
+from alembic import command
+command.upgrade(Config("alembic.ini"), "head")
+print("ELAPSED", time.perf_counter() - started)
+"""
+
+COORDINATED = """
+import time
+import app.main
+from app.db.migrations import run_startup_migrations
+started = time.perf_counter()
+result = run_startup_migrations()
+print("ELAPSED", time.perf_counter() - started, result.action)
+"""
+
+
+def spawn(code: str, database_url: str) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url, JOB_WORKER_IN_PROCESS="false")
+    env.pop("REDIS_URL", None)
+    return subprocess.Popen(
+        [sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+
+
+def elapsed(output: str) -> float:
+    for line in output.splitlines():
+        if line.startswith("ELAPSED"):
+            return float(line.split()[1])
+    raise RuntimeError(output)
+
+
+def up_to_date(code: str, database_url: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        process = spawn(code, database_url)
+        output, _ = process.communicate()
+        samples.append(elapsed(output))
+    return statistics.median(samples)
+
+
+def concurrent_boot(code: str, workdir: str, label: str, workers: int) -> tuple:
+    database_url = f"sqlite:///{os.path.join(workdir, f'{label}-fresh.db')}"
+    started = time.perf_counter()
+    processes = [spawn(code, database_url) for _ in range(workers)]
+    outputs = [process.communicate()[0] for process in processes]
+    total = time.perf_counter() - started
+    failed = sum(1 for output in outputs if "Traceback" in output or "ELAPSED" not in output)
+    return total, failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="afm-bench-") as workdir:
+        database_url = f"sqlite:///{os.path.join(workdir, 'current.db')}"
+        spawn(COORDINATED, database_url).communicate()
+
+        print(f"{'':<28s} {'up-to-date ms':>14s} {f'{args.workers} workers, fresh DB':>24s}")
+        for label, code in (("alembic upgrade per worker", LEGACY), ("migration coordinator", COORDINATED)):
+            single = up_to_date(code, database_url, args.repeat)
+            total, failed = concurrent_boot(code, workdir, label.split()[0], args.workers)
+            print(f"{label:<28s} {single * 1000:14.1f} {total:12.2f}s, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+内容优化建议的生成开销
+
+对 10 KB ~ 1 MB 的未整理草稿（有场景标题，但对白没有括号、没有画面描述、角色未命名，
+即大多数规则都会给出建议的情况）比较：
+原实现（多次子串扫描 + 未预编译的 re.sub + 整篇拼接）、修正替换模板后的原实现、
+规则引擎首次计算、规则引擎命中缓存
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_suggestions
+"""
+
+import random
+import re
+import timeit
+
+from app.services.suggestions import SuggestionEngine, _registry
+from benchmarks.bench_compressed_text import DIALOGUE, NAMES, PLACES, TIMES
+
+SIZES_KB = (10, 100, 1024)
+
+
+def draft(kb: int) -> str:
+    rng = random.Random(kb)
+    lines, size, n = [], 0, 1
+    while size < kb * 1024:
+        scene = [
+            f"=== 场景{n}：{rng.choice(PLACES)} ===",
+            f"{rng.choice(PLACES)}，{rng.choice(TIMES)}。",
+            f"{rng.choice(('角色A', '角色B', *NAMES))}：{rng.choice(DIALOGUE)}",
+            f"{rng.choice(('角色A', '角色B', *NAMES))}：{rng.choice(DIALOGUE)}",
+            "",
+        ]
+        lines.extend(scene)
+        size += sum(len(line.encode("utf-8")) + 1 for line in scene)
+        n += 1
+    return "\n".join(lines)
+
+
+def legacy(content: str) -> list:
+    """重构前 optimize_content 的实现（保留其替换文本中的 $1/$& 写法，开销相同）"""
+    suggestions = []
+    if "=== 场景" not in content:
+        suggestions.append({"type": "structure", "suggestion": f"剧本\n\n类型：剧情\n目标时长：5分钟\n\n=== 场景1：开头 ===\n\n[画面描述]\n{content}\n\n=== 场景2：发展 ===\n\n[画面描述]\n...\n\n=== 场景3：高潮 ===\n\n[画面描述]\n...\n\n=== 场景4：结局 ===\n\n[画面描述]\n...\n\n=== 完 ==="})
+    if "：（" not in content:
+        suggestions.append({"type": "dialogue", "suggestion": re.sub(r"([^：]+)：([^\n]+)", r"$1：（$2）", content)})
+    if "[画面描述]" not in content:
+        suggestions.append({"type": "description", "suggestion": re.sub(r"=== 场景[^=]+===", r"$&\n\n[画面描述]\n镜头推进，展示场景细节...", content)})
+    if "主角" not in content or "配角" not in content:
+        suggestions.append({"type": "character", "suggestion": content.replace("角色A", "主角").replace("角色B", "配角").replace("=== 场景1：开头 ===", "=== 场景1：开头 ===\n\n[角色设定]\n主角：主要人物，性格特点...\n配角：重要配角，与主角的关系...")})
+    return suggestions
+
+
+def legacy_fixed(content: str) -> list:
+    """原实现修正 $1/$& 后的版本（替换模板需要展开分组，开销略高）"""
+    suggestions = []
+    if "：（" not in content:
+        suggestions.append(re.sub(r"([^：]+)：([^\n]+)", r"\1：（\2）", content))
+    if "[画面描述]" not in content:
+        suggestions.append(re.sub(r"=== 场景[^=]+===", r"\g<0>\n\n[画面描述]\n镜头推进，展示场景细节...", content))
+    if "主角" not in content or "配角" not in content:
+        suggestions.append(content.replace("角色A", "主角").replace("角色B", "配角").replace("=== 场景1：开头 ===", "=== 场景1：开头 ===\n\n[角色设定]\n主角：主要人物，性格特点...\n配角：重要配角，与主角的关系..."))
+    return suggestions
+
+
+def best(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1000
+
+
+def main() -> None:
+    print(f"{'size':>8s} {'legacy(ms)':>11s} {'fixed(ms)':>10s} {'engine(ms)':>11s} {'cached(ms)':>11s}")
+    for kb in SIZES_KB:
+        content = draft(kb)
+        number = max(1, 500 // kb)
+        engine = SuggestionEngine(_registry, max_chars=100_000_000)
+        old = best(lambda: legacy(content), number)
+        fixed = best(lambda: legacy_fixed(content), number)
+        cold = best(lambda: (engine.clear(), engine.suggest(content)), number)
+        engine.suggest(content)
+        warm = best(lambda: engine.suggest(content), number * 10)
+        print(f"{kb:>6d}KB {old:11.2f} {fixed:10.2f} {cold:11.2f} {warm:11.3f}")
+
+
+if __name__ == "__main__":
+    main()
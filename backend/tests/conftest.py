@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+import pytest
+
+# 测试使用独立的 SQLite 数据库，必须在导入 app 之前设置
+_db_dir = tempfile.mkdtemp(prefix="afm-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.pop("REDIS_URL", None)
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.rate_limit import rate_limiter  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.core.user_cache import user_cache  # noqa: E402
+from app.crud.user import user as crud_user  # noqa: E402
+from app.db.base import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.schemas.user import UserCreate  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def db_tables():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    user_cache.clear()
+    rate_limiter.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def test_user(db):
+    return crud_user.create(
+        db,
+        obj_in=UserCreate(email="writer@afm.io", username="writer", password="Writer123456!"),
+    )
+
+
+@pytest.fixture
+def auth_headers(test_user):
+    return {"Authorization": f"Bearer {create_access_token(test_user.id)}"}
@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.ai_gateway import (
+    CHAT,
+    CREATIVE,
+    AIGateway,
+    AIProviderError,
+    MockProvider,
+    ModelSpec,
+    NoModelAvailable,
+)
+from app.services.ai_mock import create_mock_app
+from app.services.prompt_optimizer import parse_suggestions
+
+MESSAGES = [{"role": "user", "content": "雨夜天台的重逢"}]
+
+
+def mock_provider(app, name="mock", cost=0.0, capabilities=(CHAT,), max_concurrency=4):
+    provider = MockProvider(
+        api_key="test",
+        base_url="http://mock/v1",
+        models=[ModelSpec(f"{name}-model", frozenset(capabilities), cost, 10_000)],
+        max_concurrency=max_concurrency,
+        max_connections=max_concurrency,
+        timeout=5,
+        transport=httpx.ASGITransport(app=app),
+    )
+    provider.name = name
+    return provider
+
+
+def test_routes_by_capability_and_cost():
+    cheap, strong = create_mock_app(first_token_delay=0), create_mock_app(first_token_delay=0)
+    gateway = AIGateway([
+        mock_provider(strong, "strong", cost=0.05, capabilities=(CHAT, CREATIVE)),
+        mock_provider(cheap, "cheap", cost=0.001),
+    ])
+    assert asyncio.run(gateway.complete(MESSAGES)).provider == "cheap"
+    assert asyncio.run(gateway.complete(MESSAGES, capabilities=(CHAT, CREATIVE))).provider == "strong"
+    with pytest.raises(NoModelAvailable):
+        asyncio.run(gateway.complete(MESSAGES, capabilities=(CREATIVE,), max_cost=0.01))
+
+
+def test_coalesces_identical_requests_and_limits_concurrency():
+    app = create_mock_app(first_token_delay=0.05)
+    gateway = AIGateway([mock_provider(app, max_concurrency=2)])
+
+    async def run():
+        same = [gateway.complete(MESSAGES) for _ in range(10)]
+        distinct = [gateway.complete([{"role": "user", "content": f"提示词{i}"}]) for i in range(6)]
+        return await asyncio.gather(*same, *distinct)
+
+    results = asyncio.run(run())
+    assert len({r.text for r in results[:10]}) == 1
+    assert app.state.requests == 1 + 6
+    assert app.state.max_active == 2
+    assert gateway.stats()["coalesced"] == 9
+
+
+def test_falls_back_on_upstream_error_and_streams():
+    broken = create_mock_app(fail_status=503)
+    healthy = create_mock_app(first_token_delay=0)
+    gateway = AIGateway([mock_provider(broken, "broken"), mock_provider(healthy, "healthy", cost=1)])
+    assert asyncio.run(gateway.complete(MESSAGES)).provider == "healthy"
+    assert gateway.stats()["providers"]["broken"]["errors"] == 1
+
+    async def collect():
+        return [piece async for piece in gateway.stream(MESSAGES)]
+
+    pieces = asyncio.run(collect())
+    assert len(pieces) > 1 and "".join(pieces).startswith("1. 雨夜天台的重逢")
+
+    rejected = create_mock_app(fail_status=400)
+    with pytest.raises(AIProviderError):
+        asyncio.run(AIGateway([mock_provider(rejected), mock_provider(healthy, cost=1)]).complete(MESSAGES))
+
+
+def test_falls_back_on_malformed_response():
+    def garbage(request):
+        if json.loads(request.content)["stream"]:
+            return httpx.Response(200, text='data: {"choices": "oops"}\n\n')
+        return httpx.Response(200, text="<html>gateway maintenance</html>")
+
+    broken = MockProvider(
+        api_key="test",
+        base_url="http://mock/v1",
+        models=[ModelSpec("broken-model", frozenset({CHAT}), 0.0, 10_000)],
+        max_concurrency=1,
+        max_connections=1,
+        timeout=5,
+        transport=httpx.MockTransport(garbage),
+    )
+    broken.name = "broken"
+    healthy = mock_provider(create_mock_app(first_token_delay=0), "healthy", cost=1)
+    gateway = AIGateway([broken, healthy])
+    assert asyncio.run(gateway.complete(MESSAGES)).provider == "healthy"
+
+    async def collect():
+        return [piece async for piece in gateway.stream(MESSAGES)]
+
+    assert "".join(asyncio.run(collect())).startswith("1. 雨夜天台的重逢")
+    assert gateway.stats()["providers"]["broken"]["errors"] == 2
+
+    with pytest.raises(AIProviderError, match="Malformed response") as excinfo:
+        asyncio.run(AIGateway([broken]).complete(MESSAGES))
+    assert excinfo.value.retryable
+
+
+def test_parse_suggestions():
+    assert parse_suggestions("1. 甲\n2、乙\n\n- 丙\n（4）丁") == ["甲", "乙", "丙", "丁"]
@@ -0,0 +1,30 @@
+def _login(client):
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": "writer@afm.io", "password": "Writer123456!"},
+    )
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_refresh_rotates_token_pair(client, test_user):
+    tokens = _login(client)
+
+    resp = client.post("/api/v1/auth/refresh", params={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 200
+    assert resp.json()["token_type"] == "bearer"
+
+    resp = client.post("/api/v1/auth/refresh", params={"refresh_token": tokens["access_token"]})
+    assert resp.status_code == 401
+
+
+def test_logout(client, test_user):
+    tokens = _login(client)
+    resp = client.post("/api/v1/auth/logout", params={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 200
+
+
+def test_sessions_without_redis(client, auth_headers):
+    resp = client.get("/api/v1/auth/sessions", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json() == []
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from app.core.compression import choose_encoding
+
+
+def test_choose_encoding():
+    assert choose_encoding(None) is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+
+def test_large_script_is_gzipped(client, auth_headers):
+    content = "=== 场景1 ===\n林晓：（你终于来了）\n" * 2000
+    script_id = client.post(
+        "/api/v1/scripts/", json={"title": "长剧本", "content": content}, headers=auth_headers
+    ).json()["id"]
+    headers = {**auth_headers, "Accept-Encoding": "gzip"}
+
+    resp = client.get(f"/api/v1/scripts/{script_id}", headers=headers)
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert int(resp.headers["content-length"]) < len(content.encode("utf-8")) // 10
+    assert resp.json()["content"] == content
+
+    etag = resp.headers["etag"]
+    assert etag.endswith('-gzip"')
+    resp = client.get(f"/api/v1/scripts/{script_id}", headers={**headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+
+    resp = client.get("/health", headers=headers)
+    assert "content-encoding" not in resp.headers
+
+
+def test_large_script_is_brotli_encoded(client, auth_headers):
+    brotli = pytest.importorskip("brotli")
+    content = "=== 场景1 ===\n林晓：（你终于来了）\n" * 2000
+    script_id = client.post(
+        "/api/v1/scripts/", json={"title": "长剧本", "content": content}, headers=auth_headers
+    ).json()["id"]
+    headers = {**auth_headers, "Accept-Encoding": "gzip, br"}
+
+    with client.stream("GET", f"/api/v1/scripts/{script_id}", headers=headers) as resp:
+        raw = b"".join(resp.iter_raw())
+    assert resp.headers["content-encoding"] == "br"
+    assert int(resp.headers["content-length"]) == len(raw) < len(content.encode("utf-8")) // 10
+    assert json.loads(brotli.decompress(raw))["content"] == content
+
+    etag = resp.headers["etag"]
+    assert etag.endswith('-br"')
+    resp = client.get(f"/api/v1/scripts/{script_id}", headers={**headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
@@ -0,0 +1,117 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db.pool import PoolMetrics, install_idle_ping, pool_options
+
+
+def _queue_pool_engine(**kwargs):
+    path = os.path.join(tempfile.mkdtemp(prefix="afm-pool-"), "pool.db")
+    return create_engine(
+        f"sqlite:///{path}", poolclass=QueuePool, connect_args={"check_same_thread": False}, **kwargs
+    )
+
+
+def test_pool_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_POOL_PRE_PING", "idle")
+    options = pool_options("postgresql://u:p@db/app", pool_size=7, max_overflow=3)
+    assert options == {
+        "pool_size": 7,
+        "max_overflow": 3,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": False,
+    }
+    assert pool_options("sqlite:///app.db", pool_size=7, max_overflow=3) == {}
+
+    monkeypatch.setattr(settings, "DATABASE_POOL_PRE_PING", "always")
+    assert pool_options("postgresql://u:p@db/app", pool_size=7, max_overflow=3)["pool_pre_ping"] is True
+
+    monkeypatch.setattr(settings, "DATABASE_POOL_PRE_PING", "sometimes")
+    with pytest.raises(ValueError):
+        pool_options("postgresql://u:p@db/app", pool_size=7, max_overflow=3)
+
+
+def test_metrics_track_overflow_timeouts_and_lifetime():
+    engine = _queue_pool_engine(pool_size=1, max_overflow=1, pool_timeout=0.05)
+    metrics = PoolMetrics()
+    metrics.install(engine)
+
+    first = engine.connect()
+    second = engine.connect()
+    stats = metrics.stats()
+    assert stats["in_use"] == 2
+    assert stats["overflow"] == 1
+    assert stats["overflow_checkouts"] == 1
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    second.close()
+    first.close()
+
+    engine.dispose()
+    stats = metrics.stats()
+    assert stats["pool"] == "QueuePool"
+    assert stats["checkouts"] == 2
+    assert stats["checkout_timeouts"] == 1
+    assert stats["checkout_wait_ms"]["count"] == 3
+    assert stats["checkout_wait_ms"]["max"] >= 50
+    assert stats["in_use"] == 0
+    assert stats["peak_in_use"] == 2
+    assert stats["peak_overflow"] == 1
+    assert stats["held_ms"]["count"] == 2
+    assert stats["connections_opened"] == 2
+    assert stats["connections_closed"] == 2
+    assert stats["connection_lifetime_seconds"]["count"] == 2
+
+    # dispose 之后换上的新连接池同样计时
+    with engine.connect():
+        pass
+    assert metrics.stats()["checkout_wait_ms"]["count"] == 4
+
+
+def test_idle_ping_skips_busy_connections_and_replaces_dead_ones(monkeypatch):
+    engine = _queue_pool_engine(pool_size=1, max_overflow=0)
+    metrics = PoolMetrics()
+    install_idle_ping(engine, idle_seconds=3600, metrics=metrics)
+    metrics.install(engine)
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    assert metrics.stats()["pings"] == 0
+
+    engine = _queue_pool_engine(pool_size=1, max_overflow=0)
+    metrics = PoolMetrics()
+    install_idle_ping(engine, idle_seconds=0, metrics=metrics)
+    metrics.install(engine)
+    with engine.connect():
+        pass
+    with engine.connect():
+        pass
+    assert metrics.stats()["pings"] == 1
+
+    def dead(dbapi_connection):
+        raise RuntimeError("server closed the connection")
+
+    monkeypatch.setattr(engine.dialect, "do_ping", dead)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+    stats = metrics.stats()
+    assert stats["ping_failures"] == 1
+    assert stats["invalidations"] == 1
+    assert stats["connections_opened"] == 2
+    assert stats["checkouts"] == 3
+
+
+def test_admin_metrics_expose_pool_stats(client, db, test_user, auth_headers):
+    test_user.is_superuser = True
+    db.commit()
+    response = client.get("/api/v1/admin/metrics", headers=auth_headers)
+    assert response.status_code == 200
+    pools = response.json()["db_pool"]
+    assert pools["async"]["checkouts"] >= 1
+    assert set(pools["sync"]) >= {"checkout_wait_ms", "in_use", "peak_overflow", "connection_lifetime_seconds"}
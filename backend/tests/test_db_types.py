@@ -0,0 +1,39 @@
+from app.db.types import (
+    MARKER_RAW,
+    MARKER_ZLIB,
+    decode_text,
+    decode_text_prefix,
+    encode_text,
+    prefix_bytes_for,
+)
+from benchmarks.bench_compressed_text import screenplay
+
+
+def test_small_values_are_stored_raw():
+    data = encode_text("短文本", threshold=1024)
+    assert data[:1] == MARKER_RAW
+    assert decode_text(data) == "短文本"
+
+
+def test_large_values_are_compressed():
+    text = "=== 场景1：开头 ===\n[画面描述]\n城市夜景，霓虹闪烁。\n" * 200
+    data = encode_text(text, threshold=1024)
+    assert data[:1] == MARKER_ZLIB
+    assert len(data) < len(text.encode("utf-8")) / 5
+    assert decode_text(data) == text
+
+
+def test_prefix_decodes_from_truncated_bytes():
+    text = "开场白" + "很长的正文" * 2000
+    for threshold in (1, 10 ** 9):
+        data = encode_text(text, threshold=threshold)
+        assert decode_text_prefix(data[:prefix_bytes_for(10)], 10) == text[:10]
+
+
+def test_prefix_covers_block_header_of_large_screenplay():
+    for kb in (16, 64):
+        text = screenplay(kb)
+        data = encode_text(text, threshold=1024)
+        assert data[:1] == MARKER_ZLIB
+        for n in (1, 5, 50, 500):
+            assert decode_text_prefix(data[:prefix_bytes_for(n)], n) == text[:n]
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import httpx
+
+from app.core.config import settings
+from app.services.ai_gateway import MOCK_MODELS, MockProvider, ai_gateway
+from app.services.ai_mock import create_mock_app
+from app.services.script_generation import stream_generation
+
+REPLY = "=== 场景1：天台 ===\n[画面描述] 雨夜，城市灯光\n林夏：（你终于来了）\n=== 完 ===\n"
+
+
+def use_mock(app):
+    provider = MockProvider(api_key="test", base_url="http://mock/v1", models=MOCK_MODELS, max_concurrency=2,
+                            max_connections=2, timeout=5, transport=httpx.ASGITransport(app=app))
+    ai_gateway.providers.append(provider)
+    return provider
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_generation_saves_content(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_FLUSH_CHARS", 10)
+    script_id = client.post("/api/v1/scripts/", json={"title": "雨夜"}, headers=auth_headers).json()["id"]
+    url = f"/api/v1/scripts/{script_id}/generate/stream"
+    assert client.post(url, json={}, headers=auth_headers).status_code == 503
+
+    provider = use_mock(create_mock_app(first_token_delay=0, chunk_chars=3, reply=lambda _: REPLY))
+    try:
+        with client.stream("POST", url, json={"prompt": "重逢"}, headers=auth_headers) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = parse_events(response.read().decode())
+    finally:
+        ai_gateway.providers.remove(provider)
+
+    assert events[0] == ("start", {"script_id": script_id})
+    assert "".join(data["text"] for name, data in events if name == "token") == REPLY
+    name, data = events[-1]
+    assert name == "done" and data["characters"] == len(REPLY)
+    script = client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers).json()
+    assert script["status"] == "completed" and script["content"] == REPLY
+    assert script["version"] == data["version"]
+    assert client.get(f"/api/v1/scripts/{script_id}/scenes", headers=auth_headers).json()
+
+
+def test_disconnect_cancels_upstream_and_keeps_partial_content(client, auth_headers, monkeypatch):
+    script_id = client.post("/api/v1/scripts/", json={"title": "雨夜"}, headers=auth_headers).json()["id"]
+    upstream = {"sent": 0, "closed": False}
+
+    async def slow_stream(messages, **kwargs):
+        try:
+            for _ in range(1000):
+                upstream["sent"] += 1
+                yield "林夏："
+                await asyncio.sleep(0.01)
+        finally:
+            upstream["closed"] = True
+
+    monkeypatch.setattr(ai_gateway, "stream", slow_stream)
+
+    async def read_then_disconnect():
+        events = stream_generation(script_id, [{"role": "user", "content": "重逢"}])
+        received = [await events.__anext__() for _ in range(4)]
+        await events.aclose()
+        return received
+
+    received = asyncio.run(read_then_disconnect())
+    assert upstream["closed"] and upstream["sent"] < 10
+    partial = "".join(json.loads(e.split("data: ", 1)[1])["text"] for e in received[1:])
+    script = client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers).json()
+    assert script["status"] == "draft" and script["content"] == partial
+
+
+def test_unexpected_upstream_error_ends_stream(client, auth_headers, monkeypatch):
+    script_id = client.post("/api/v1/scripts/", json={"title": "雨夜"}, headers=auth_headers).json()["id"]
+
+    async def broken_stream(messages, **kwargs):
+        yield "林夏："
+        raise ValueError("malformed chunk")
+
+    monkeypatch.setattr(ai_gateway, "stream", broken_stream)
+
+    async def read_all():
+        return [event async for event in stream_generation(script_id, [{"role": "user", "content": "重逢"}])]
+
+    events = parse_events("".join(asyncio.run(asyncio.wait_for(read_all(), 5))))
+    assert events[-1] == ("error", {"detail": "Generation failed"})
+    script = client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers).json()
+    assert script["status"] == "draft" and script["content"] == "林夏："
@@ -0,0 +1,46 @@
+import os
+import re
+import socket
+import subprocess
+import sys
+
+# `import app.main` 的耗时上限（秒），慢速 CI 可通过环境变量放宽
+IMPORT_TIME_BUDGET_SECONDS = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "4.0"))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILE = """
+import time
+started = time.perf_counter()
+import app.main
+print("ELAPSED", time.perf_counter() - started)
+"""
+
+
+def slowest_imports(stderr: str, count: int = 15) -> str:
+    """-X importtime 输出中累计耗时最长的模块"""
+    rows = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(.*)", line)
+        if match:
+            rows.append((int(match.group(1)), match.group(2).rstrip()))
+    rows.sort(reverse=True)
+    return "\n".join(f"{us / 1e6:8.3f}s {name}" for us, name in rows[:count])
+
+
+def test_import_does_not_block_on_unreachable_redis():
+    # 接受连接但从不响应的 Redis：导入时若同步 ping 会一直等到超时
+    with socket.socket() as silent_redis:
+        silent_redis.bind(("127.0.0.1", 0))
+        silent_redis.listen(16)
+        env = dict(os.environ, REDIS_URL=f"redis://127.0.0.1:{silent_redis.getsockname()[1]}/0")
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROFILE],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+        )
+    assert result.returncode == 0, result.stderr[-2000:]
+    elapsed = float(re.search(r"ELAPSED ([\d.]+)", result.stdout).group(1))
+    assert elapsed < IMPORT_TIME_BUDGET_SECONDS, (
+        f"import app.main took {elapsed:.2f}s (budget {IMPORT_TIME_BUDGET_SECONDS}s), slowest imports:\n"
+        + slowest_imports(result.stderr)
+    )
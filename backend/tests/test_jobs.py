@@ -0,0 +1,137 @@
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.db.base import AsyncSessionLocal
+from app.services.ai_gateway import MOCK_MODELS, MockProvider, ai_gateway
+from app.services.ai_mock import create_mock_app
+from app.services.job_queue import PermanentJobError, job_handler, job_queue
+from app.worker import Worker
+
+calls = []
+
+
+@job_handler("test.flaky")
+async def flaky(context, payload):
+    calls.append((payload["name"], context.attempt))
+    if payload.get("fail_until", 0) >= context.attempt:
+        raise RuntimeError("upstream busy")
+    if payload.get("permanent"):
+        raise PermanentJobError("bad payload")
+    if payload.get("sleep"):
+        await asyncio.sleep(payload["sleep"])
+    return {"name": payload["name"]}
+
+
+async def enqueue(user_id, name, **payload):
+    async with AsyncSessionLocal() as db:
+        job = await job_queue.enqueue(db, user_id=user_id, job_type="test.flaky",
+                                      payload={"name": name, **payload}, priority=payload.get("priority", 0))
+        return job.id
+
+
+def test_generate_script_job(client, auth_headers):
+    script_id = client.post("/api/v1/scripts/", json={"title": "雨夜", "genre": "悬疑"}, headers=auth_headers).json()["id"]
+    response = client.post(f"/api/v1/scripts/{script_id}/generate", json={"prompt": "天台重逢"}, headers=auth_headers)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+    assert client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers).json()["status"] == "generating"
+    assert client.post(f"/api/v1/scripts/{script_id}/generate", json={}, headers=auth_headers).status_code == 409
+
+    provider = MockProvider(api_key="test", base_url="http://mock/v1", models=MOCK_MODELS, max_concurrency=2,
+                            max_connections=2, timeout=5,
+                            transport=httpx.ASGITransport(app=create_mock_app(first_token_delay=0)))
+    ai_gateway.providers.append(provider)
+    try:
+        assert asyncio.run(Worker(job_queue, concurrency=1).run_once()) == 1
+    finally:
+        ai_gateway.providers.remove(provider)
+
+    jobs = client.get("/api/v1/jobs/", params={"ids": [job["id"], 9999]}, headers=auth_headers).json()
+    assert [j["status"] for j in jobs] == ["succeeded"]
+    assert jobs[0]["result"]["provider"] == "mock"
+    script = client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers).json()
+    assert script["status"] == "completed" and "天台重逢" in script["content"]
+
+
+def test_generation_without_provider_fails_and_resets_status(client, auth_headers):
+    script_id = client.post("/api/v1/scripts/", json={"title": "雨夜"}, headers=auth_headers).json()["id"]
+    job_id = client.post(f"/api/v1/scripts/{script_id}/generate", json={}, headers=auth_headers).json()["id"]
+    asyncio.run(Worker(job_queue, concurrency=1).run_once())
+    job = client.get(f"/api/v1/jobs/{job_id}", headers=auth_headers).json()
+    assert job["status"] == "failed" and job["attempts"] == 1
+    assert client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers).json()["status"] == "draft"
+
+
+def test_cancel_queued_generation_resets_script(client, auth_headers):
+    script_id = client.post("/api/v1/scripts/", json={"title": "雨夜"}, headers=auth_headers).json()["id"]
+    job_id = client.post(f"/api/v1/scripts/{script_id}/generate", json={}, headers=auth_headers).json()["id"]
+    response = client.post(f"/api/v1/jobs/{job_id}/cancel", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers).json()["status"] == "draft"
+    assert client.post(f"/api/v1/scripts/{script_id}/generate", json={}, headers=auth_headers).status_code == 202
+
+
+def test_priority_retry_and_cancel(client, auth_headers, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0)
+    calls.clear()
+
+    async def run():
+        low = await enqueue(test_user.id, "low")
+        await enqueue(test_user.id, "retry", fail_until=1, priority=5)
+        await enqueue(test_user.id, "permanent", permanent=True, priority=3)
+        cancelled = await enqueue(test_user.id, "cancelled", priority=9)
+        async with AsyncSessionLocal() as db:
+            await job_queue.cancel(db, await job_queue.get(db, cancelled))
+        await Worker(job_queue, concurrency=1).run_once()
+        return low, cancelled
+
+    low, cancelled = asyncio.run(run())
+    assert calls == [("retry", 1), ("retry", 2), ("permanent", 1), ("low", 1)]
+    jobs = {j["id"]: j for j in client.get(
+        "/api/v1/jobs/", params={"ids": list(range(low, cancelled + 1))}, headers=auth_headers
+    ).json()}
+    assert [jobs[i]["status"] for i in sorted(jobs)] == ["succeeded", "succeeded", "failed", "cancelled"]
+    assert jobs[low + 1]["attempts"] == 2 and jobs[low + 2]["error"] == "bad payload"
+
+
+def test_cancel_running_job(test_user, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_HEARTBEAT_SECONDS", 0.05)
+
+    async def run():
+        job_id = await enqueue(test_user.id, "slow", sleep=30)
+        stop = asyncio.Event()
+        worker = asyncio.create_task(Worker(job_queue, concurrency=2).run(stop))
+        while True:
+            async with AsyncSessionLocal() as db:
+                job = await job_queue.get(db, job_id)
+                if job.status == "running":
+                    await job_queue.cancel(db, job)
+                    break
+            await asyncio.sleep(0.02)
+        for _ in range(100):
+            async with AsyncSessionLocal() as db:
+                job = await job_queue.get(db, job_id)
+            if job.status == "cancelled":
+                break
+            await asyncio.sleep(0.05)
+        stop.set()
+        await worker
+        return job.status
+
+    assert asyncio.run(run()) == "cancelled"
+
+
+def test_job_permissions(client, auth_headers, db):
+    from app.crud.user import user as crud_user
+    from app.schemas.user import UserCreate
+
+    other = crud_user.create(db, obj_in=UserCreate(email="other@afm.io", username="other", password="Other123456!"))
+    job_id = asyncio.run(enqueue(other.id, "other"))
+    assert client.get(f"/api/v1/jobs/{job_id}", headers=auth_headers).status_code == 403
+    assert client.post(f"/api/v1/jobs/{job_id}/cancel", headers=auth_headers).status_code == 403
+    assert client.get("/api/v1/jobs/", params={"ids": [job_id]}, headers=auth_headers).json() == []
+    assert client.get("/api/v1/jobs/", params={"ids": list(range(101))}, headers=auth_headers).status_code == 422
@@ -0,0 +1,42 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+
+from app.db.migrations import ALEMBIC_INI, SCRIPT_LOCATION, run_startup_migrations, script_heads
+
+
+def temp_engine():
+    path = os.path.join(tempfile.mkdtemp(prefix="afm-migrate-"), "app.db")
+    return create_engine(f"sqlite:///{path}")
+
+
+def test_script_heads_match_alembic():
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", SCRIPT_LOCATION)
+    assert script_heads() == set(ScriptDirectory.from_config(config).get_heads())
+
+
+def test_upgrade_once_then_single_query():
+    engine = temp_engine()
+    assert run_startup_migrations(engine, mode="check").action == "behind"
+
+    result = run_startup_migrations(engine, mode="auto")
+    assert result.action == "upgraded" and result.current == set() and result.head == script_heads()
+
+    result = run_startup_migrations(engine, mode="auto")
+    assert result.action == "up_to_date" and result.current == result.head
+    assert run_startup_migrations(engine, mode="off").action == "disabled"
+
+
+def test_concurrent_workers_upgrade_once():
+    engine = temp_engine()
+    url = engine.url
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(lambda _: run_startup_migrations(create_engine(url), mode="auto"), range(3)))
+    actions = sorted(result.action for result in results)
+    assert actions.count("upgraded") == 1
+    assert set(actions) <= {"upgraded", "upgraded_by_peer", "up_to_date"}
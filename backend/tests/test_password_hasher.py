@@ -0,0 +1,71 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.password_hasher import PasswordHasher, PasswordHasherOverloaded, password_hasher
+from app.core.security import get_password_hash, password_needs_rehash
+
+
+def test_hash_and_verify_in_pool():
+    hasher = PasswordHasher(workers=1, max_queue=4)
+
+    async def run():
+        hashed = await hasher.hash("secret-pass", rounds=4)
+        return hashed, await hasher.verify("secret-pass", hashed), await hasher.verify("nope", hashed)
+
+    try:
+        hashed, ok, bad = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+    assert ok is True and bad is False
+    assert hasher.stats()["completed"] == 3
+
+
+def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(workers=1, max_queue=0)
+
+    async def run():
+        return await asyncio.gather(
+            hasher.hash("a", rounds=4), hasher.hash("b", rounds=4), return_exceptions=True
+        )
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+    assert isinstance(results[1], PasswordHasherOverloaded)
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_login_rehashes_on_cost_change(client, db, test_user, monkeypatch):
+    assert not password_needs_rehash(test_user.hashed_password)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert password_needs_rehash(test_user.hashed_password)
+
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": "writer@afm.io", "password": "Writer123456!"},
+    )
+    assert resp.status_code == 200
+    db.refresh(test_user)
+    assert test_user.hashed_password.startswith("$2b$05$")
+
+
+def test_login_succeeds_when_rehash_is_overloaded(client, db, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+
+    async def overloaded(password, rounds=None):
+        raise PasswordHasherOverloaded()
+
+    monkeypatch.setattr(password_hasher, "hash", overloaded)
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": "writer@afm.io", "password": "Writer123456!"},
+    )
+    assert resp.status_code == 200
+    db.refresh(test_user)
+    assert password_needs_rehash(test_user.hashed_password)
+
+
+def test_needs_rehash_on_malformed_hash():
+    assert password_needs_rehash("not-a-bcrypt-hash")
+    assert not password_needs_rehash(get_password_hash("x" * 8))
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.core.redis_service import async_redis_service
+from app.services.prompt_cache import PromptCache, cache_key, normalize_prompt
+
+
+def cache(**kwargs):
+    options = {"ttl_seconds": 60, "max_size": 100, "redis_ttl_seconds": 600, "lock_seconds": 2}
+    options.update(kwargs)
+    return PromptCache(**options)
+
+
+def counting_compute(calls, delay=0.0, result=("改写1", "改写2")):
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return list(result) if result is not None else None
+    return compute
+
+
+def test_normalized_prompts_share_a_key():
+    same = ["雨夜天台的重逢", " 雨夜 天台的重逢！！！", "雨夜天台的重逢。", "雨夜天台的重逢!"]
+    assert {normalize_prompt(p) for p in same} == {"雨夜天台的重逢"}
+    assert normalize_prompt("ＬＯＶＥ  Story…") == normalize_prompt("love story.") == "love story"
+    assert normalize_prompt("雨夜，天台") != normalize_prompt("雨夜天台")
+    assert cache_key("雨夜", "v1") != cache_key("雨夜", "v2")
+
+
+def test_single_flight_and_local_hits():
+    prompt_cache, calls = cache(), []
+
+    async def run():
+        compute = counting_compute(calls, delay=0.05)
+        first = await asyncio.gather(*[
+            prompt_cache.get_or_compute(p, "v1", compute, lambda: ["模板"])
+            for p in ["雨夜重逢"] * 5 + ["雨夜 重逢！"] * 5
+        ])
+        again = await prompt_cache.get_or_compute("雨夜重逢。", "v1", compute, lambda: ["模板"])
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r == ["改写1", "改写2"] for r in first) and again == first[0]
+    stats = prompt_cache.stats()
+    assert stats["misses"] == 1 and stats["coalesced"] == 9 and stats["local_hits"] == 1
+    assert stats["hit_rate"] == round(10 / 11, 4)
+
+
+def test_uncacheable_results_fall_back_per_prompt():
+    prompt_cache, calls = cache(), []
+    compute = counting_compute(calls, result=None)
+    for prompt in ["雨夜", "雨夜！"]:
+        assert asyncio.run(prompt_cache.get_or_compute(prompt, "v1", compute, lambda: [f"模板:{prompt}"])) == [f"模板:{prompt}"]
+    assert len(calls) == 2 and prompt_cache.stats()["uncacheable"] == 2
+
+
+def test_ttl_and_size_eviction(monkeypatch):
+    prompt_cache, calls = cache(max_size=2, ttl_seconds=10), []
+    compute = counting_compute(calls)
+    for prompt in ["甲", "乙", "丙", "甲"]:
+        asyncio.run(prompt_cache.get_or_compute(prompt, "v1", compute, list))
+    assert len(calls) == 4 and prompt_cache.stats()["evictions"] == 2
+
+    now = [1000.0]
+    monkeypatch.setattr("app.services.prompt_cache.time.monotonic", lambda: now[0])
+    asyncio.run(prompt_cache.get_or_compute("丁", "v1", compute, list))
+    now[0] += 11
+    asyncio.run(prompt_cache.get_or_compute("丁", "v1", compute, list))
+    assert len(calls) == 6 and prompt_cache.stats()["expirations"] == 1
+
+
+def test_redis_tier_is_shared_between_workers(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(type(async_redis_service), "is_available", property(lambda self: True))
+    worker_a, worker_b, worker_c, calls = cache(), cache(), cache(), []
+    compute = counting_compute(calls, delay=0.2)
+
+    async def run():
+        monkeypatch.setattr(async_redis_service, "_client", fakeredis.FakeAsyncRedis(decode_responses=True))
+        a, b = await asyncio.gather(
+            worker_a.get_or_compute("雨夜重逢", "v1", compute, list),
+            worker_b.get_or_compute("雨夜 重逢", "v1", compute, list),
+        )
+        c = await worker_c.get_or_compute("雨夜重逢！", "v1", compute, list)
+        return a, b, c
+
+    a, b, c = asyncio.run(run())
+    assert a == b == c and len(calls) == 1
+    assert worker_b.stats()["lock_waits"] == 1 and worker_c.stats()["redis_hits"] == 1
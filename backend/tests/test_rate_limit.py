@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.rate_limit import LocalTokenBuckets, parse_rate, rate_limiter
+from app.core.redis_service import TOKEN_BUCKET_LUA, async_redis_service
+
+
+def login(client, email="writer@afm.io", ip=None):
+    headers = {"X-Forwarded-For": ip} if ip else {}
+    return client.post("/api/v1/auth/login", data={"username": email, "password": "wrong"}, headers=headers)
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute").refill_per_second == pytest.approx(10 / 60)
+    assert parse_rate("5/30").period_seconds == 30
+    with pytest.raises(ValueError):
+        parse_rate("ten per minute")
+
+
+def test_local_bucket_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: now[0])
+    buckets, rate = LocalTokenBuckets(max_keys=10), parse_rate("2/second")
+    assert [buckets.take("k", rate)[0] for _ in range(3)] == [True, True, False]
+    assert buckets.take("k", rate)[1] == pytest.approx(0.5)
+    now[0] += 0.5
+    assert buckets.take("k", rate)[0]
+
+
+def test_login_limited_per_account_and_ip(client, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_PER_ACCOUNT", "3/minute")
+    monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_PER_IP", "5/minute")
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED_FOR", True)
+
+    assert [login(client, ip="10.0.0.1").status_code for _ in range(3)] == [401] * 3
+    limited = login(client, "Writer@AFM.io", ip="10.0.0.2")
+    assert limited.status_code == 429
+    assert 1 <= int(limited.headers["Retry-After"]) <= 20
+
+    assert [login(client, f"other{i}@afm.io", ip="10.0.0.1").status_code for i in range(3)] == [401, 401, 429]
+    assert login(client, "other9@afm.io", ip="10.0.0.3").status_code == 401
+
+    stats = rate_limiter.stats()
+    assert stats["backend"] == "local"
+    assert stats["scopes"]["login:ip"]["rejected"] == 1
+    assert stats["scopes"]["login:account"]["rejected"] == 1
+
+
+def test_register_limited_per_ip(client, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_REGISTER_PER_IP", "2/hour")
+    statuses = [
+        client.post("/api/v1/auth/register", json={
+            "email": f"user{i}@afm.io", "username": f"user{i}", "password": "Writer123456!",
+        }).status_code
+        for i in range(3)
+    ]
+    assert statuses == [201, 201, 429]
+
+
+def test_redis_token_bucket(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(type(async_redis_service), "is_available", property(lambda self: True))
+    rate = parse_rate("3/minute")
+
+    async def run():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        monkeypatch.setattr(async_redis_service, "_client", client)
+        monkeypatch.setattr(async_redis_service, "_token_bucket_script", client.register_script(TOKEN_BUCKET_LUA),
+                            raising=False)
+        results = [await rate_limiter.hit("login:ip", "10.0.0.1", rate) for _ in range(4)]
+        return results, await client.pttl("rate_limit:login:ip:10.0.0.1")
+
+    results, ttl = asyncio.run(run())
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[-1][1] == pytest.approx(20, abs=0.5)
+    assert 0 < ttl <= 61_000
+    assert len(rate_limiter.local) == 0
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import time
+
+import pytest
+import redis
+
+from app.core.config import settings
+from app.core.redis_service import (
+    REVOKE_ALL_USER_TOKENS_LUA,
+    ROTATE_REFRESH_TOKEN_LUA,
+    STORE_REFRESH_TOKEN_LUA,
+    AsyncRedisService,
+    RedisService,
+    _session_index_key,
+    _token_hash,
+    _token_key,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_RECONNECT_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "REDIS_RECONNECT_MAX_SECONDS", 0.05)
+    server = fakeredis.FakeServer()
+    service = object.__new__(RedisService)
+    service._client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    service._init_state()
+    return server, service
+
+
+def test_lazy_connect_and_reconnect_with_backoff(service):
+    server, service = service
+    server.connected = False
+    assert service.health()["status"] == "unknown"
+    assert service.is_available is False  # 首次使用只在后台发起连接，不阻塞
+    assert wait_for(lambda: service.health()["status"] == "down")
+    assert "last_error" in service.health()
+
+    recovered = []
+    service.call_on_reconnect(lambda: recovered.append(True))
+    assert wait_for(lambda: service.failures >= 3)
+    server.connected = True
+    assert wait_for(lambda: service.is_available)
+    assert recovered == [True]
+    assert service.health() == {"status": "up", "failures": service.failures}
+
+
+def test_operation_errors_trigger_reconnect(service):
+    server, service = service
+    assert service.connect() and service.is_available
+
+    server.connected = False
+    assert service.list_user_sessions(1) == []
+    assert service.health()["status"] == "down"
+    service.report_failure(ValueError("not a connection error"))
+    server.connected = True
+    assert wait_for(lambda: service.is_available)
+    service.report_failure(redis.ConnectionError("reset by peer"))
+    assert wait_for(lambda: service.is_available)
+
+
+def test_subscription_resubscribes_after_reconnect(service):
+    server, service = service
+    server.connected = False
+    service.connect()
+    received = []
+    subscription = service.subscribe("test:channel", received.append)
+    try:
+        server.connected = True
+        assert wait_for(lambda: service.is_available)
+        assert wait_for(lambda: service.publish("test:channel", "hello") and received == ["hello"])
+    finally:
+        subscription.stop()
+
+
+def test_health_reports_redis_state(client):
+    body = client.get("/health").json()
+    assert body["status"] == "healthy" and body["redis"] == {"status": "disabled"}
+
+
+def run_sessions(monkeypatch, scenario):
+    """在 fakeredis 上运行 AsyncRedisService 的会话脚本（客户端须在同一个事件循环中创建）"""
+    pytest.importorskip("lupa")
+    monkeypatch.setattr(AsyncRedisService, "is_available", property(lambda self: True))
+
+    async def run():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        service = object.__new__(AsyncRedisService)
+        service._client = client
+        service._store_script = client.register_script(STORE_REFRESH_TOKEN_LUA)
+        service._rotate_script = client.register_script(ROTATE_REFRESH_TOKEN_LUA)
+        service._revoke_all_script = client.register_script(REVOKE_ALL_USER_TOKENS_LUA)
+        return await scenario(service, client)
+
+    return asyncio.run(run())
+
+
+def test_sessions_are_pruned_listed_and_revoked(monkeypatch):
+    async def scenario(service, client):
+        index = _session_index_key(1)
+        # 已自然过期的会话：token key 已不存在，只剩索引中的条目
+        await client.hset(index, "expired", json.dumps({"expires_at": time.time() - 1}))
+        assert await service.store_refresh_token(1, "phone", device={"user_agent": "iPhone"})
+        assert await service.store_refresh_token(1, "laptop", device={"user_agent": "Firefox"})
+        assert not await client.hexists(index, "expired")
+
+        sessions = await service.list_user_sessions(1)
+        assert sorted(s["user_agent"] for s in sessions) == ["Firefox", "iPhone"]
+
+        await client.hset(index, "expired", json.dumps({"expires_at": time.time() - 1}))
+        assert await service.rotate_refresh_token(1, "phone", "phone-2")
+        assert not await client.hexists(index, "expired")
+
+        assert await service.store_refresh_token(2, "other")
+        assert await service.revoke_all_user_tokens(1)
+        return (
+            await client.exists(index, _token_key(1, "phone-2"), _token_key(1, "laptop")),
+            await service.validate_refresh_token(2, "other"),
+            await service.list_user_sessions(1),
+        )
+
+    remaining, other_user_valid, sessions = run_sessions(monkeypatch, scenario)
+    assert remaining == 0
+    assert other_user_valid
+    assert sessions == []
+
+
+def test_rotate_once_then_reject_reuse(monkeypatch):
+    async def scenario(service, client):
+        index = _session_index_key(1)
+        assert await service.store_refresh_token(1, "old", device={"user_agent": "iPhone", "ip": "10.0.0.1"})
+        created_at = json.loads((await client.hgetall(index)).popitem()[1])["created_at"]
+
+        assert await service.rotate_refresh_token(1, "old", "new", device={"ip": "10.0.0.2"})
+        sessions = await service.list_user_sessions(1)
+        # 旧 token 已失效但索引中仍有残留条目：重用时返回 False 并清理该条目
+        await client.hset(index, _token_hash("old"), json.dumps({"expires_at": time.time() + 60}))
+        reused = await service.rotate_refresh_token(1, "old", "stolen")
+        return created_at, sessions, reused, await client.hgetall(index), await client.exists(_token_key(1, "old"))
+
+    created_at, sessions, reused, index, old_exists = run_sessions(monkeypatch, scenario)
+    # 新会话继承登录时间和设备信息，并覆盖本次传入的字段
+    assert [(s["user_agent"], s["ip"], s["created_at"]) for s in sessions] == [("iPhone", "10.0.0.2", created_at)]
+    assert reused is False
+    assert old_exists == 0
+    assert list(index) == [sessions[0]["session_id"]]
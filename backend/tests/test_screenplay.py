@@ -0,0 +1,82 @@
+import asyncio
+
+from app.db.base import AsyncSessionLocal
+from app.services.screenplay import MAX_HEADING_LENGTH, parse_scene, split_scenes, sync_scenes
+
+SCREENPLAY = """雨夜
+
+类型：悬疑
+
+=== 场景1：开头 ===
+
+[画面描述]
+城市天台，深夜。
+
+林晓：（你终于来了）
+
+=== 场景2：发展 ===
+
+陈默：（对话）
+我们之间还有什么好说的。
+
+=== 完 ===
+"""
+
+
+def test_split_and_parse():
+    chunks = split_scenes(SCREENPLAY)
+    assert [c.heading for c in chunks] == ["场景1：开头", "场景2：发展"]
+    assert SCREENPLAY[chunks[1].start:chunks[1].end].startswith("=== 场景2：发展 ===")
+
+    first = parse_scene(chunks[0].text)
+    assert first["shots"] == [{"description": "城市天台，深夜。"}]
+    assert first["dialogues"] == [{"character": "林晓", "direction": None, "line": "你终于来了"}]
+
+    second = parse_scene(chunks[1].text)
+    assert second["dialogues"] == [{"character": "陈默", "direction": "对话", "line": "我们之间还有什么好说的。"}]
+
+
+def test_long_heading_is_truncated():
+    heading = "场景1：" + "长" * 400
+    chunks = split_scenes(f"=== {heading} ===\n林晓：（你终于来了）\n")
+    assert chunks[0].heading == heading[:MAX_HEADING_LENGTH]
+    assert chunks[0].text.startswith(f"=== {heading} ===")
+
+
+def test_sync_scenes_is_incremental(client, auth_headers):
+    script_id = client.post(
+        "/api/v1/scripts/", json={"title": "雨夜", "content": SCREENPLAY}, headers=auth_headers
+    ).json()["id"]
+
+    async def resync(content):
+        async with AsyncSessionLocal() as db:
+            stats = await sync_scenes(db, script_id, content)
+            await db.commit()
+            return stats
+
+    # 在开头插入一个场景：只解析新场景，原有两个场景只更新位置
+    inserted = SCREENPLAY.replace("=== 场景1：开头 ===", "=== 序幕 ===\n苏然：（开始吧）\n\n=== 场景1：开头 ===")
+    assert asyncio.run(resync(inserted)) == {"parsed": 1, "moved": 2, "removed": 0}
+    assert asyncio.run(resync(inserted)) == {"parsed": 0, "moved": 0, "removed": 0}
+
+
+def test_scene_endpoints(client, auth_headers):
+    script_id = client.post(
+        "/api/v1/scripts/", json={"title": "雨夜", "content": SCREENPLAY}, headers=auth_headers
+    ).json()["id"]
+
+    outline = client.get(f"/api/v1/scripts/{script_id}/scenes", headers=auth_headers).json()
+    assert [(s["position"], s["heading"], s["characters"]) for s in outline] == [
+        (1, "场景1：开头", ["林晓"]),
+        (2, "场景2：发展", ["陈默"]),
+    ]
+
+    client.patch(
+        f"/api/v1/scripts/{script_id}/content",
+        params={"content": SCREENPLAY.replace("我们之间还有什么好说的。", "别回头。")},
+        headers=auth_headers,
+    )
+    scene = client.get(f"/api/v1/scripts/{script_id}/scenes/2", headers=auth_headers).json()
+    assert scene["dialogues"][0]["line"] == "别回头。"
+    assert "别回头。" in scene["text"]
+    assert client.get(f"/api/v1/scripts/{script_id}/scenes/3", headers=auth_headers).status_code == 404
@@ -0,0 +1,308 @@
+from app.core.security import create_access_token
+from app.crud.user import user as crud_user
+from app.schemas.user import UserCreate
+
+
+def test_script_crud_flow(client, auth_headers):
+    resp = client.post(
+        "/api/v1/scripts/",
+        json={"title": "第一部", "content": "=== 场景1 ==="},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 201
+    script_id = resp.json()["id"]
+
+    resp = client.post("/api/v1/scripts/", json={"title": "第一部"}, headers=auth_headers)
+    assert resp.status_code == 400
+
+    resp = client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json()["content"] == "=== 场景1 ==="
+
+    resp = client.put(f"/api/v1/scripts/{script_id}", json={"genre": "悬疑"}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json()["genre"] == "悬疑"
+
+    resp = client.get("/api/v1/scripts/", headers=auth_headers)
+    assert [s["id"] for s in resp.json()] == [script_id]
+
+    resp = client.delete(f"/api/v1/scripts/{script_id}", headers=auth_headers)
+    assert resp.status_code == 200
+    assert client.get(f"/api/v1/scripts/{script_id}", headers=auth_headers).status_code == 404
+
+
+def test_script_owner_check(client, db, auth_headers):
+    other = crud_user.create(
+        db, obj_in=UserCreate(email="other@afm.io", username="other", password="Other123456!")
+    )
+    other_headers = {"Authorization": f"Bearer {create_access_token(other.id)}"}
+    script_id = client.post(
+        "/api/v1/scripts/", json={"title": "私有剧本"}, headers=auth_headers
+    ).json()["id"]
+
+    assert client.get(f"/api/v1/scripts/{script_id}", headers=other_headers).status_code == 403
+
+
+def test_login_and_me(client, test_user):
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": "writer@afm.io", "password": "Writer123456!"},
+    )
+    assert resp.status_code == 200
+    token = resp.json()["access_token"]
+
+    resp = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert resp.json()["username"] == "writer"
+
+
+def test_list_scripts_cursor_pagination(client, auth_headers):
+    for i in range(5):
+        client.post("/api/v1/scripts/", json={"title": f"草稿{i}"}, headers=auth_headers)
+
+    seen = []
+    cursor = ""
+    while True:
+        resp = client.get(
+            "/api/v1/scripts/", params={"cursor": cursor, "limit": 2}, headers=auth_headers
+        )
+        assert resp.status_code == 200
+        page = resp.json()
+        seen.extend(item["title"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"草稿{i}" for i in reversed(range(5))]
+
+    resp = client.get("/api/v1/scripts/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert resp.status_code == 400
+
+    for limit in (0, -1, 101):
+        resp = client.get("/api/v1/scripts/", params={"cursor": "", "limit": limit}, headers=auth_headers)
+        assert resp.status_code == 422
+
+
+def test_list_scripts_returns_summaries(client, auth_headers):
+    client.post(
+        "/api/v1/scripts/",
+        json={"title": "长剧本", "content": "开场白" + "很长的正文" * 1000},
+        headers=auth_headers,
+    )
+
+    item = client.get("/api/v1/scripts/", headers=auth_headers).json()[0]
+    assert "content" not in item
+    assert item["content_preview"] is None
+
+    item = client.get(
+        "/api/v1/scripts/", params={"preview_chars": 3}, headers=auth_headers
+    ).json()[0]
+    assert item["content_preview"] == "开场白"
+
+
+def test_patch_content_with_versioning(client, auth_headers):
+    script = client.post(
+        "/api/v1/scripts/", json={"title": "增量", "content": "张三：你好。"}, headers=auth_headers
+    ).json()
+    assert script["version"] == 1
+    url = f"/api/v1/scripts/{script['id']}/content/delta"
+
+    resp = client.patch(
+        url,
+        json={"base_version": 1, "edits": [{"start": 0, "end": 2, "text": "李四"}, {"start": 6, "end": 6, "text": "再见。"}]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["version"] == 2
+    assert resp.json()["content_length"] == len("李四：你好。再见。")
+
+    resp = client.patch(url, json={"base_version": 1, "edits": []}, headers=auth_headers)
+    assert resp.status_code == 409
+
+    resp = client.patch(
+        url, json={"base_version": 2, "edits": [{"start": 0, "end": 99, "text": ""}]}, headers=auth_headers
+    )
+    assert resp.status_code == 422
+
+    body = client.get(f"/api/v1/scripts/{script['id']}", headers=auth_headers).json()
+    assert body["content"] == "李四：你好。再见。"
+    assert body["version"] == 2
+
+    resp = client.put(f"/api/v1/scripts/{script['id']}", json={"content": "重写"}, headers=auth_headers)
+    assert resp.json()["version"] == 3
+
+
+def test_batch_scripts(client, auth_headers):
+    keep = client.post("/api/v1/scripts/", json={"title": "保留", "content": "旧"}, headers=auth_headers).json()
+    drop = client.post("/api/v1/scripts/", json={"title": "草稿"}, headers=auth_headers).json()
+
+    resp = client.post(
+        "/api/v1/scripts/batch",
+        json={
+            "delete": [drop["id"], 99999],
+            "update": [
+                {"id": keep["id"], "title": "改名", "content": "新"},
+                {"id": drop["id"], "genre": "喜剧"},
+            ],
+            "create": [
+                {"title": "草稿"},
+                {"title": "保留", "content": "=== 场景1 ==="},
+                {"title": "改名"},
+                {"title": "保留"},
+            ],
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["created"], body["updated"], body["deleted"]) == (2, 1, 1)
+    outcome = [(r["op"], r["index"], r["ok"]) for r in body["results"]]
+    assert outcome == [
+        ("delete", 0, True), ("delete", 1, False),
+        ("update", 0, True), ("update", 1, False),
+        ("create", 0, True), ("create", 1, True), ("create", 2, False), ("create", 3, False),
+    ]
+
+    updated = client.get(f"/api/v1/scripts/{keep['id']}", headers=auth_headers).json()
+    assert (updated["title"], updated["content"], updated["version"]) == ("改名", "新", 2)
+    created_id = body["results"][5]["id"]
+    created = client.get(f"/api/v1/scripts/{created_id}", headers=auth_headers).json()
+    assert (created["title"], created["content"], created["version"]) == ("保留", "=== 场景1 ===", 1)
+    titles = sorted(s["title"] for s in client.get("/api/v1/scripts/", headers=auth_headers).json())
+    assert titles == sorted(["改名", "草稿", "保留"])
+    assert all(s["genre"] is None for s in client.get("/api/v1/scripts/", headers=auth_headers).json())
+
+    resp = client.post(
+        "/api/v1/scripts/batch",
+        json={"update": [{"id": keep["id"], "title": None}, {"id": created_id, "genre": "悬疑"}]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    assert [(r["ok"], r["error"]) for r in resp.json()["results"]] == [(False, "Title cannot be null"), (True, None)]
+
+
+def test_script_etags(client, auth_headers):
+    script = client.post("/api/v1/scripts/", json={"title": "缓存", "content": "旧"}, headers=auth_headers).json()
+    url = f"/api/v1/scripts/{script['id']}"
+
+    resp = client.get(url, headers=auth_headers)
+    etag = resp.headers["ETag"]
+    resp = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+
+    list_resp = client.get("/api/v1/scripts/", headers=auth_headers)
+    list_tag = list_resp.headers["ETag"]
+    assert client.get("/api/v1/scripts/", headers={**auth_headers, "If-None-Match": list_tag}).status_code == 304
+    assert client.get("/api/v1/scripts/?limit=1", headers={**auth_headers, "If-None-Match": list_tag}).status_code == 200
+
+    resp = client.put(url, json={"content": "新"}, headers={**auth_headers, "If-Match": etag})
+    assert resp.status_code == 200
+    new_etag = resp.headers["ETag"]
+    assert new_etag != etag
+
+    resp = client.put(url, json={"content": "冲突"}, headers={**auth_headers, "If-Match": etag})
+    assert resp.status_code == 412
+    resp = client.patch(url + "/content", params={"content": "冲突"}, headers={**auth_headers, "If-Match": etag})
+    assert resp.status_code == 412
+
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+    assert client.get(url, headers={**auth_headers, "If-None-Match": new_etag}).status_code == 304
+    assert client.get("/api/v1/scripts/", headers={**auth_headers, "If-None-Match": list_tag}).status_code == 200
+
+
+def test_export_and_import_ndjson(client, auth_headers):
+    import gzip
+    import json
+
+    for i in range(3):
+        client.post("/api/v1/scripts/", json={"title": f"导出{i}", "content": f"正文{i}" * 500}, headers=auth_headers)
+
+    resp = client.get("/api/v1/scripts/export", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["title"] for line in lines] == ["导出0", "导出1", "导出2"]
+    assert lines[1]["content"] == "正文1" * 500
+
+    resp = client.get("/api/v1/scripts/export?gzip=true", headers=auth_headers)
+    exported = gzip.decompress(resp.content)
+    assert len(exported.splitlines()) == 3
+
+    # 已存在的标题被跳过，其余按批导入
+    payload = exported + json.dumps({"title": "新剧本", "content": "内容"}).encode("utf-8") + b"\n{bad json\n"
+    resp = client.post(
+        "/api/v1/scripts/import?gzip=true", content=gzip.compress(payload), headers=auth_headers
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["imported"] == 1
+    assert [e["line"] for e in body["errors"]] == [1, 2, 3, 5]
+
+    titles = {s["title"] for s in client.get("/api/v1/scripts/", headers=auth_headers).json()}
+    assert "新剧本" in titles
+
+    resp = client.post("/api/v1/scripts/import?gzip=true", content=b"not gzip", headers=auth_headers)
+    assert resp.status_code == 400
+
+
+def test_import_rejects_gzip_bomb_without_inflating_it(monkeypatch):
+    import asyncio
+    import gzip
+    import tracemalloc
+
+    import pytest
+
+    from app.services import script_transfer
+
+    monkeypatch.setattr(script_transfer, "MAX_IMPORT_LINE_BYTES", 64 * 1024)
+    bomb = gzip.compress(b"a" * (64 * 1024 * 1024))
+
+    async def consume():
+        async def chunks():
+            yield bomb
+
+        async for _ in script_transfer.iter_ndjson_lines(chunks(), compressed=True):
+            pass
+
+    tracemalloc.start()
+    try:
+        with pytest.raises(script_transfer.InvalidImportError):
+            asyncio.run(consume())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 4 * 1024 * 1024
+
+
+def test_search_scripts(client, auth_headers):
+    rain = client.post(
+        "/api/v1/scripts/",
+        json={"title": "雨夜", "content": "=== 场景1 ===\n林晓：（你终于来了）\n陈默沉默片刻。"},
+        headers=auth_headers,
+    ).json()
+    client.post(
+        "/api/v1/scripts/",
+        json={"title": "天台", "content": "苏然望向远处的城市 Skyline。"},
+        headers=auth_headers,
+    )
+
+    def search(q):
+        resp = client.get("/api/v1/scripts/search", params={"q": q}, headers=auth_headers)
+        assert resp.status_code == 200
+        return resp.json()
+
+    hits = search("终于来了")
+    assert [h["id"] for h in hits] == [rain["id"]]
+    assert "<mark>终于来了</mark>" in hits[0]["snippet"]
+    assert [h["title"] for h in search("skyline")] == ["天台"]
+    assert [h["title"] for h in search("陈")] == ["雨夜"]
+    assert search("不存在的台词") == []
+
+    # 修改正文后检索词随之更新
+    client.patch(f"/api/v1/scripts/{rain['id']}/content", params={"content": "周野独自离开"}, headers=auth_headers)
+    assert search("终于来了") == []
+    assert [h["title"] for h in search("周野")] == ["雨夜"]
+
+    client.delete(f"/api/v1/scripts/{rain['id']}", headers=auth_headers)
+    assert search("周野") == []
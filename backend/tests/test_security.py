@@ -16,3 +16,19 @@ def test_access_token():
     assert payload is not None
     assert payload["sub"] == user_id
     assert payload["type"] == "access"
+
+
+def test_verified_token_cache():
+    from datetime import timedelta
+    from app.core.security import VerifiedTokenCache
+
+    cache = VerifiedTokenCache(max_size=1)
+    token = create_access_token("42")
+    assert cache.decode(token)["sub"] == "42"
+    assert cache.decode(token)["sub"] == "42"
+    assert cache.stats()["hits"] == 1
+
+    assert cache.decode("not-a-token") is None
+    expired = create_access_token("42", expires_delta=timedelta(seconds=-1))
+    assert cache.decode(expired) is None
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,63 @@
+import pytest
+
+from app.services.suggestions import SuggestionContext, SuggestionEngine, SuggestionRule, _registry
+
+DRAFT = """=== 场景1：开头 ===
+角色A：你终于来了
+角色B：我们之间还有什么好说的"""
+
+
+def _by_type(suggestions):
+    return {item["type"]: item["suggestion"] for item in suggestions}
+
+
+def test_rules_single_pass():
+    engine = SuggestionEngine(_registry, max_chars=1_000_000)
+    result = _by_type(engine.suggest(DRAFT))
+    assert set(result) == {"dialogue", "description", "character"}
+    # 替换结果中不再残留 $1/$2/$&
+    assert result["dialogue"].splitlines()[1:] == ["角色A：（你终于来了）", "角色B：（我们之间还有什么好说的）"]
+    assert result["description"].startswith("=== 场景1：开头 ===\n\n[画面描述]\n镜头推进，展示场景细节...\n角色A")
+    assert "主角：你终于来了" in result["character"]
+    assert "[角色设定]" in result["character"]
+
+    structured = _by_type(engine.suggest("林晓：（你好）", SuggestionContext(title="雨夜", genre="悬疑", duration=3)))
+    assert structured["structure"].startswith("雨夜\n\n类型：悬疑\n目标时长：3分钟\n\n=== 场景1：开头 ===")
+    assert "dialogue" not in structured
+
+
+def test_cache_and_rule_set_version():
+    engine = SuggestionEngine(_registry, max_chars=1_000_000)
+    first = engine.suggest(DRAFT)
+    assert engine.suggest(DRAFT) is first
+    assert engine.stats()["hits"] == 1
+
+    class LengthRule(SuggestionRule):
+        type = "length"
+        title = "篇幅"
+        description = "正文过短"
+
+        def applies(self, document):
+            return len(document.tokens["dialogue"]) < 10
+
+        def suggest(self, document):
+            return "建议扩充内容"
+
+    extended = SuggestionEngine([*_registry, LengthRule()], max_chars=1_000_000)
+    assert extended.version != engine.version
+    assert _by_type(extended.suggest(DRAFT))["length"] == "建议扩充内容"
+
+    class IncompleteRule(SuggestionRule):
+        def applies(self, document):
+            return True
+
+    with pytest.raises(TypeError):
+        IncompleteRule()
+
+
+def test_cache_evicts_by_size():
+    engine = SuggestionEngine(_registry, max_chars=len(DRAFT) * 5)
+    engine.suggest(DRAFT)
+    engine.suggest(DRAFT + "\n角色A：再见")
+    assert engine.stats()["entries"] == 1
+    assert engine.stats()["cached_chars"] <= len(DRAFT) * 5
@@ -0,0 +1,50 @@
+from app.core.user_cache import UserCache, user_cache
+
+
+def test_lru_eviction_and_stats(test_user):
+    cache = UserCache(ttl_seconds=60, max_size=1)
+    assert cache.get(test_user.id) is None
+    cache.set(test_user)
+
+    cached = cache.get(test_user.id)
+    assert cached is not test_user
+    assert cached.email == test_user.email
+
+    other = type(test_user)(id=test_user.id + 1, email="x@afm.io", username="x", hashed_password="x")
+    cache.set(other)
+    assert cache.get(test_user.id) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_skips_db_and_invalidates_on_update(client, db, test_user, auth_headers):
+    assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+    hits = user_cache.hits
+    assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+    assert user_cache.hits == hits + 1
+
+    resp = client.put("/api/v1/users/me", json={"full_name": "新名字"}, headers=auth_headers)
+    assert resp.json()["full_name"] == "新名字"
+    assert client.get("/api/v1/users/me", headers=auth_headers).json()["full_name"] == "新名字"
+
+    # 其他途径停用账号也会使缓存失效
+    test_user.is_active = False
+    db.commit()
+    assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 400
+
+
+def test_invalidation_waits_for_commit(db, test_user):
+    user_cache.set(test_user)
+    test_user.full_name = "未提交"
+    db.flush()
+    assert user_cache.get(test_user.id) is not None
+    db.rollback()
+    assert user_cache.get(test_user.id) is not None
+
+    stale = user_cache.get(test_user.id)
+    test_user.is_active = False
+    db.flush()
+    # 提交前其他请求重新缓存了旧数据
+    user_cache.set(stale)
+    db.commit()
+    assert user_cache.get(test_user.id) is None